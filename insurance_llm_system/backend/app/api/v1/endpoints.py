@@ -2,35 +2,42 @@ from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List
+import asyncio
 import logging
 
 from ...db import crud, models, session
 from ...db.session import get_db
 from ...services.query_processor import process_insurance_query
-from ...services.document_service import process_uploaded_document
+from ...services.document_service import submit_uploaded_document, submit_document_version
+from ...services.ingestion_queue import QueueFullError, get_live_progress
 from .schemas import (
     Query, QueryCreate, Decision, Document, DocumentCreate, Clause,
-    ProcessResponse, DocumentUploadResponse
+    ProcessResponse, DocumentUploadResponse, IngestionJob
 )
 from ...core.security import get_api_key
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.post("/documents/", response_model=DocumentUploadResponse, tags=["documents"])
+@router.post("/documents/", response_model=DocumentUploadResponse, status_code=202, tags=["documents"])
 async def upload_document(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 
 ):
     try:
-        result = await process_uploaded_document(db, file)
+        result = await submit_uploaded_document(db, file)
         return DocumentUploadResponse(
+            job_id=result["job_id"],
             document_id=result["document_id"],
             filename=result["filename"],
-            processed=result["processed"],
-            clauses_processed=result["clauses_processed"]
+            status=result["status"],
+            version=result["version"],
+            deduplicated=result["deduplicated"]
         )
+    except QueueFullError as e:
+        logger.warning(f"Document upload rejected: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
     except ValueError as e:
         logger.error(f"Document upload error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -38,6 +45,62 @@ async def upload_document(
         logger.error(f"Unexpected document upload error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/documents/{document_id}/versions", response_model=DocumentUploadResponse, status_code=202, tags=["documents"])
+async def upload_document_version(
+    document_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+
+):
+    """Upload a new version of a document; only changed clauses are re-embedded"""
+    try:
+        result = await submit_document_version(db, document_id, file)
+        return DocumentUploadResponse(
+            job_id=result["job_id"],
+            document_id=result["document_id"],
+            filename=result["filename"],
+            status=result["status"],
+            version=result["version"],
+            deduplicated=result["deduplicated"]
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except QueueFullError as e:
+        logger.warning(f"Document version upload rejected: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    except ValueError as e:
+        logger.error(f"Document version upload error: {str(e)}")
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected document version upload error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/jobs/{job_id}", response_model=IngestionJob, tags=["documents"])
+def read_job(
+    job_id: str,
+    db: Session = Depends(get_db)
+
+):
+    job = crud.get_ingestion_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    # Running jobs report finer-grained progress from the worker's memory
+    live = get_live_progress(job.id) if job.status == "running" else None
+    live = live or {}
+    return IngestionJob(
+        id=job.id,
+        document_id=job.document_id,
+        status=job.status,
+        stage=live.get("stage", job.stage),
+        progress=live.get("progress", job.progress or 0.0),
+        error=job.error,
+        timings=live.get("timings", job.timings or {}),
+        result=live.get("result", job.result),
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at
+    )
+
 @router.get("/documents/", response_model=List[Document], tags=["documents"])
 def read_documents(
     skip: int = 0,
@@ -49,20 +112,23 @@ def read_documents(
     return documents
 
 @router.post("/process/", response_model=ProcessResponse, tags=["queries"])
-def process_query(
+async def process_query(
     query: QueryCreate,
     db: Session = Depends(get_db)
 
 ):
     try:
-        # Store the raw query first
-        db_query = crud.create_query(db, document_id=query.document_id, raw_query=query.raw_query)
+        # Store the raw query first (database calls run off the event loop)
+        db_query = await asyncio.to_thread(
+            crud.create_query, db, document_id=query.document_id, raw_query=query.raw_query
+        )
         
         # Process the query
-        result = process_insurance_query(db, query.raw_query, query.document_id)
+        result = await process_insurance_query(db, query.raw_query, query.document_id, db_query.id)
         
         # Store the decision
-        decision = crud.create_decision(
+        decision = await asyncio.to_thread(
+            crud.create_decision,
             db,
             query_id=db_query.id,
             decision=result.decision,
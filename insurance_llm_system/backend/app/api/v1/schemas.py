@@ -75,7 +75,25 @@ class ProcessResponse(BaseModel):
     query_id: int
 
 class DocumentUploadResponse(BaseModel):
+    job_id: Optional[str]
     document_id: int
     filename: str
-    processed: bool
-    clauses_processed: int
\ No newline at end of file
+    status: str
+    version: int = 1
+    deduplicated: bool = False
+
+class IngestionJob(BaseModel):
+    id: str
+    document_id: int
+    status: str
+    stage: Optional[str]
+    progress: float
+    error: Optional[str]
+    timings: Dict[str, float]
+    result: Optional[Dict[str, Any]]
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    
+    class Config:
+        orm_mode = True
\ No newline at end of file
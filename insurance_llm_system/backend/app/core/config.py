@@ -33,17 +33,87 @@ class Settings(BaseSettings):
         default=["pdf", "docx", "txt"],
         description="Supported file extensions"
     )
-    CHUNK_SIZE: int = Field(
-        default=1000,
-        description="Character count for text chunking"
+    CHUNK_MAX_TOKENS: int = Field(
+        default=256,
+        description="Maximum tokens per chunk"
     )
-    CHUNK_OVERLAP: int = Field(
-        default=200,
-        description="Character overlap between chunks"
+    CHUNK_OVERLAP_TOKENS: int = Field(
+        default=48,
+        description="Maximum tokens repeated from the previous chunk when a split is not at a clause boundary"
+    )
+    CHUNK_TOKENIZER: str = Field(
+        default="cl100k_base",
+        description="tiktoken encoding used to count chunk tokens (text-embedding-ada-002 uses cl100k_base)"
+    )
+
+    # Embedding Configuration
+    EMBEDDING_BATCH_SIZE: int = Field(
+        default=96,
+        description="Maximum number of texts sent in a single embedding request"
+    )
+    EMBEDDING_BATCH_MAX_TOKENS: int = Field(
+        default=60000,
+        description="Approximate token budget for a single embedding request"
+    )
+    EMBEDDING_CACHE_ENABLED: bool = Field(
+        default=True,
+        description="Reuse embeddings for previously seen (model, text) pairs"
+    )
+    EMBEDDING_CACHE_PATH: str = Field(
+        default="./cache/embeddings.sqlite3",
+        description="SQLite file backing the persistent embedding cache"
+    )
+    EMBEDDING_CACHE_MAX_BYTES: int = Field(
+        default=512 * 1024 * 1024,
+        description="Vector bytes kept on disk before least recently used entries are evicted"
+    )
+    EMBEDDING_CACHE_MEMORY_ITEMS: int = Field(
+        default=20000,
+        description="Embeddings kept in the in-process LRU tier"
     )
 
-    PDF_MAX_PAGES: int = 20
+    # Ingestion Queue Configuration
+    INGESTION_WORKERS: int = Field(
+        default=2,
+        description="Number of worker threads running the ingestion pipeline"
+    )
+    INGESTION_QUEUE_SIZE: int = Field(
+        default=32,
+        description="Maximum queued ingestion jobs before uploads are rejected"
+    )
+    INGESTION_POLL_INTERVAL_S: float = Field(
+        default=2.0,
+        description="How often idle workers poll the job table for new work"
+    )
+    INGESTION_SPOOL_DIR: str = Field(
+        default="./uploads",
+        description="Directory holding uploaded files until they are ingested"
+    )
+
+    # PDF Extraction Configuration
+    PDF_MAX_PAGES: int = Field(
+        default=0,
+        description="Maximum PDF pages to extract (0 extracts the whole document)"
+    )
+    PDF_PARALLEL_WORKERS: int = Field(
+        default=4,
+        description="Worker processes used for page-parallel PDF and email attachment extraction (1 disables)"
+    )
+    PDF_PAGES_PER_TASK: int = Field(
+        default=8,
+        description="Number of consecutive pages extracted by one worker task"
+    )
+    PDF_PARALLEL_MIN_PAGES: int = Field(
+        default=16,
+        description="Smallest page count worth splitting across worker processes"
+    )
     PDF_MAX_SIZE_MB: int = 10
+
+    # DOCX Extraction Configuration
+    DOCX_STREAMING: bool = Field(
+        default=True,
+        description="Stream word/document.xml with iterparse instead of loading the python-docx object model"
+    )
     CLEANER_CONFIG: dict[str, str] = {
         "remove_headers": "true",
         "normalize_spacing": "true"
@@ -58,11 +128,55 @@ class Settings(BaseSettings):
         default=None,
         description="Test database connection URL"
     )
+    EMBEDDING_STORAGE: Literal["float32", "float16", "int8"] = Field(
+        default="float32",
+        description="Binary format of clause embeddings in the database (float16 halves, int8 quarters the size)"
+    )
 
     # Vector Database Configuration
     VECTOR_DB: str = Field(
         default="pinecone",
-        description="Vector database provider (pinecone|chroma)"
+        description="Vector database provider (pinecone|chroma|local)"
+    )
+    LOCAL_VECTOR_DIR: str = Field(
+        default="./vector_index",
+        description="Directory holding the per-document matrices of the local vector backend"
+    )
+    ANN_ENABLED: bool = Field(
+        default=True,
+        description="Serve cross-document local searches from an IVF-PQ index instead of scanning every document"
+    )
+    ANN_MIN_VECTORS: int = Field(
+        default=20000,
+        description="Total clause vectors below which cross-document searches stay exact"
+    )
+    ANN_NLIST: int = Field(
+        default=0,
+        description="Coarse IVF cells (0 picks about 4 * sqrt(vectors) when the index is trained)"
+    )
+    ANN_NPROBE: int = Field(
+        default=16,
+        description="IVF cells scanned per query; higher raises recall and latency"
+    )
+    ANN_PQ_SUBQUANTIZERS: int = Field(
+        default=64,
+        description="Product-quantizer bytes per vector; must divide the embedding dimension"
+    )
+    ANN_RERANK_FACTOR: int = Field(
+        default=10,
+        description="Approximate candidates per requested result that are re-scored with exact vectors"
+    )
+    ANN_COMPACT_RATIO: float = Field(
+        default=0.2,
+        description="Fraction of tombstoned rows that triggers compaction of the IVF-PQ index"
+    )
+    ANN_EXACT_FILTER_ROWS: int = Field(
+        default=5000,
+        description="Filtered searches matching at most this many vectors are answered exactly"
+    )
+    CHROMA_COLLECTION_NAME: str = Field(
+        default="insurance-clauses",
+        description="ChromaDB collection holding clause vectors"
     )
     PINECONE_API_KEY: str = Field(
         default="",
@@ -77,6 +191,74 @@ class Settings(BaseSettings):
         description="Pinecone index name"
     )
 
+    # Retrieval Configuration
+    RETRIEVAL_TOP_K: int = Field(
+        default=5,
+        description="Clauses retrieved per query for the decision prompt"
+    )
+    RETRIEVAL_MODE: Literal["vector", "hybrid", "lexical"] = Field(
+        default="hybrid",
+        description="Vector search only, BM25 fused with vector search, or BM25 only"
+    )
+    RETRIEVAL_FUSION_DEPTH: int = Field(
+        default=4,
+        description="Candidates per ranking fused in hybrid mode, as a multiple of RETRIEVAL_TOP_K"
+    )
+    RRF_K: int = Field(
+        default=60,
+        description="Reciprocal rank fusion constant (score = sum of 1 / (RRF_K + rank))"
+    )
+    LEXICAL_SHORTCUT_STRENGTH: float = Field(
+        default=0.6,
+        description="BM25 match strength (0-1) at which hybrid retrieval skips the embedding call (0 disables)"
+    )
+    LEXICAL_INDEX_DIR: str = Field(
+        default="./lexical_index",
+        description="Directory holding the per-document BM25 inverted indexes"
+    )
+    CLAUSE_CACHE_DOCUMENTS: int = Field(
+        default=256,
+        description="Documents whose clause records are cached for filling in incomplete vector store results"
+    )
+    CLAUSE_MATRIX_CACHE_ENABLED: bool = Field(
+        default=True,
+        description="Answer retrieval from in-process per-document embedding matrices loaded from the clause table"
+    )
+    CLAUSE_MATRIX_CACHE_MAX_BYTES: int = Field(
+        default=512 * 1024 * 1024,
+        description="Matrix and text bytes kept resident before least recently used documents are evicted"
+    )
+    QUERY_CACHE_ENABLED: bool = Field(
+        default=True,
+        description="Cache query embeddings by normalized semantic query and retrieved clauses per document and query"
+    )
+    QUERY_EMBEDDING_CACHE_ITEMS: int = Field(
+        default=4096,
+        description="Normalized semantic queries whose embeddings are kept in memory"
+    )
+    QUERY_EMBEDDING_CACHE_TTL_S: float = Field(
+        default=24 * 3600,
+        description="Seconds a cached query embedding stays valid"
+    )
+    RETRIEVAL_CACHE_ITEMS: int = Field(
+        default=4096,
+        description="(document, query, top-k) retrieval results kept in memory"
+    )
+    RETRIEVAL_CACHE_TTL_S: float = Field(
+        default=900,
+        description="Seconds a cached retrieval result stays valid; re-indexing a document drops its entries at once"
+    )
+
+    # Prompt Configuration
+    PROMPT_CONTEXT_TOKENS: int = Field(
+        default=1500,
+        description="Token budget for retrieved clauses in the decision prompt, filled best score first"
+    )
+    PROMPT_TOKENIZER: str = Field(
+        default="o200k_base",
+        description="tiktoken encoding used to count prompt tokens (gpt-4o models use o200k_base)"
+    )
+
     # LLM Configuration
     LLM_PROVIDER: Literal['openai', 'llama'] = Field(
         default='openai',
@@ -94,6 +276,62 @@ class Settings(BaseSettings):
         default="gpt-4o-mini",
         description="OpenAI model name"
     )
+    OPENAI_BASE_URL: str = Field(
+        default="https://api.openai.com/v1",
+        description="Base URL of the OpenAI API (point at a proxy or mock server)"
+    )
+    OPENAI_TIMEOUT_S: float = Field(
+        default=30.0,
+        description="Socket read timeout for a single OpenAI request"
+    )
+    OPENAI_CONNECT_TIMEOUT_S: float = Field(
+        default=5.0,
+        description="Connect and pool-acquire timeout for OpenAI requests"
+    )
+    OPENAI_MAX_CONNECTIONS: int = Field(
+        default=100,
+        description="Maximum concurrent connections in the shared async OpenAI client"
+    )
+    OPENAI_KEEPALIVE_S: float = Field(
+        default=30.0,
+        description="How long an idle connection of the async OpenAI client is kept for reuse"
+    )
+    OPENAI_MAX_RETRIES: int = Field(
+        default=3,
+        description="Retries for rate-limited, 5xx or failed-connection OpenAI requests"
+    )
+    OPENAI_RETRY_BACKOFF_S: float = Field(
+        default=0.5,
+        description="Base delay for exponential retry backoff (full jitter)"
+    )
+    OPENAI_RETRY_MAX_BACKOFF_S: float = Field(
+        default=8.0,
+        description="Upper bound on a single retry delay"
+    )
+    OPENAI_RATE_LIMIT_ENABLED: bool = Field(
+        default=True,
+        description="Queue OpenAI calls behind request/token budgets with interactive calls first"
+    )
+    OPENAI_CHAT_RPM: int = Field(
+        default=500,
+        description="Chat completion requests per minute allowed by the account tier"
+    )
+    OPENAI_CHAT_TPM: int = Field(
+        default=200000,
+        description="Chat completion tokens per minute (prompt plus max_tokens)"
+    )
+    OPENAI_EMBEDDING_RPM: int = Field(
+        default=3000,
+        description="Embedding requests per minute allowed by the account tier"
+    )
+    OPENAI_EMBEDDING_TPM: int = Field(
+        default=1000000,
+        description="Embedding tokens per minute"
+    )
+    FALLBACK_TO_OPENAI: bool = Field(
+        default=True,
+        description="Retry with OpenAI when the local LLM fails"
+    )
     LLAMA_MODEL_PATH: str = Field(
         default="",
         description="Path to local Llama model"
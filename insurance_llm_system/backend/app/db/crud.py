@@ -1,13 +1,17 @@
+from sqlalchemy import delete, insert, update
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
 from . import models
 from typing import Optional, List, Dict
 import uuid
 
-def create_document(db: Session, filename: str, file_type: str, file_size: int, metadata: dict = None):
+def create_document(db: Session, filename: str, file_type: str, file_size: int, metadata: dict = None,
+                    content_hash: str = None):
     db_document = models.Document(
         filename=filename,
         file_type=file_type,
         file_size=file_size,
+        content_hash=content_hash,
         metadata=metadata or {}
     )
     db.add(db_document)
@@ -18,6 +22,9 @@ def create_document(db: Session, filename: str, file_type: str, file_size: int,
 def get_document(db: Session, document_id: int):
     return db.query(models.Document).filter(models.Document.id == document_id).first()
 
+def get_document_by_hash(db: Session, content_hash: str):
+    return db.query(models.Document).filter(models.Document.content_hash == content_hash).first()
+
 def get_documents(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Document).offset(skip).limit(limit).all()
 
@@ -34,6 +41,101 @@ def create_clause(db: Session, document_id: int, clause_text: str, section: str
     db.refresh(db_clause)
     return db_clause
 
+def create_clauses_bulk(db: Session, document_id: int, clauses: List[Dict]) -> List[int]:
+    """
+    Insert many clauses for a document in a single statement.
+    Does not commit, so the caller controls the transaction.
+    Each clause dict takes clause_text and optional section, page_number,
+    content_hash, embeddings.
+    Returns the new clause ids in input order.
+    """
+    if not clauses:
+        return []
+    rows = [
+        {
+            "document_id": document_id,
+            "clause_text": clause["clause_text"],
+            "section": clause.get("section"),
+            "page_number": clause.get("page_number"),
+            "content_hash": clause.get("content_hash"),
+            "embeddings": clause.get("embeddings")
+        }
+        for clause in clauses
+    ]
+
+    dialect = db.get_bind().dialect
+    if getattr(dialect, "insert_executemany_returning_sort_by_parameter_order", False):
+        stmt = insert(models.Clause).returning(models.Clause.id, sort_by_parameter_order=True)
+        return list(db.execute(stmt, rows).scalars())
+
+    # Backends without executemany RETURNING: flush ORM objects to get their ids
+    db_clauses = [models.Clause(**row) for row in rows]
+    db.add_all(db_clauses)
+    db.flush()
+    return [clause.id for clause in db_clauses]
+
+def get_clause_ids_by_hash(db: Session, document_id: int) -> Dict[Optional[str], List[int]]:
+    """Map content hash -> clause ids for a document's stored clauses"""
+    by_hash: Dict[Optional[str], List[int]] = {}
+    rows = (
+        db.query(models.Clause.id, models.Clause.content_hash)
+        .filter(models.Clause.document_id == document_id)
+        .order_by(models.Clause.id)
+    )
+    for clause_id, content_hash in rows:
+        by_hash.setdefault(content_hash, []).append(clause_id)
+    return by_hash
+
+def get_clauses_by_ids(db: Session, clause_ids: List[int], document_id: Optional[int] = None) -> Dict[int, Dict]:
+    """
+    Clause records ({id, text, section, page_number}) by id in one IN query.
+    Embeddings are not loaded. Missing ids are absent from the result.
+    """
+    if not clause_ids:
+        return {}
+    query = db.query(
+        models.Clause.id, models.Clause.clause_text, models.Clause.section, models.Clause.page_number
+    ).filter(models.Clause.id.in_(clause_ids))
+    if document_id is not None:
+        query = query.filter(models.Clause.document_id == document_id)
+    return {
+        clause_id: {"id": clause_id, "text": text, "section": section, "page_number": page_number}
+        for clause_id, text, section, page_number in query
+    }
+
+def get_document_clauses(db: Session, document_id: int):
+    """A document's clause ids, texts, sections, pages and embeddings in id order"""
+    return (
+        db.query(
+            models.Clause.id, models.Clause.clause_text, models.Clause.section,
+            models.Clause.page_number, models.Clause.embeddings
+        )
+        .filter(models.Clause.document_id == document_id)
+        .order_by(models.Clause.id)
+        .all()
+    )
+
+def get_clause_texts(db: Session, document_id: int) -> List[tuple]:
+    """A document's (clause id, clause text) pairs in id order"""
+    return (
+        db.query(models.Clause.id, models.Clause.clause_text)
+        .filter(models.Clause.document_id == document_id)
+        .order_by(models.Clause.id)
+        .all()
+    )
+
+def delete_clauses_by_ids(db: Session, clause_ids: List[int], batch_size: int = 500) -> int:
+    """Delete clauses by id without committing; returns the number deleted"""
+    deleted = 0
+    for start in range(0, len(clause_ids), batch_size):
+        result = db.execute(
+            delete(models.Clause)
+            .where(models.Clause.id.in_(clause_ids[start:start + batch_size]))
+            .execution_options(synchronize_session=False)
+        )
+        deleted += result.rowcount
+    return deleted
+
 def create_query(db: Session, document_id: int, raw_query: str, processed_query: dict = None):
     db_query = models.Query(
         document_id=document_id,
@@ -58,4 +160,129 @@ def create_decision(db: Session, query_id: int, decision: str, amount: int = Non
     db.add(db_decision)
     db.commit()
     db.refresh(db_decision)
-    return db_decision
\ No newline at end of file
+    return db_decision
+
+def create_ingestion_job(db: Session, document_id: int, file_path: str):
+    db_job = models.IngestionJob(
+        id=str(uuid.uuid4()),
+        document_id=document_id,
+        file_path=file_path,
+        status="queued",
+        stage="queued",
+        progress=0.0,
+        timings={}
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def create_document_with_ingestion_job(db: Session, filename: str, file_type: str, file_size: int,
+                                       file_path: str, content_hash: str = None):
+    """Create a document and its first ingestion job in one transaction"""
+    db_document = models.Document(
+        filename=filename,
+        file_type=file_type,
+        file_size=file_size,
+        content_hash=content_hash
+    )
+    db.add(db_document)
+    db.flush()
+    db_job = models.IngestionJob(
+        id=str(uuid.uuid4()),
+        document_id=db_document.id,
+        file_path=file_path,
+        status="queued",
+        stage="queued",
+        progress=0.0,
+        timings={}
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_document)
+    db.refresh(db_job)
+    return db_document, db_job
+
+def create_document_version_job(db: Session, document_id: int, filename: str, file_type: str,
+                                file_size: int, file_path: str, content_hash: str):
+    """
+    Point a document at a new version of its file and queue the re-index job,
+    in one transaction. The document stays unprocessed until the job finishes.
+    """
+    db_document = get_document(db, document_id)
+    db_document.filename = filename
+    db_document.file_type = file_type
+    db_document.file_size = file_size
+    db_document.content_hash = content_hash
+    db_document.processed = False
+    db_document.version = (db_document.version or 1) + 1
+    db_job = models.IngestionJob(
+        id=str(uuid.uuid4()),
+        document_id=document_id,
+        file_path=file_path,
+        status="queued",
+        stage="queued",
+        progress=0.0,
+        timings={}
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_document)
+    db.refresh(db_job)
+    return db_document, db_job
+
+def get_ingestion_job(db: Session, job_id: str):
+    return db.query(models.IngestionJob).filter(models.IngestionJob.id == job_id).first()
+
+def get_active_ingestion_job(db: Session, document_id: int):
+    """Queued or running job for a document, if any"""
+    return (
+        db.query(models.IngestionJob)
+        .filter(
+            models.IngestionJob.document_id == document_id,
+            models.IngestionJob.status.in_(["queued", "running"])
+        )
+        .order_by(models.IngestionJob.created_at.desc())
+        .first()
+    )
+
+def count_queued_ingestion_jobs(db: Session) -> int:
+    return db.query(models.IngestionJob).filter(models.IngestionJob.status == "queued").count()
+
+def claim_next_ingestion_job(db: Session) -> Optional[str]:
+    """Atomically move the oldest queued job to running; returns its id or None"""
+    candidates = (
+        db.query(models.IngestionJob.id)
+        .filter(models.IngestionJob.status == "queued")
+        .order_by(models.IngestionJob.created_at, models.IngestionJob.id)
+        .limit(5)
+        .all()
+    )
+    for (job_id,) in candidates:
+        result = db.execute(
+            update(models.IngestionJob)
+            .where(models.IngestionJob.id == job_id, models.IngestionJob.status == "queued")
+            .values(status="running", started_at=func.now())
+        )
+        db.commit()
+        if result.rowcount == 1:
+            return job_id
+    return None
+
+def update_ingestion_job(db: Session, job_id: str, **fields):
+    db.execute(
+        update(models.IngestionJob)
+        .where(models.IngestionJob.id == job_id)
+        .values(**fields)
+    )
+    db.commit()
+
+def requeue_interrupted_ingestion_jobs(db: Session) -> int:
+    """Return jobs left running by a previous process to the queue"""
+    result = db.execute(
+        update(models.IngestionJob)
+        .where(models.IngestionJob.status == "running")
+        .values(status="queued", stage="queued", progress=0.0)
+    )
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,67 @@
+"""Add model columns that databases created before them lack.
+
+create_all only creates missing tables, so an existing database (such as
+the shipped insurance.db) keeps its old columns. Each column listed here
+is added as nullable, backfilled with the model's scalar default and
+given the indexes the model declares for it. init_db runs this at
+startup; it can also be run by hand.
+
+Usage:
+    python -m backend.app.db.migrate_columns
+"""
+import logging
+from typing import List
+from sqlalchemy import Column, inspect, text
+from sqlalchemy.engine import Engine
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+from .session import Base
+
+logger = logging.getLogger(__name__)
+
+# (table, column) added to a model after its table first shipped
+ADDED_COLUMNS = [
+    ("documents", "content_hash"),  # upload deduplication
+    ("documents", "version"),  # incremental re-indexing of new versions
+    ("clauses", "content_hash"),  # clause reuse across versions
+]
+
+def missing_columns(engine: Engine) -> List[Column]:
+    """Listed model columns absent from existing tables"""
+    inspector = inspect(engine)
+    missing = []
+    for table_name, column_name in ADDED_COLUMNS:
+        if not inspector.has_table(table_name):
+            continue  # create_all builds it complete
+        existing = {column["name"] for column in inspector.get_columns(table_name)}
+        if column_name not in existing:
+            missing.append(Base.metadata.tables[table_name].columns[column_name])
+    return missing
+
+def add_missing_columns(engine: Engine) -> List[str]:
+    """Add, backfill and index each missing column; returns 'table.column' names added"""
+    added = []
+    for column in missing_columns(engine):
+        table = column.table
+        column_type = column.type.compile(dialect=engine.dialect)
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            if column.default is not None and column.default.is_scalar:
+                connection.execute(
+                    text(f"UPDATE {table.name} SET {column.name} = :value WHERE {column.name} IS NULL"),
+                    {"value": column.default.arg}
+                )
+            for index in table.indexes:
+                if column.name in index.columns:
+                    index.create(connection, checkfirst=True)
+        added.append(f"{table.name}.{column.name}")
+        logger.info(f"Added column {table.name}.{column.name}")
+    return added
+
+def main():
+    from .session import engine
+
+    added = add_missing_columns(engine)
+    logger.info(f"Column migration finished: {', '.join(added) or 'nothing to add'}")
+
+if __name__ == "__main__":
+    main()
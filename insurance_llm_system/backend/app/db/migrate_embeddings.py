@@ -0,0 +1,108 @@
+"""Rewrite JSON-encoded clause embeddings as binary blobs.
+
+Clause.embeddings used to be a JSON column. SQLite keeps the declared
+column and only rewrites rows still holding JSON text (they stay readable
+until then). Other databases get a binary column added, backfilled and
+renamed over the JSON one, which the new column type requires before any
+clause can be written.
+
+Usage:
+    python -m backend.app.db.migrate_embeddings [--batch-size 500] [--storage float16] [--vacuum]
+"""
+import argparse
+import json
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import JSON, LargeBinary
+from ..core.config import settings
+from .types import encode_embedding
+
+logger = logging.getLogger(__name__)
+
+TABLE = "clauses"
+COLUMN = "embeddings"
+
+def _json_vector(value):
+    # psycopg returns json columns already parsed
+    return json.loads(value) if isinstance(value, str) else value
+
+def needs_migration(engine: Engine) -> bool:
+    """Whether the clauses table still declares a JSON embeddings column (non-SQLite)"""
+    if engine.dialect.name == "sqlite":
+        return False  # Legacy JSON text is decoded on read
+    inspector = inspect(engine)
+    if not inspector.has_table(TABLE):
+        return False
+    return any(
+        column["name"] == COLUMN and isinstance(column["type"], JSON)
+        for column in inspector.get_columns(TABLE)
+    )
+
+def _rewrite_rows(engine: Engine, select_sql: str, target: str, batch_size: int, storage: str) -> int:
+    """
+    Encode the selected (id, json) rows into `target`, one transaction per
+    batch, walking the table in id order; returns rows rewritten
+    """
+    rewritten, after = 0, -1
+    update = text(f"UPDATE {TABLE} SET {target} = :blob WHERE id = :id")
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(text(select_sql), {"after": after, "limit": batch_size}).fetchall()
+            if not rows:
+                return rewritten
+            connection.execute(update, [
+                {"id": clause_id, "blob": None if vector is None else encode_embedding(vector, storage)}
+                for clause_id, vector in ((row[0], _json_vector(row[1])) for row in rows)
+            ])
+        rewritten += len(rows)
+        after = rows[-1][0]
+        logger.info(f"Rewrote {rewritten} clause embeddings")
+
+def migrate_embeddings(engine: Engine, batch_size: int = 500, storage: str = None) -> int:
+    """Convert legacy JSON embeddings to blobs in place; returns rows rewritten"""
+    storage = storage or settings.EMBEDDING_STORAGE
+    if engine.dialect.name == "sqlite":
+        return _rewrite_rows(
+            engine,
+            f"SELECT id, {COLUMN} FROM {TABLE} WHERE id > :after AND typeof({COLUMN}) = 'text' "
+            f"ORDER BY id LIMIT :limit",
+            COLUMN, batch_size, storage
+        )
+
+    if not needs_migration(engine):
+        return 0
+    staging = f"{COLUMN}_blob"
+    blob_type = LargeBinary().compile(dialect=engine.dialect)
+    with engine.begin() as connection:
+        if staging not in {column["name"] for column in inspect(connection).get_columns(TABLE)}:
+            connection.execute(text(f"ALTER TABLE {TABLE} ADD COLUMN {staging} {blob_type}"))
+    rewritten = _rewrite_rows(
+        engine,
+        f"SELECT id, {COLUMN} FROM {TABLE} WHERE id > :after AND {staging} IS NULL AND {COLUMN} IS NOT NULL "
+        f"ORDER BY id LIMIT :limit",
+        staging, batch_size, storage
+    )
+    with engine.begin() as connection:
+        connection.execute(text(f"ALTER TABLE {TABLE} DROP COLUMN {COLUMN}"))
+        connection.execute(text(f"ALTER TABLE {TABLE} RENAME COLUMN {staging} TO {COLUMN}"))
+    return rewritten
+
+def main():
+    from .session import engine
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--storage", choices=["float32", "float16", "int8"], default=None,
+                        help="blob format for the rewritten rows (default: EMBEDDING_STORAGE)")
+    parser.add_argument("--vacuum", action="store_true", help="reclaim the freed space afterwards (SQLite)")
+    args = parser.parse_args()
+
+    rewritten = migrate_embeddings(engine, args.batch_size, args.storage)
+    if args.vacuum and engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            connection.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+    logger.info(f"Embedding migration finished: {rewritten} rows rewritten")
+
+if __name__ == "__main__":
+    main()
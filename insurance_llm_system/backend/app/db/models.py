@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Boolean, Float, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .session import Base
+from .types import EmbeddingVector
 
 class Document(Base):
     __tablename__ = "documents"
@@ -12,6 +13,8 @@ class Document(Base):
     file_size = Column(Integer, nullable=False)
     upload_date = Column(DateTime(timezone=True), server_default=func.now())
     processed = Column(Boolean, default=False)
+    content_hash = Column(String(64), unique=True, index=True)  # SHA-256 of the uploaded bytes
+    version = Column(Integer, default=1)  # Bumped each time a new version replaces the content
     document_metadata = Column(JSON)  # Changed from 'metadata' to avoid conflict
     
     clauses = relationship("Clause", back_populates="document", cascade="all, delete-orphan")
@@ -25,7 +28,8 @@ class Clause(Base):
     clause_text = Column(String, nullable=False)
     section = Column(String)
     page_number = Column(Integer)
-    embeddings = Column(JSON)  # Consider storing vector embeddings separately
+    content_hash = Column(String(64), index=True)  # SHA-256 of the embedded chunk text
+    embeddings = Column(EmbeddingVector)  # Binary float32/float16/int8 blob, read back as a NumPy array
     
     document = relationship("Document", back_populates="clauses")
 
@@ -52,4 +56,22 @@ class Decision(Base):
     confidence_score = Column(Integer)
     justification = Column(JSON)  # Consider using a proper JSON schema
     
-    query = relationship("Query", back_populates="decisions")
\ No newline at end of file
+    query = relationship("Query", back_populates="decisions")
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+    
+    id = Column(String(36), primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"))
+    file_path = Column(String, nullable=False)  # Spooled upload awaiting ingestion
+    status = Column(String, nullable=False, default="queued", index=True)  # queued|running|completed|failed
+    stage = Column(String, default="queued")
+    progress = Column(Float, default=0.0)
+    error = Column(String)
+    timings = Column(JSON)  # Seconds spent per pipeline stage
+    result = Column(JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    
+    document = relationship("Document")
@@ -51,6 +51,14 @@ def init_db():
     try:
         Base.metadata.create_all(bind=engine)
         logger.info("Database tables created successfully")
+        from .migrate_columns import add_missing_columns
+        add_missing_columns(engine)
+        from .migrate_embeddings import needs_migration
+        if needs_migration(engine):
+            logger.error(
+                "clauses.embeddings is still a JSON column; run "
+                "`python -m backend.app.db.migrate_embeddings` before ingesting documents"
+            )
     except Exception as e:
         logger.error(f"Failed to create database tables: {str(e)}")
         raise
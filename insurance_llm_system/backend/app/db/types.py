@@ -0,0 +1,68 @@
+import json
+import struct
+from typing import Optional, Sequence, Union
+import numpy as np
+from sqlalchemy.types import LargeBinary, TypeDecorator
+from ..core.config import settings
+
+# Blob layout: 4-byte header (format code, 3 reserved bytes), for int8 a
+# float32 scale, then the packed values. The header keeps float32/float16
+# payloads 4-byte aligned so they can be viewed in place.
+HEADER_SIZE = 4
+FORMATS = {"float32": 1, "float16": 2, "int8": 3}
+_DTYPES = {1: np.float32, 2: np.float16}
+_SCALE = struct.Struct("<f")
+
+def encode_embedding(vector: Union[Sequence[float], np.ndarray], storage: str = "float32") -> bytes:
+    """Pack a vector as float32, float16 or int8 (symmetric per-vector scale)"""
+    code = FORMATS.get(storage)
+    if code is None:
+        raise ValueError(f"Unsupported embedding storage format: {storage}")
+    values = np.asarray(vector, dtype=np.float32)
+    header = bytes([code, 0, 0, 0])
+    if storage == "int8":
+        peak = float(np.abs(values).max()) if values.size else 0.0
+        scale = peak / 127.0 if peak else 1.0
+        codes = np.clip(np.rint(values / scale), -127, 127).astype(np.int8)
+        return header + _SCALE.pack(scale) + codes.tobytes()
+    return header + values.astype(_DTYPES[code]).tobytes()
+
+def decode_embedding(blob: bytes) -> np.ndarray:
+    """
+    Unpack a stored vector. float32 and float16 blobs are returned as
+    read-only views of the bytes (no copy); int8 blobs are scaled back to
+    float32.
+    """
+    code = blob[0]
+    if code in _DTYPES:
+        return np.frombuffer(blob, dtype=_DTYPES[code], offset=HEADER_SIZE)
+    if code == FORMATS["int8"]:
+        (scale,) = _SCALE.unpack_from(blob, HEADER_SIZE)
+        return np.frombuffer(blob, dtype=np.int8, offset=HEADER_SIZE + _SCALE.size).astype(np.float32) * scale
+    raise ValueError(f"Unknown embedding blob format {code}")
+
+class EmbeddingVector(TypeDecorator):
+    """
+    Embedding column stored as a compact binary blob (EMBEDDING_STORAGE
+    selects float32, float16 or int8 for new writes). Reads return NumPy
+    arrays. Rows written before the switch still hold JSON text; they are
+    decoded transparently until `migrate_embeddings` rewrites them.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return encode_embedding(value, settings.EMBEDDING_STORAGE)
+
+    def process_result_value(self, value, dialect) -> Optional[np.ndarray]:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = json.loads(value)
+            if value is None:
+                return None
+        if isinstance(value, list):
+            return np.asarray(value, dtype=np.float32)
+        return decode_embedding(bytes(value) if isinstance(value, memoryview) else value)
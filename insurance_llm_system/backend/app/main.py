@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from .api.v1.endpoints import router as api_router
 from .core.config import settings
 from .utils.logger import configure_logging
+from .utils.metrics import metrics
 import logging
 from .db.session import init_db
 
@@ -27,10 +28,19 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize document service: {str(e)}")
         raise
     
+    # Start ingestion workers (also resumes jobs left over from a previous run)
+    from .services.ingestion_queue import ingestion_queue
+    ingestion_queue.start()
+    
     yield  # The app runs here
     
     # Shutdown logic
     logger.info("Application shutting down...")
+    ingestion_queue.stop()
+    from document_processing.text_extraction.pdf_parser import shutdown_process_pool
+    shutdown_process_pool()
+    from ml_models.llm_integration.http_client import close_openai_client
+    await close_openai_client()
     # Add any cleanup logic here
     # Example: await close_database_connections()
 
@@ -59,3 +69,7 @@ app.include_router(api_router, prefix="/api/v1")
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": app.version}
+
+@app.get("/metrics")
+async def read_metrics():
+    return metrics.snapshot()
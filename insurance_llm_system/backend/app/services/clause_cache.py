@@ -0,0 +1,203 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..db import crud
+from ..utils.metrics import metrics
+from .query_cache import retrieval_results
+from document_processing.vector_db.local_integration import normalize_rows
+
+class ClauseRecordCache:
+    """
+    Clause records ({id, text, section, page_number}) seen per document,
+    least recently used documents evicted first. Only fills in what a vector
+    store result is missing, so it holds the few clauses each document's
+    queries actually hit.
+    """
+
+    def __init__(self, max_documents: int = None):
+        self.max_documents = max_documents or settings.CLAUSE_CACHE_DOCUMENTS
+        self._documents: "OrderedDict[int, Dict[int, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, document_id: int, clause_ids: Iterable[int]) -> Tuple[Dict[int, Dict], List[int]]:
+        """Cached records by id, and the ids that are not cached"""
+        with self._lock:
+            records = self._documents.get(document_id, {})
+            if records:
+                self._documents.move_to_end(document_id)
+            found, missing = {}, []
+            for clause_id in clause_ids:
+                if clause_id in records:
+                    found[clause_id] = records[clause_id]
+                else:
+                    missing.append(clause_id)
+            return found, missing
+
+    def put(self, document_id: int, records: Iterable[Dict]):
+        with self._lock:
+            cached = self._documents.setdefault(document_id, {})
+            cached.update((record["id"], record) for record in records)
+            self._documents.move_to_end(document_id)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+
+    def invalidate(self, document_id: int):
+        with self._lock:
+            self._documents.pop(document_id, None)
+
+# Process-wide cache
+clause_records = ClauseRecordCache()
+
+def hydrate_clauses(db: Session, document_id: int, matches: List[Dict]) -> List[Dict]:
+    """
+    Turn vector store matches into clause records, keeping their order.
+    Text, section and page number come from the store's metadata; matches
+    without text are filled from the cache, then with one batched query.
+    Matches whose clause no longer exists are dropped.
+    """
+    records, incomplete = [], []
+    for match in matches:
+        record = {
+            "id": int(match["id"]),
+            "text": match.get("text"),
+            "section": match.get("section"),
+            "page_number": match.get("page_number"),
+            "score": match.get("score")
+        }
+        records.append(record)
+        if record["text"] is None:
+            incomplete.append(record["id"])
+
+    if incomplete:
+        found, missing = clause_records.get(document_id, incomplete)
+        metrics.inc("clause_hydration_cache_hits", len(found))
+        if missing:
+            metrics.inc("clause_hydration_db_queries")
+            loaded = crud.get_clauses_by_ids(db, missing, document_id)
+            clause_records.put(document_id, loaded.values())
+            found.update(loaded)
+        for record in records:
+            if record["text"] is None and record["id"] in found:
+                record.update(found[record["id"]])
+        records = [record for record in records if record["text"] is not None]
+    return records
+
+class DocumentClauses:
+    """A document's unit-length embedding matrix with the aligned clause ids and texts"""
+    __slots__ = ("ids", "matrix", "texts", "sections", "pages", "nbytes")
+
+    def __init__(self, ids: Sequence[int], matrix: np.ndarray, texts: List[str], sections: List, pages: List):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.matrix = matrix
+        self.texts = texts
+        self.sections = sections
+        self.pages = pages
+        self.nbytes = self.matrix.nbytes + self.ids.nbytes + sum(len(text) for text in texts)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def search(self, query: np.ndarray, top_k: int) -> List[Dict]:
+        """Top-k clause records by cosine similarity to a unit-length query"""
+        count = len(self.texts)
+        if count == 0 or top_k <= 0:
+            return []
+        scores = self.matrix @ query
+        if top_k < count:
+            rows = np.argpartition(scores, count - top_k)[count - top_k:]
+        else:
+            rows = np.arange(count)
+        rows = rows[np.argsort(scores[rows])[::-1]]
+        return [
+            {
+                "id": int(self.ids[row]),
+                "text": self.texts[row],
+                "section": self.sections[row],
+                "page_number": self.pages[row],
+                "score": float(scores[row])
+            }
+            for row in rows
+        ]
+
+def load_document_clauses(db: Session, document_id: int) -> DocumentClauses:
+    """Build a document's matrix from its clause rows; rows without an embedding are skipped"""
+    rows = [row for row in crud.get_document_clauses(db, document_id) if row.embeddings is not None]
+    if rows:
+        matrix = normalize_rows(np.stack([row.embeddings for row in rows]).astype(np.float32, copy=False))
+    else:
+        matrix = np.empty((0, 0), dtype=np.float32)
+    return DocumentClauses(
+        [row.id for row in rows], matrix,
+        [row.clause_text for row in rows], [row.section for row in rows], [row.page_number for row in rows]
+    )
+
+class ClauseMatrixCache:
+    """
+    Per-document DocumentClauses, least recently used documents evicted once
+    the resident bytes exceed `max_bytes`. Entries are loaded outside the
+    lock; a load that overlaps an invalidation of the same document is
+    returned to its caller but not kept.
+    """
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes or settings.CLAUSE_MATRIX_CACHE_MAX_BYTES
+        self._entries: "OrderedDict[int, DocumentClauses]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._lookups = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, document_id: int, load: Callable[[], DocumentClauses]) -> DocumentClauses:
+        with self._lock:
+            self._lookups += 1
+            entry = self._entries.get(document_id)
+            if entry is not None:
+                self._hits += 1
+                self._entries.move_to_end(document_id)
+            version = self._versions.get(document_id, 0)
+            hit_rate = self._hits / self._lookups
+        metrics.set_gauge("clause_matrix_cache_hit_rate", hit_rate)
+        if entry is not None:
+            metrics.inc("clause_matrix_cache_hits")
+            return entry
+
+        metrics.inc("clause_matrix_cache_misses")
+        entry = load()
+        with self._lock:
+            if self._versions.get(document_id, 0) == version and entry.nbytes <= self.max_bytes:
+                previous = self._entries.pop(document_id, None)
+                if previous is not None:
+                    self._bytes -= previous.nbytes
+                self._entries[document_id] = entry
+                self._bytes += entry.nbytes
+                evicted = 0
+                while self._bytes > self.max_bytes:
+                    _, oldest = self._entries.popitem(last=False)
+                    self._bytes -= oldest.nbytes
+                    evicted += 1
+                metrics.inc("clause_matrix_cache_evictions", evicted)
+            resident = self._bytes
+        metrics.set_gauge("clause_matrix_cache_bytes", resident)
+        return entry
+
+    def invalidate(self, document_id: int):
+        with self._lock:
+            self._versions[document_id] = self._versions.get(document_id, 0) + 1
+            entry = self._entries.pop(document_id, None)
+            if entry is not None:
+                self._bytes -= entry.nbytes
+            resident = self._bytes
+        metrics.set_gauge("clause_matrix_cache_bytes", resident)
+
+# Process-wide cache
+clause_matrices = ClauseMatrixCache()
+
+def invalidate_document(document_id: int):
+    """Drop everything cached for a document after its clauses change"""
+    clause_records.invalidate(document_id)
+    clause_matrices.invalidate(document_id)
+    retrieval_results.invalidate(document_id)
@@ -0,0 +1,147 @@
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+from ..core.config import settings
+from ..utils.metrics import metrics
+from document_processing.preprocessing.chunker import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Shortest shared text taken as chunk overlap rather than coincidence
+MIN_OVERLAP_CHARS = 20
+INLINE_WHITESPACE = re.compile(r'[^\S\n]+')
+# Ingestion labels each chunk "<section title>_<n>", n counting the section's chunks
+SECTION_LABEL = re.compile(r'^(?P<title>.*)_(?P<index>\d+)$', re.S)
+
+def prompt_tokens(text: str) -> int:
+    """Token count under the chat model's tokenizer (estimated without tiktoken)"""
+    return count_tokens(text, settings.PROMPT_TOKENIZER)
+
+def _section_label(label: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+    """(section title, chunk number within it) of an ingestion label; the number is None if absent"""
+    match = SECTION_LABEL.match(label or "")
+    if match is None:
+        return label, None
+    return match.group("title"), int(match.group("index"))
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right`, or 0 if shorter than MIN_OVERLAP_CHARS"""
+    probe = right[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+    # The earliest match is the longest overlap
+    start = left.find(probe, max(0, len(left) - len(right)))
+    while start != -1:
+        if right.startswith(left[start:]):
+            return len(left) - start
+        start = left.find(probe, start + 1)
+    return 0
+
+def _join(left: Dict, right: Dict) -> Optional[str]:
+    """Text of `left` continued by `right`, or None when `right` does not continue it"""
+    if right["text"] in left["text"]:
+        return left["text"]
+    shared = _overlap(left["text"], right["text"])
+    if shared:
+        return left["text"] + right["text"][shared:]
+    # Chunks split at a clause or paragraph break share no text; neighbours
+    # are consecutive chunks of the same section (consecutive ids when the
+    # labels carry no chunk number)
+    if right["title"] == left["title"]:
+        if left["last_index"] is not None and right["first_index"] is not None:
+            adjacent = right["first_index"] == left["last_index"] + 1
+        else:
+            adjacent = right["first_id"] == left["last_id"] + 1
+        if adjacent:
+            return left["text"] + "\n" + right["text"]
+    return None
+
+def merge_clauses(clauses: List[Dict]) -> List[Dict]:
+    """
+    Merge retrieved chunks (in retrieval order, best first) that overlap
+    or follow each other into contiguous spans: {text, section,
+    page_number, score, clause_ids}, ordered by their best-ranked chunk.
+    Ranks rather than scores decide the order because backends disagree
+    on scores (Chroma reports distances, lower is better).
+    """
+    spans = []
+    for rank, clause in enumerate(clauses):
+        title, index = _section_label(clause.get("section"))
+        spans.append({
+            "text": INLINE_WHITESPACE.sub(" ", clause["text"]).strip(),
+            "section": clause.get("section"),
+            "page_number": clause.get("page_number"),
+            "score": clause.get("score") or 0.0,
+            "clause_ids": [int(clause["id"])],
+            "rank": rank,
+            "title": title,
+            "first_id": int(clause["id"]),
+            "last_id": int(clause["id"]),
+            "first_index": index,
+            "last_index": index
+        })
+    merged = True
+    while merged:
+        merged = False
+        for i, left in enumerate(spans):
+            for j, right in enumerate(spans):
+                if i == j:
+                    continue
+                text = _join(left, right)
+                if text is None:
+                    continue
+                if text != left["text"]:
+                    left.update(last_id=right["last_id"], last_index=right["last_index"])
+                left.update(
+                    text=text,
+                    score=max(left["score"], right["score"]),
+                    rank=min(left["rank"], right["rank"]),
+                    clause_ids=left["clause_ids"] + right["clause_ids"]
+                )
+                del spans[j]
+                merged = True
+                break
+            if merged:
+                break
+    spans.sort(key=lambda span: span["rank"])
+    return spans
+
+def _format_span(index: int, span: Dict) -> str:
+    return f"Clause {index} (Section {span['section'] or 'N/A'}): {span['text']}"
+
+def _truncate(index: int, span: Dict, max_tokens: int) -> str:
+    """The span's line cut at a word boundary to fit max_tokens"""
+    line = _format_span(index, span)
+    while line and prompt_tokens(line) > max_tokens:
+        cut = int(len(line) * 0.9)
+        line = line[:cut].rsplit(" ", 1)[0]
+    return line
+
+def pack_clauses(clauses: List[Dict], max_tokens: int = None) -> Tuple[str, int]:
+    """
+    Format retrieved clauses for a prompt: overlapping and adjacent chunks
+    are merged, then spans are added in retrieval order while they fit in
+    `max_tokens`. Returns the text and its token count. The best span is
+    always included, truncated if it alone exceeds the budget.
+    """
+    max_tokens = max_tokens or settings.PROMPT_CONTEXT_TOKENS
+    spans = merge_clauses(clauses)
+    lines, used, dropped = [], 0, 0
+    for span in spans:
+        line = _format_span(len(lines) + 1, span)
+        tokens = prompt_tokens(line) + (1 if lines else 0)  # joining newline
+        if used + tokens > max_tokens:
+            dropped += len(span["clause_ids"])
+            continue
+        lines.append(line)
+        used += tokens
+    if not lines and spans:
+        lines.append(_truncate(1, spans[0], max_tokens))
+        used = prompt_tokens(lines[0])
+        dropped -= len(spans[0]["clause_ids"])
+
+    metrics.inc("prompt_clauses_merged", len(clauses) - len(spans))
+    metrics.inc("prompt_clauses_dropped", dropped)
+    if dropped:
+        logger.info(f"{dropped} of {len(clauses)} clauses left out of a {max_tokens}-token context")
+    return "\n".join(lines), used
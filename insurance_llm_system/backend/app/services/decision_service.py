@@ -1,7 +1,10 @@
 import logging
+import textwrap
 from typing import Dict, List
 from sqlalchemy.orm import Session
 from ..api.v1.schemas import ProcessResponse
+from ..utils.metrics import metrics
+from .context_packer import pack_clauses, prompt_tokens
 from ml_models.llm_integration.model_selector import get_llm_response
 
 logger = logging.getLogger(__name__)
@@ -33,26 +36,20 @@ def make_decision_from_clauses(
         logger.error(f"Decision making failed: {str(e)}")
         raise
 
-def build_decision_prompt(query_analysis: Dict, relevant_clauses: List[Dict]) -> str:
-    """Construct the decision prompt for the LLM"""
-    clauses_text = "\n".join(
-        f"Clause {i+1}:\n{clause['text']}\n(Section: {clause.get('section', 'N/A')})"
-        for i, clause in enumerate(relevant_clauses)
-    )
-    
-    return f"""
+# Dedented once: the prompt carries no source indentation
+DECISION_PROMPT = textwrap.dedent("""\
     As an insurance claim adjudicator, analyze this claim based on the policy clauses:
-    
+
     Claim Details:
-    - Age: {query_analysis.get('age', 'N/A')}
-    - Gender: {query_analysis.get('gender', 'N/A')}
-    - Procedure: {query_analysis.get('procedure', 'N/A')}
-    - Location: {query_analysis.get('location', 'N/A')}
-    - Policy Duration: {query_analysis.get('policy_duration_months', 'N/A')} months
-    
+    - Age: {age}
+    - Gender: {gender}
+    - Procedure: {procedure}
+    - Location: {location}
+    - Policy Duration: {policy_duration} months
+
     Relevant Policy Clauses:
-    {clauses_text}
-    
+    {clauses}
+
     Provide your decision in this JSON format:
     {{
         "decision": "approved|denied|pending",
@@ -64,8 +61,26 @@ def build_decision_prompt(query_analysis: Dict, relevant_clauses: List[Dict]) ->
             "requirements": "Requirements met/missing"
         }},
         "confidence_score": 0.0-1.0
-    }}
+    }}""")
+
+def build_decision_prompt(query_analysis: Dict, relevant_clauses: List[Dict]) -> str:
+    """
+    Construct the decision prompt for the LLM. Retrieved clauses are packed
+    into PROMPT_CONTEXT_TOKENS; the prompt's token count is recorded.
     """
+    clauses_text, clause_tokens = pack_clauses(relevant_clauses)
+    prompt = DECISION_PROMPT.format(
+        age=query_analysis.get('age', 'N/A'),
+        gender=query_analysis.get('gender', 'N/A'),
+        procedure=query_analysis.get('procedure', 'N/A'),
+        location=query_analysis.get('location', 'N/A'),
+        policy_duration=query_analysis.get('policy_duration_months', 'N/A'),
+        clauses=clauses_text
+    )
+    tokens = prompt_tokens(prompt)
+    metrics.observe("decision_prompt_tokens", tokens)
+    logger.info(f"Decision prompt: {tokens} tokens, {clause_tokens} of them clauses")
+    return prompt
 
 def get_structured_decision(prompt: str) -> Dict:
     """Get structured decision from LLM with validation"""
@@ -1,21 +1,32 @@
 import os
+import time
+import hashlib
+import uuid
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from io import BytesIO
 from ..db import crud
 from ..core.config import settings
-from document_processing.text_extraction.docx_parser import parse_docx
-from document_processing.text_extraction.pdf_parser import parse_pdf
-from document_processing.text_extraction.email_parser import parse_email
-from document_processing.preprocessing.chunker import chunk_text
+from ..utils.metrics import metrics
+from .clause_cache import invalidate_document
+from .ingestion_queue import JobProgress, ingestion_queue
+from document_processing.text_extraction.docx_parser import iter_docx_text
+from document_processing.text_extraction.pdf_parser import iter_pdf_pages
+from document_processing.text_extraction.email_parser import iter_email_text
+from document_processing.text_extraction.text_parser import iter_plain_text
+from document_processing.preprocessing.chunker import chunk_spans
 from document_processing.preprocessing.cleaner import clean_text
-from document_processing.preprocessing.section_detector import detect_sections
+from document_processing.preprocessing.section_detector import iter_sections
 from ml_models.embedding_models.ada_embeddings import get_embeddings  # or ada_embeddings
-from document_processing.vector_db.pinecone_integration import get_vector_store  # or chroma_integration
+from ml_models.embedding_models.batching import batch_items, embed_in_batches
+from document_processing.vector_db.embedding_store import get_vector_store
+from document_processing.lexical_index import build_document_index, drop_document_index
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_READ_SIZE = 1024 * 1024
+
 vector_store = None
 
 async def initialize_document_service():
@@ -28,140 +39,421 @@ async def initialize_document_service():
         logger.error(f"Failed to initialize document service: {str(e)}")
         raise
 
-async def process_uploaded_document(db: Session, file) -> Dict:
-    """Process an uploaded document through the full pipeline"""
+async def submit_uploaded_document(db: Session, file) -> Dict:
+    """
+    Validate an upload, spool it to disk and queue it for ingestion.
+    Uploads whose content hash matches an existing document are not ingested
+    again: a processed document is returned as is, and a document still being
+    ingested returns the job already working on it.
+    """
+    # Validate file
+    validate_file(file)
+    ingestion_queue.ensure_capacity(db)
+    
+    file_ext = os.path.splitext(file.filename)[1][1:].lower()
+    file_path, file_size, content_hash = await spool_upload(file, file_ext)
+    
+    # No awaits from here on: the lookup and insert run atomically with respect
+    # to other uploads on this event loop, and the unique content_hash column
+    # settles races between processes. A document and its job are created in
+    # one transaction, so a concurrent duplicate always finds the job.
     try:
-        # Validate file
-        validate_file(file)
-        
-        # Save file metadata to database
-        document = save_document_metadata(db, file)
-        
-        # Extract text from document
-        text = await extract_text_from_file(file)
-        
-        # Clean and chunk text
-        cleaned_text = clean_text(text)
-        sections = detect_sections(cleaned_text)
-        
-        # Process each section
-        clauses = []
-        for section_type, section_data in sections.items():
-            for section in section_data:
-                section_clauses = process_section(
-                    db, document.id, section["text"], section["title"]
+        document = crud.get_document_by_hash(db, content_hash)
+        if document is None:
+            try:
+                document, job = ingestion_queue.submit_new_document(
+                    db,
+                    file_path=file_path,
+                    filename=file.filename,
+                    file_type=file_ext,
+                    file_size=file_size,
+                    content_hash=content_hash
                 )
-                clauses.extend(section_clauses)
+                return _submitted(document, job)
+            except IntegrityError:
+                db.rollback()
+                document = crud.get_document_by_hash(db, content_hash)
+                if document is None:
+                    # Not a lost content_hash race, or the winner is gone again
+                    raise
+
+        duplicate = _existing_ingestion(db, document)
+        if duplicate:
+            os.remove(file_path)
+            return duplicate
+        job = ingestion_queue.submit(db, document_id=document.id, file_path=file_path)
+        return _submitted(document, job)
+    except Exception:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+async def submit_document_version(db: Session, document_id: int, file) -> Dict:
+    """
+    Queue an upload as the new version of an existing document.
+    The re-index keeps stored clauses whose content is unchanged and only
+    embeds added or changed chunks; clauses missing from the new version
+    are deleted.
+    """
+    document = crud.get_document(db, document_id)
+    if document is None:
+        raise LookupError(f"Document {document_id} not found")
+    
+    validate_file(file)
+    ingestion_queue.ensure_capacity(db)
+    
+    file_ext = os.path.splitext(file.filename)[1][1:].lower()
+    file_path, file_size, content_hash = await spool_upload(file, file_ext)
+    try:
+        if content_hash == document.content_hash:
+            duplicate = _existing_ingestion(db, document)
+            if duplicate:
+                os.remove(file_path)
+                return duplicate
+        else:
+            other = crud.get_document_by_hash(db, content_hash)
+            if other is not None:
+                raise ValueError(f"Upload is identical to document {other.id}")
+        if crud.get_active_ingestion_job(db, document.id):
+            raise ValueError(f"Document {document.id} is still being ingested; retry once its job finishes")
         
-        # Update document as processed
-        update_document_processed(db, document.id)
+        document, job = ingestion_queue.submit_document_version(
+            db,
+            document_id=document.id,
+            file_path=file_path,
+            filename=file.filename,
+            file_type=file_ext,
+            file_size=file_size,
+            content_hash=content_hash
+        )
+        return _submitted(document, job)
+    except Exception:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+def _submitted(document, job) -> Dict:
+    return {
+        "job_id": job.id,
+        "document_id": document.id,
+        "filename": document.filename,
+        "status": job.status,
+        "version": document.version or 1,
+        "deduplicated": False
+    }
+
+def _existing_ingestion(db: Session, document) -> Optional[Dict]:
+    """Result for an upload identical to `document`, or None if it must be re-ingested"""
+    if document.processed:
+        job_id, status = None, "completed"
+    else:
+        job = crud.get_active_ingestion_job(db, document.id)
+        if job is None:
+            # Earlier ingestion failed; run it again for the same document
+            return None
+        job_id, status = job.id, job.status
+    
+    metrics.inc("documents_deduplicated")
+    logger.info(f"Upload matches document {document.id} ({status}); skipping ingestion")
+    return {
+        "job_id": job_id,
+        "document_id": document.id,
+        "filename": document.filename,
+        "status": status,
+        "version": document.version or 1,
+        "deduplicated": True
+    }
+
+def run_ingestion_job(db: Session, job, progress: JobProgress) -> Dict:
+    """
+    Run the ingestion pipeline for a queued job (called from a worker thread).
+    New chunks are diffed against the document's stored clauses by content
+    hash, so re-ingesting a revised version only embeds what changed.
+    """
+    document = crud.get_document(db, job.document_id)
+    if document is None:
+        raise ValueError(f"Document {job.document_id} not found")
+    document_id = document.id
+    upserted_ids: List[int] = []  # vectors written before the commit
+    
+    try:
+        # Stored clauses not matched by a chunk of this version are removed
+        stored = crud.get_clause_ids_by_hash(db, document_id)
+        unhashed_ids = stored.pop(None, [])  # Clauses stored before hashing cannot be matched
+        counts = {"reused": 0}
+        with metrics.scoped_counters() as counters:
+            # Pages flow through section -> chunk -> clean -> diff -> embed -> store
+            # one batch at a time, so memory is bounded by the batch window.
+            # Parsers read the spooled file from its path.
+            progress.stage("ingesting", 0.05)
+            chunks = iter_document_chunks(iter_file_text(job.file_path, document.file_type))
+            changed = skip_stored_chunks(chunks, stored, counts)
+            embedded_count = ingest_chunk_stream(
+                db, document_id, changed, progress, document_attributes(document), upserted_ids
+            )
         
-        return {
-            "document_id": document.id,
-            "filename": document.filename,
-            "processed": True,
-            "clauses_processed": len(clauses)
-        }
+        removed_ids = unhashed_ids + [clause_id for ids in stored.values() for clause_id in ids]
+        crud.delete_clauses_by_ids(db, removed_ids)
+        
+        # Clause changes and the processed flag are committed together
+        progress.stage("committing", 0.95, persist=False)
+        update_document_processed(db, document_id)
+        db.commit()
     except Exception as e:
-        logger.error(f"Error processing document: {str(e)}")
+        db.rollback()
+        discard_vectors(document_id, upserted_ids)
+        logger.error(f"Error processing document {document_id}: {str(e)}")
         raise
+    
+    try:
+        build_document_index(document_id, crud.get_clause_texts(db, document_id))
+    except Exception as e:
+        # The next query rebuilds it from the clause table
+        drop_document_index(document_id)
+        logger.error(f"Failed to build the lexical index of document {document_id}: {str(e)}")
+    # After the lexical index, so no retrieval result built from the old one is cached
+    invalidate_document(document_id)
+    if removed_ids:
+        try:
+            vector_store.delete_clauses(document_id, removed_ids)
+        except Exception as e:
+            # Rows are gone; the orphaned vectors no longer resolve to clauses
+            logger.error(f"Failed to delete {len(removed_ids)} vectors of document {document_id}: {str(e)}")
+    
+    embedding_calls = int(counters["embedding_calls"])
+    metrics.inc("documents_ingested")
+    metrics.inc("clauses_reused", counts["reused"])
+    metrics.inc("clauses_embedded", embedded_count)
+    metrics.inc("clauses_deleted", len(removed_ids))
+    metrics.observe("embedding_calls_per_document", embedding_calls)
+    logger.info(
+        f"Document {document_id}: {counts['reused']} clauses reused, {embedded_count} embedded, "
+        f"{len(removed_ids)} deleted, {embedding_calls} embedding calls"
+    )
+    
+    return {
+        "document_id": document_id,
+        "clauses_processed": counts["reused"] + embedded_count,
+        "clauses_reused": counts["reused"],
+        "clauses_embedded": embedded_count,
+        "clauses_deleted": len(removed_ids),
+        "embedding_calls": embedding_calls
+    }
 
-def validate_file(file):
-    """Validate the uploaded file"""
-    # Check file size
-    max_size = settings.MAX_DOCUMENT_SIZE_MB * 1024 * 1024
-    file.file.seek(0, 2)  # Seek to end
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset pointer
-
-    if file_size > max_size:
-        raise ValueError(f"File size exceeds maximum of {settings.MAX_DOCUMENT_SIZE_MB}MB")
+# Extensions iter_file_text parses, and the content class each must sniff as
+EXPECTED_CONTENT = {"pdf": "pdf", "docx": "zip", "txt": "text", "eml": "text", "email": "text"}
 
-    # Check file extension
+def validate_file(file):
+    """Validate the uploaded file's extension; size and content are checked while spooling"""
     file_ext = os.path.splitext(file.filename)[1][1:].lower()
     allowed_types = [ext.strip() for ext in settings.ALLOWED_FILE_TYPES]
-    print(f"Uploaded file extension: {file_ext}, Allowed: {allowed_types}")
-    if file_ext not in allowed_types:
+    # An allowed extension without a parser would queue a job bound to fail
+    if file_ext not in allowed_types or file_ext not in EXPECTED_CONTENT:
         raise ValueError(f"Unsupported file type: {file_ext}")
 
+def sniff_content(head: bytes) -> str:
+    """Classify a file from its first bytes as pdf, zip (docx) or text"""
+    if b"%PDF-" in head[:1024]:
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return "zip"
+    if b"\x00" not in head:
+        return "text"
+    return "binary"
 
-async def extract_text_from_file(file):
-    """Extract text based on file type"""
-    file_ext = os.path.splitext(file.filename)[1][1:].lower()
-    file_content = await file.read()
-    file_stream = BytesIO(file_content)
-    
+async def spool_upload(file, file_ext: str) -> Tuple[str, int, str]:
+    """
+    Stream an upload to the spool directory in fixed-size blocks so a worker
+    can ingest it later. Size limit, content sniffing and the content hash
+    are handled in the same pass; only one block is in memory at a time.
+    Returns (file_path, size_in_bytes, sha256 hex digest).
+    """
+    max_size = settings.MAX_DOCUMENT_SIZE_MB * 1024 * 1024
+    os.makedirs(settings.INGESTION_SPOOL_DIR, exist_ok=True)
+    file_path = os.path.join(settings.INGESTION_SPOOL_DIR, f"{uuid.uuid4().hex}.{file_ext}")
+    digest = hashlib.sha256()
+    size = 0
+    await file.seek(0)
+    try:
+        with open(file_path, "wb") as out:
+            while True:
+                block = await file.read(UPLOAD_READ_SIZE)
+                if not block:
+                    break
+                if size == 0:
+                    content = sniff_content(block)
+                    if content != EXPECTED_CONTENT.get(file_ext, content):
+                        raise ValueError(f"File content ({content}) does not match its .{file_ext} extension")
+                size += len(block)
+                if size > max_size:
+                    raise ValueError(f"File size exceeds maximum of {settings.MAX_DOCUMENT_SIZE_MB}MB")
+                digest.update(block)
+                out.write(block)
+        if size == 0:
+            raise ValueError("Uploaded file is empty")
+    except Exception:
+        os.remove(file_path)
+        raise
+    return file_path, size, digest.hexdigest()
+
+def iter_file_text(file_stream, file_ext: str) -> Iterator[str]:
+    """
+    Yield a document's text unit by unit (pages, paragraphs or email parts).
+    `file_stream` may be a file path, which lets each parser read the file
+    lazily instead of through an in-memory copy.
+    """
     if file_ext == "pdf":
-        result = parse_pdf(file_stream)
+        return (page_text for _, page_text in iter_pdf_pages(file_stream))
     elif file_ext == "docx":
-        result = parse_docx(file_stream)
+        return iter_docx_text(file_stream)
     elif file_ext in ["eml", "email"]:
-        result = parse_email(file_stream)
-    else:
-        raise ValueError(f"Unsupported file type: {file_ext}")
-    
-    return result["text"]
+        return iter_email_text(file_stream)
+    elif file_ext == "txt":
+        return iter_plain_text(file_stream)
+    raise ValueError(f"Unsupported file type: {file_ext}")
 
-def save_document_metadata(db: Session, file):
-    """Save document metadata to database"""
-    file_ext = os.path.splitext(file.filename)[1][1:].lower()
-    file.file.seek(0, 2)  # Seek to end
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset pointer
-    
-    document = crud.create_document(
-        db,
-        filename=file.filename,
-        file_type=file_ext,
-        file_size=file_size
-    )
-    return document
+def iter_document_chunks(texts: Iterable[str]) -> Iterator[Dict]:
+    """Sectionize raw text units, chunk each section and clean the chunks into records"""
+    current, index = None, 0
+    for number, section in iter_sections(texts):
+        if number != current:
+            current, index = number, 0
+        for span in chunk_spans(section.source, section.start, section.end, section.title, section.page):
+            text = clean_text(span.text(section.source))
+            if not text:
+                continue
+            index += 1
+            yield {
+                "text": text,
+                "section": f"{span.section}_{index}",
+                "page_number": span.page,
+                "token_count": span.token_count
+            }
 
-def process_section(db: Session, document_id: int, text: str, section_title: str) -> List[Dict]:
-    """Process a document section into clauses"""
-    chunks = chunk_text(text)
-    clauses = []
-    
-    for i, chunk in enumerate(chunks):
-        if not chunk.strip():
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def skip_stored_chunks(chunks: Iterable[Dict], stored: Dict[str, List[int]], counts: Dict[str, int]) -> Iterator[Dict]:
+    """
+    Tag chunks with their content hash and drop those matching a stored clause.
+    Each match consumes one id from `stored`, so afterwards it holds only the
+    clauses the new version no longer contains.
+    """
+    for chunk in chunks:
+        chunk["content_hash"] = chunk_hash(chunk["text"])
+        ids = stored.get(chunk["content_hash"])
+        if ids:
+            ids.pop(0)
+            counts["reused"] += 1
             continue
-            
-        try:
-            # Get embeddings for the chunk
-            embeddings = get_embeddings(chunk)
-            
-            # Create clause in database
-            clause = crud.create_clause(
-                db,
-                document_id=document_id,
-                clause_text=chunk,
-                section=f"{section_title}_{i+1}",
-                embeddings=embeddings
-            )
-            
-            # Store in vector DB
-            vector_store.upsert_clauses([{
-                "id": clause.id,
+        yield chunk
+
+def document_attributes(document) -> Dict:
+    """Document fields stored with its vectors for filtered cross-document search"""
+    return {
+        "filename": document.filename,
+        "file_type": document.file_type,
+        "version": document.version or 1,
+        **(document.document_metadata or {})
+    }
+
+def ingest_chunk_stream(
+    db: Session,
+    document_id: int,
+    chunks: Iterable[Dict],
+    progress: Optional[JobProgress] = None,
+    attributes: Optional[Dict] = None,
+    upserted_ids: Optional[List[int]] = None
+) -> int:
+    """
+    Embed and store chunks batch by batch; returns the number of clauses
+    stored. Clause ids sent to the vector DB are appended to `upserted_ids`.
+    """
+    stored = 0
+    batches = batch_items(chunks, lambda chunk: chunk["text"])
+    while True:
+        started = time.perf_counter()
+        batch = next(batches, None)
+        parsed = time.perf_counter()
+        if batch is None:
+            break
+        embeddings = embed_chunks(batch)
+        embedded = time.perf_counter()
+        stored += len(store_clauses(db, document_id, batch, embeddings, attributes, upserted_ids))
+        
+        if progress:
+            progress.add_timing("parsing", parsed - started)
+            progress.add_timing("embedding", embedded - parsed)
+            progress.add_timing("storing", time.perf_counter() - embedded)
+            progress.update(result={"clauses_processed": stored})
+    return stored
+
+def embed_chunks(chunks: List[Dict]) -> List[List[float]]:
+    """Embed all chunks of a document using batched embedding requests"""
+    if not chunks:
+        return []
+    return embed_in_batches([chunk["text"] for chunk in chunks], get_embeddings)
+
+def store_clauses(
+    db: Session,
+    document_id: int,
+    chunks: List[Dict],
+    embeddings: List[List[float]],
+    attributes: Optional[Dict] = None,
+    upserted_ids: Optional[List[int]] = None
+) -> List[Dict]:
+    """
+    Persist embedded chunks as clauses and index them in the vector DB.
+    Clause rows are written in one bulk insert; the caller commits. The
+    vectors are written immediately, so their ids are appended to
+    `upserted_ids` for the caller to discard if it rolls back.
+    """
+    clause_ids = crud.create_clauses_bulk(db, document_id, [
+        {
+            "clause_text": chunk["text"],
+            "section": chunk["section"],
+            "page_number": chunk.get("page_number"),
+            "content_hash": chunk.get("content_hash") or chunk_hash(chunk["text"]),
+            "embeddings": embedding
+        }
+        for chunk, embedding in zip(chunks, embeddings)
+    ])
+    
+    # Store in vector DB (recorded first: a failed upsert may have written some)
+    if clause_ids:
+        if upserted_ids is not None:
+            upserted_ids.extend(clause_ids)
+        vector_store.upsert_clauses([
+            {
+                "id": clause_id,
                 "document_id": document_id,
-                "text": chunk,
-                "section": f"{section_title}_{i+1}",
-                "embeddings": embeddings
-            }])
-            
-            clauses.append({
-                "id": clause.id,
-                "section": clause.section
-            })
-        except Exception as e:
-            logger.error(f"Error processing section chunk: {str(e)}")
-            continue
-            
-    return clauses
+                "text": chunk["text"],
+                "section": chunk["section"],
+                "page_number": chunk.get("page_number") or 0,
+                "embeddings": embedding,
+                "attributes": attributes
+            }
+            for clause_id, chunk, embedding in zip(clause_ids, chunks, embeddings)
+        ])
+    
+    return [
+        {"id": clause_id, "section": chunk["section"]}
+        for clause_id, chunk in zip(clause_ids, chunks)
+    ]
+
+def discard_vectors(document_id: int, clause_ids: List[int]):
+    """Delete vectors of clause rows that were rolled back, so none outlive their rows"""
+    if not clause_ids:
+        return
+    try:
+        vector_store.delete_clauses(document_id, clause_ids)
+    except Exception as e:
+        # Their ids may be reused by later clauses, whose upserts replace them
+        logger.error(f"Failed to delete {len(clause_ids)} vectors of rolled-back clauses of document {document_id}: {str(e)}")
 
 def update_document_processed(db: Session, document_id: int):
-    """Mark document as processed in database"""
+    """Mark document as processed in the current transaction (committed by the caller)"""
     document = crud.get_document(db, document_id)
     if document and not document.processed:
         document.processed = True
-        db.commit()
-        db.refresh(document)
\ No newline at end of file
+        db.flush()
\ No newline at end of file
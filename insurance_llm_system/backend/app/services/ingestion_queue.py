@@ -0,0 +1,223 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from ..core.config import settings
+from ..db import crud
+from ..db.session import SessionLocal
+from ..utils.metrics import metrics
+from ml_models.llm_integration.rate_limiter import INGESTION, priority_lane
+
+logger = logging.getLogger(__name__)
+
+class QueueFullError(Exception):
+    """Raised when the ingestion queue has no room for another job"""
+
+# Live progress of jobs running in this process. Intermediate updates are
+# kept here rather than written to the job row, because the pipeline holds
+# an open write transaction that would block them (e.g. on SQLite).
+_live_progress: Dict[str, Dict] = {}
+_live_lock = threading.Lock()
+
+def get_live_progress(job_id: str) -> Optional[Dict]:
+    with _live_lock:
+        live = _live_progress.get(job_id)
+        return {**live, "timings": dict(live["timings"])} if live else None
+
+class JobProgress:
+    """Records stage transitions and per-stage timings for a running job"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.timings: Dict[str, float] = {}
+        self._stage: Optional[str] = None
+        self._stage_started = time.perf_counter()
+        with _live_lock:
+            _live_progress[job_id] = {"timings": self.timings}
+
+    def stage(self, name: str, progress: float, persist: bool = True):
+        """
+        Close the current stage and start `name` at the given overall progress.
+        Pass persist=False once the pipeline has uncommitted writes.
+        """
+        self._close_stage()
+        self._stage = name
+        self._stage_started = time.perf_counter()
+        if persist:
+            self.save(stage=name, progress=progress)
+        else:
+            self.update(stage=name, progress=progress)
+
+    def update(self, **fields):
+        """Update the in-process view of the job without touching the database"""
+        with _live_lock:
+            live = _live_progress.get(self.job_id)
+            if live is not None:
+                live.update(fields)
+
+    def add_timing(self, name: str, seconds: float):
+        """Accumulate time spent in a sub-step that interleaves with others"""
+        with _live_lock:
+            self.timings[name] = round(self.timings.get(name, 0.0) + seconds, 4)
+
+    def finish(self) -> Dict[str, float]:
+        self._close_stage()
+        self._stage = None
+        return self.timings
+
+    def close(self):
+        with _live_lock:
+            _live_progress.pop(self.job_id, None)
+
+    def _close_stage(self):
+        if self._stage:
+            self.add_timing(self._stage, time.perf_counter() - self._stage_started)
+
+    def save(self, **fields):
+        """Commit fields to the job row on a separate session"""
+        self.update(**fields)
+        db = SessionLocal()
+        try:
+            crud.update_ingestion_job(db, self.job_id, timings=dict(self.timings), **fields)
+        finally:
+            db.close()
+
+class IngestionQueue:
+    """
+    Bounded, database-backed queue of ingestion jobs.
+    Jobs are rows in ingestion_jobs, so queued work survives a restart;
+    a fixed pool of worker threads claims and runs them.
+    """
+
+    def __init__(self, workers: int = None, max_queued: int = None, poll_interval: float = None):
+        self.workers = workers or settings.INGESTION_WORKERS
+        self.max_queued = max_queued or settings.INGESTION_QUEUE_SIZE
+        self.poll_interval = poll_interval or settings.INGESTION_POLL_INTERVAL_S
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        db = SessionLocal()
+        try:
+            requeued = crud.requeue_interrupted_ingestion_jobs(db)
+            if requeued:
+                logger.info(f"Requeued {requeued} interrupted ingestion jobs")
+        finally:
+            db.close()
+
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"ingestion-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._wake.set()
+        logger.info(f"Ingestion queue started with {self.workers} workers")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def ensure_capacity(self, db):
+        """Raise QueueFullError if no more jobs may be queued"""
+        queued = crud.count_queued_ingestion_jobs(db)
+        metrics.set_gauge("ingestion_queue_depth", queued)
+        if queued >= self.max_queued:
+            metrics.inc("ingestion_jobs_rejected")
+            raise QueueFullError(f"Ingestion queue is full ({queued} jobs waiting)")
+
+    def submit(self, db, document_id: int, file_path: str):
+        """Queue a spooled upload for ingestion and wake an idle worker"""
+        self.ensure_capacity(db)
+        job = crud.create_ingestion_job(db, document_id=document_id, file_path=file_path)
+        metrics.inc("ingestion_jobs_submitted")
+        self._wake.set()
+        return job
+
+    def submit_new_document(self, db, file_path: str, **document_fields):
+        """Create a document together with its ingestion job and queue it"""
+        self.ensure_capacity(db)
+        document, job = crud.create_document_with_ingestion_job(db, file_path=file_path, **document_fields)
+        metrics.inc("ingestion_jobs_submitted")
+        self._wake.set()
+        return document, job
+
+    def submit_document_version(self, db, document_id: int, file_path: str, **document_fields):
+        """Switch a document to a new version of its file and queue the re-index"""
+        self.ensure_capacity(db)
+        document, job = crud.create_document_version_job(
+            db, document_id=document_id, file_path=file_path, **document_fields
+        )
+        metrics.inc("ingestion_jobs_submitted")
+        self._wake.set()
+        return document, job
+
+    def _worker(self):
+        while not self._stop.is_set():
+            job_id = self._claim()
+            if job_id is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self._run(job_id)
+
+    def _claim(self) -> Optional[str]:
+        db = SessionLocal()
+        try:
+            return crud.claim_next_ingestion_job(db)
+        except Exception as e:
+            logger.error(f"Failed to claim ingestion job: {str(e)}")
+            return None
+        finally:
+            db.close()
+
+    def _run(self, job_id: str):
+        from .document_service import run_ingestion_job
+
+        progress = JobProgress(job_id)
+        started = time.perf_counter()
+        db = SessionLocal()
+        file_path = None
+        try:
+            job = crud.get_ingestion_job(db, job_id)
+            file_path = job.file_path
+            if job.started_at and job.created_at:
+                wait = max((_aware(job.started_at) - _aware(job.created_at)).total_seconds(), 0.0)
+                progress.timings["queue_wait"] = round(wait, 4)
+                metrics.observe("ingestion_queue_wait_seconds", wait)
+
+            # Embedding calls queue behind interactive /process traffic
+            with priority_lane(INGESTION):
+                result = run_ingestion_job(db, job, progress)
+
+            progress.finish()
+            progress.timings["total"] = round(time.perf_counter() - started, 4)
+            progress.save(
+                status="completed", stage="completed", progress=1.0,
+                result=result, finished_at=datetime.now(timezone.utc)
+            )
+            metrics.inc("ingestion_jobs_completed")
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {str(e)}")
+            progress.finish()
+            progress.timings["total"] = round(time.perf_counter() - started, 4)
+            progress.save(status="failed", error=str(e), finished_at=datetime.now(timezone.utc))
+            metrics.inc("ingestion_jobs_failed")
+        finally:
+            db.close()
+            progress.close()
+            metrics.observe("ingestion_job_seconds", time.perf_counter() - started)
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+
+def _aware(value: datetime) -> datetime:
+    # SQLite returns naive datetimes for server_default=func.now()
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+# Process-wide queue, started from the application lifespan
+ingestion_queue = IngestionQueue()
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional
+import numpy as np
+from ..core.config import settings
+from ..utils.metrics import metrics
+
+def normalize_query(text: str) -> str:
+    """Case- and whitespace-normalize a semantic query so equivalent phrasings share entries"""
+    return " ".join(text.lower().split())
+
+class TTLCache:
+    """
+    LRU mapping bounded by `max_items` whose entries also expire `ttl_s`
+    seconds after they were stored. Hits and misses are counted as
+    `<name>_hits` / `<name>_misses` with a `<name>_hit_rate` gauge.
+    """
+
+    def __init__(self, name: str, max_items: int, ttl_s: float, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.max_items = max_items
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._hits = 0
+        self._lookups = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        """The live value for `key`, or None"""
+        with self._lock:
+            self._lookups += 1
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._hits += 1
+                self._entries.move_to_end(key)
+            hit_rate = self._hits / self._lookups
+        metrics.inc(f"{self.name}_hits" if entry is not None else f"{self.name}_misses")
+        metrics.set_gauge(f"{self.name}_hit_rate", hit_rate)
+        return entry[1] if entry is not None else None
+
+    def put(self, key: Hashable, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def discard(self, predicate: Callable[[Hashable], bool]):
+        """Drop every entry whose key matches"""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._lookups = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class RetrievalCache(TTLCache):
+    """
+    Retrieved clause lists keyed by (document_id, generation, *query parts).
+    Invalidating a document bumps its generation, so a retrieval that was
+    already running when the document was re-indexed stores its result
+    under a key no later lookup builds.
+    """
+
+    def __init__(self, max_items: int, ttl_s: float, clock: Callable[[], float] = time.monotonic):
+        super().__init__("retrieval_cache", max_items, ttl_s, clock)
+        self._generations: Dict[int, int] = {}
+
+    def key(self, document_id: int, *parts: Hashable) -> tuple:
+        with self._lock:
+            return (document_id, self._generations.get(document_id, 0)) + parts
+
+    def get_clauses(self, key: tuple) -> Optional[List[Dict]]:
+        clauses = self.get(key)
+        # Callers get their own records to annotate
+        return [dict(clause) for clause in clauses] if clauses is not None else None
+
+    def put_clauses(self, key: tuple, clauses: List[Dict]):
+        self.put(key, tuple(dict(clause) for clause in clauses))
+
+    def invalidate(self, document_id: int):
+        with self._lock:
+            self._generations[document_id] = self._generations.get(document_id, 0) + 1
+        self.discard(lambda key: key[0] == document_id)
+
+# Process-wide caches: normalized semantic query -> float32 embedding,
+# and retrieval key -> clause records
+query_embeddings = TTLCache(
+    "query_embedding_cache", settings.QUERY_EMBEDDING_CACHE_ITEMS, settings.QUERY_EMBEDDING_CACHE_TTL_S
+)
+retrieval_results = RetrievalCache(settings.RETRIEVAL_CACHE_ITEMS, settings.RETRIEVAL_CACHE_TTL_S)
+
+async def cached_query_embedding(semantic_query: str, embed) -> np.ndarray:
+    """
+    Embedding of a semantic query, calling `embed` on a miss. Entries are
+    keyed by the normalized query, but the query is embedded as given.
+    """
+    if not settings.QUERY_CACHE_ENABLED:
+        return np.asarray((await embed(semantic_query))[0], dtype=np.float32)
+    key = normalize_query(semantic_query)
+    embedding = query_embeddings.get(key)
+    if embedding is None:
+        embedding = np.asarray((await embed(semantic_query))[0], dtype=np.float32)
+        query_embeddings.put(key, embedding)
+    return embedding
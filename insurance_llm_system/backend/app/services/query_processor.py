@@ -1,15 +1,25 @@
+import asyncio
 import logging
+import textwrap
 from typing import Dict, List, Optional
+import numpy as np
 from sqlalchemy.orm import Session
+from ..core.config import settings
 from ..db import crud
-from ml_models.llm_integration.model_selector import get_llm_response
-from ml_models.embedding_models.ada_embeddings import get_embeddings
-from document_processing.vector_db.pinecone_integration import search_clauses
+from ..utils.metrics import metrics
+from .context_packer import prompt_tokens
+from .decision_service import build_decision_prompt
+from .clause_cache import clause_matrices, hydrate_clauses, load_document_clauses
+from .query_cache import cached_query_embedding, normalize_query, retrieval_results
+from ml_models.llm_integration.model_selector import aget_llm_response
+from ml_models.embedding_models.ada_embeddings import aget_embeddings
+from document_processing.vector_db.embedding_store import get_vector_store
+from document_processing.lexical_index import get_document_index
 from ..api.v1.schemas import ProcessResponse
 
 logger = logging.getLogger(__name__)
 
-def process_insurance_query(db: Session, query: str, document_id: int) -> ProcessResponse:
+async def process_insurance_query(db: Session, query: str, document_id: int, query_id: int) -> ProcessResponse:
     """
     Process an insurance query through the full pipeline:
     1. Query understanding
@@ -19,47 +29,55 @@ def process_insurance_query(db: Session, query: str, document_id: int) -> Proces
     """
     try:
         # Step 1: Query Understanding
-        query_analysis = analyze_query(query)
+        query_analysis = await analyze_query(query)
         logger.info(f"Query analysis completed: {query_analysis}")
         
         # Step 2: Retrieve relevant clauses
-        relevant_clauses = retrieve_relevant_clauses(db, document_id, query_analysis)
+        relevant_clauses = await retrieve_relevant_clauses(db, document_id, query_analysis)
         if not relevant_clauses:
             raise ValueError("No relevant clauses found for query")
         logger.info(f"Retrieved {len(relevant_clauses)} relevant clauses")
         
         # Step 3: Make decision based on clauses
-        decision_result = make_decision(query_analysis, relevant_clauses)
-        logger.info(f"Decision made: {decision_result.decision}")
+        decision_result = await make_decision(query_analysis, relevant_clauses)
+        logger.info(f"Decision made: {decision_result.get('decision')}")
         
         return ProcessResponse(
             decision=decision_result["decision"],
             amount=decision_result.get("amount"),
             currency=decision_result.get("currency", "INR"),
             justification=decision_result["justification"],
-            confidence_score=decision_result.get("confidence_score", 0.0)
+            confidence_score=decision_result.get("confidence_score", 0.0),
+            query_id=query_id
         )
         
     except Exception as e:
         logger.error(f"Query processing failed: {str(e)}")
         raise
 
-def analyze_query(query: str) -> Dict:
-    """Extract structured information from natural language query"""
-    prompt = f"""
+ANALYSIS_PROMPT = textwrap.dedent("""\
     Analyze this insurance query and extract relevant details:
     Query: "{query}"
-    
+
     Extract as JSON with these fields:
     - age: number|null
     - gender: string (M/F/Other)|null
     - procedure: string|null
     - location: string|null
     - policy_duration_months: number|null
-    - other_details: object|null
-    """
+    - other_details: object|null""")
+
+def build_analysis_prompt(query: str) -> str:
+    """Query analysis prompt; its token count is recorded"""
+    prompt = ANALYSIS_PROMPT.format(query=query)
+    metrics.observe("analysis_prompt_tokens", prompt_tokens(prompt))
+    return prompt
+
+async def analyze_query(query: str) -> Dict:
+    """Extract structured information from natural language query"""
+    prompt = build_analysis_prompt(query)
     
-    response = get_llm_response(
+    response = await aget_llm_response(
         prompt,
         response_format="json_object",
         temperature=0.1
@@ -70,30 +88,112 @@ def analyze_query(query: str) -> Dict:
     
     return response
 
-def retrieve_relevant_clauses(db: Session, document_id: int, query_analysis: Dict) -> List[Dict]:
-    """Retrieve relevant clauses from the document based on query analysis"""
-    # Create semantic search query
-    search_query = build_semantic_query(query_analysis)
+async def retrieve_relevant_clauses(db: Session, document_id: int, query_analysis: Dict) -> List[Dict]:
+    """
+    Retrieve relevant clauses from the document based on query analysis.
+    In hybrid mode BM25 hits are fused with vector hits by reciprocal rank;
+    a strong enough BM25 match is answered without embedding the query.
+    Results are cached per (document, normalized query, top-k) until the
+    document is re-indexed or the entry expires.
+    """
+    top_k = settings.RETRIEVAL_TOP_K
+    mode = settings.RETRIEVAL_MODE
+    semantic_query = build_semantic_query(query_analysis)
+    lexical_query = build_lexical_query(query_analysis) if mode != "vector" else ""
+    if not settings.QUERY_CACHE_ENABLED:
+        return await _retrieve(db, document_id, semantic_query, lexical_query, mode, top_k)
     
-    # Get query embedding
-    query_embedding = get_embeddings(search_query)
+    # Normalized forms only key the cache; retrieval sees the queries as built
+    key = retrieval_results.key(document_id, normalize_query(semantic_query), normalize_query(lexical_query), mode, top_k)
+    clauses = retrieval_results.get_clauses(key)
+    if clauses is None:
+        clauses = await _retrieve(db, document_id, semantic_query, lexical_query, mode, top_k)
+        retrieval_results.put_clauses(key, clauses)
+    return clauses
+
+async def _retrieve(
+    db: Session, document_id: int, semantic_query: str, lexical_query: str, mode: str, top_k: int
+) -> List[Dict]:
+    # Database reads and index builds run in worker threads, off the event loop
+    lexical = []
+    if mode != "vector":
+        depth = top_k if mode == "lexical" else top_k * settings.RETRIEVAL_FUSION_DEPTH
+        lexical, strength = await asyncio.to_thread(search_lexical_index, db, document_id, lexical_query, depth)
+        shortcut = settings.LEXICAL_SHORTCUT_STRENGTH
+        if mode == "lexical" or (lexical and shortcut and strength >= shortcut):
+            metrics.inc("retrieval_lexical_only")
+            return await asyncio.to_thread(
+                hydrate_clauses,
+                db, document_id, [{"id": clause_id, "score": score} for clause_id, score in lexical[:top_k]]
+            )
     
-    # Search vector DB for relevant clauses
-    clause_ids = search_clauses(document_id, query_embedding, top_k=5)
+    vector = await search_clause_vectors(
+        db, document_id, semantic_query,
+        top_k * settings.RETRIEVAL_FUSION_DEPTH if lexical else top_k
+    )
+    if not lexical:
+        return vector
+    fused = reciprocal_rank_fusion([vector, [{"id": clause_id} for clause_id, _ in lexical]], settings.RRF_K)
+    return await asyncio.to_thread(hydrate_clauses, db, document_id, fused[:top_k])
+
+def search_lexical_index(db: Session, document_id: int, query: str, top_k: int):
+    """BM25 search of a document, loading or building its index on first use"""
+    index = get_document_index(document_id, lambda: crud.get_clause_texts(db, document_id))
+    return index.search(query, top_k)
+
+def search_clause_matrix(db: Session, document_id: int, query: np.ndarray, top_k: int) -> Optional[List[Dict]]:
+    """In-process search of a document's cached clause matrix; None when it holds no embeddings"""
+    document_clauses = clause_matrices.get_or_load(document_id, lambda: load_document_clauses(db, document_id))
+    if not len(document_clauses):
+        return None
+    return document_clauses.search(query / (np.linalg.norm(query) or 1.0), top_k)
+
+async def search_clause_vectors(db: Session, document_id: int, search_query: str, top_k: int) -> List[Dict]:
+    """Embed the semantic query and return the document's top-k clause records"""
+    query_embedding = await cached_query_embedding(search_query, aget_embeddings)
     
-    # Get full clause texts from database
-    clauses = []
-    for clause_id in clause_ids:
-        clause = crud.get_clause(db, clause_id)
-        if clause:
-            clauses.append({
-                "id": clause.id,
-                "text": clause.clause_text,
-                "section": clause.section,
-                "page_number": clause.page_number
-            })
+    # Documents in the matrix cache are searched in process (a cold load reads every embedding)
+    if settings.CLAUSE_MATRIX_CACHE_ENABLED:
+        clauses = await asyncio.to_thread(search_clause_matrix, db, document_id, query_embedding, top_k)
+        if clauses is not None:
+            return clauses
     
-    return clauses
+    # Search vector DB for relevant clauses (the client calls block)
+    matches = await asyncio.to_thread(
+        get_vector_store().search_clauses, query_embedding.tolist(), document_id, top_k
+    )
+    
+    # Vector metadata carries the clause text; the database only fills gaps
+    return await asyncio.to_thread(hydrate_clauses, db, document_id, matches)
+
+def reciprocal_rank_fusion(rankings: List[List[Dict]], k: int) -> List[Dict]:
+    """
+    Merge ranked clause lists: each clause scores the sum of 1 / (k + rank)
+    over the lists it appears in. Records keep the first non-empty text seen.
+    """
+    fused: Dict[int, Dict] = {}
+    for ranking in rankings:
+        for rank, match in enumerate(ranking, start=1):
+            clause_id = int(match["id"])
+            record = fused.get(clause_id)
+            if record is None:
+                record = fused[clause_id] = {
+                    "id": clause_id, "text": None, "section": None, "page_number": None, "score": 0.0
+                }
+            if record["text"] is None and match.get("text") is not None:
+                record.update(text=match["text"], section=match.get("section"), page_number=match.get("page_number"))
+            record["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda record: record["score"], reverse=True)
+
+def build_lexical_query(query_analysis: Dict) -> str:
+    """Keywords worth matching literally: the procedure and any free-text details"""
+    parts = [query_analysis.get("procedure") or ""]
+    other = query_analysis.get("other_details")
+    if isinstance(other, dict):
+        parts.extend(str(value) for value in other.values() if isinstance(value, str))
+    elif isinstance(other, str):
+        parts.append(other)
+    return " ".join(part for part in parts if part)
 
 def build_semantic_query(query_analysis: Dict) -> str:
     """Build a good semantic search query from the analysis"""
@@ -109,45 +209,13 @@ def build_semantic_query(query_analysis: Dict) -> str:
     
     return "; ".join(parts) if parts else str(query_analysis)
 
-def make_decision(query_analysis: Dict, relevant_clauses: List[Dict]) -> Dict:
+async def make_decision(query_analysis: Dict, relevant_clauses: List[Dict]) -> Dict:
     """Make insurance decision based on query and relevant clauses"""
-    decision_prompt = f"""
-    As an insurance claim adjudicator, analyze this claim based on the policy clauses:
-    
-    Claim Details:
-    - Age: {query_analysis.get('age', 'N/A')}
-    - Gender: {query_analysis.get('gender', 'N/A')}
-    - Procedure: {query_analysis.get('procedure', 'N/A')}
-    - Location: {query_analysis.get('location', 'N/A')}
-    - Policy Duration: {query_analysis.get('policy_duration_months', 'N/A')} months
-    
-    Relevant Policy Clauses:
-    {format_clauses_for_prompt(relevant_clauses)}
+    decision_prompt = build_decision_prompt(query_analysis, relevant_clauses)
     
-    Provide your decision in this JSON format:
-    {{
-        "decision": "approved|denied|pending",
-        "amount": number|null,
-        "currency": "INR",
-        "justification": {{
-            "coverage": "Which clause covers this?",
-            "limitations": "Any limitations that apply",
-            "requirements": "Requirements met/missing"
-        }},
-        "confidence_score": 0.0-1.0
-    }}
-    """
-    
-    response = get_llm_response(
+    response = await aget_llm_response(
         decision_prompt,
         response_format="json_object",
         temperature=0.2
     )
     return response
-
-def format_clauses_for_prompt(clauses: List[Dict]) -> str:
-    """Format clauses for the decision prompt"""
-    return "\n".join(
-        f"Clause {idx+1} (Section {clause.get('section', 'N/A')}): {clause['text']}"
-        for idx, clause in enumerate(clauses)
-    )
\ No newline at end of file
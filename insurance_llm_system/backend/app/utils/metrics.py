@@ -0,0 +1,64 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Tuple
+
+_active_scopes: ContextVar[Tuple[Dict[str, float], ...]] = ContextVar("metric_scopes", default=())
+
+class MetricsRegistry:
+    """Thread-safe in-process counters, gauges and value summaries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, float]] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """Increment a counter, including any active scoped counters"""
+        with self._lock:
+            self._counters[name] += value
+        for scope in _active_scopes.get():
+            scope[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a value in a count/sum/min/max summary"""
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                self._summaries[name] = {"count": 1, "sum": value, "min": value, "max": value}
+            else:
+                summary["count"] += 1
+                summary["sum"] += value
+                summary["min"] = min(summary["min"], value)
+                summary["max"] = max(summary["max"], value)
+
+    @contextmanager
+    def scoped_counters(self) -> Iterator[Dict[str, float]]:
+        """Collect the counter increments made by the current context"""
+        counts: Dict[str, float] = defaultdict(float)
+        token = _active_scopes.set(_active_scopes.get() + (counts,))
+        try:
+            yield counts
+        finally:
+            _active_scopes.reset(token)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            summaries = {
+                name: {**summary, "avg": summary["sum"] / summary["count"]}
+                for name, summary in self._summaries.items()
+            }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": summaries
+            }
+
+# Process-wide registry
+metrics = MetricsRegistry()
@@ -0,0 +1,184 @@
+"""Local mock of the OpenAI chat completion and embedding endpoints.
+
+Each request sleeps for a fixed latency before answering, like a remote model
+would, so client-side concurrency is what limits throughput. Optionally each
+endpoint enforces requests- and tokens-per-minute limits the way OpenAI does:
+x-ratelimit-* headers on every response, 429 with Retry-After once a bucket
+is empty, and rejected requests still counted against the request limit. The server runs under uvicorn in a child process; use it as
+a context manager::
+
+    with MockOpenAIServer(latency_s=0.2, rpm=600, tpm=100000) as server:
+        settings.OPENAI_BASE_URL = server.base_url
+        ...
+        server.stats()  # requests served and rejected per endpoint
+"""
+import asyncio
+import json
+import multiprocessing
+import socket
+import time
+import urllib.request
+from collections import Counter
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+class _Limit:
+    """Server-side per-minute bucket, refilled continuously"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def reset_s(self) -> float:
+        return max(0.0, self.capacity - self.level) * 60.0 / self.capacity
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, (len(text) + 3) // 4)
+
+def create_app(latency_s: float, dim: int = 1536, rpm: int = None, tpm: int = None) -> Starlette:
+    limits = {}
+    stats = Counter()
+
+    def admit(endpoint: str, tokens: int):
+        """Charge the endpoint's buckets; returns (rate-limit headers, allowed)"""
+        if not rpm and not tpm:
+            return {}, True
+        if endpoint not in limits:
+            limits[endpoint] = (_Limit(rpm or 10 ** 9), _Limit(tpm or 10 ** 12))
+        requests, token_bucket = limits[endpoint]
+        now = time.monotonic()
+        requests.refill(now)
+        token_bucket.refill(now)
+        allowed = requests.level >= 1 and token_bucket.level >= tokens
+        # Like OpenAI, rejected requests still count against the request limit
+        requests.level = max(0.0, requests.level - 1)
+        if allowed:
+            token_bucket.level -= tokens
+        headers = {
+            "x-ratelimit-limit-requests": str(requests.capacity),
+            "x-ratelimit-remaining-requests": str(int(requests.level)),
+            "x-ratelimit-reset-requests": f"{requests.reset_s():.3f}s",
+            "x-ratelimit-limit-tokens": str(token_bucket.capacity),
+            "x-ratelimit-remaining-tokens": str(int(token_bucket.level)),
+            "x-ratelimit-reset-tokens": f"{token_bucket.reset_s():.3f}s",
+        }
+        if not allowed:
+            missing_s = max(
+                (1 - requests.level) * 60.0 / requests.capacity,
+                (tokens - token_bucket.level) * 60.0 / token_bucket.capacity
+            )
+            headers["retry-after"] = f"{max(missing_s, 0.001):.3f}"
+        return headers, allowed
+
+    def rate_limited(endpoint: str, headers):
+        stats[f"{endpoint}_rejected"] += 1
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+            status_code=429, headers=headers
+        )
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = " ".join(message["content"] for message in body.get("messages", []))
+        headers, allowed = admit("chat", _estimate_tokens(prompt) + body.get("max_tokens", 0))
+        if not allowed:
+            return rate_limited("chat", headers)
+        stats["chat_served"] += 1
+        await asyncio.sleep(latency_s)
+        if body.get("response_format", {}).get("type") == "json_object":
+            content = json.dumps({
+                "decision": "approved",
+                "amount": None,
+                "currency": "INR",
+                "justification": {"coverage": "Section 4.2", "limitations": "", "requirements": ""},
+                "confidence_score": 0.9
+            })
+        else:
+            content = "Covered under section 4.2."
+        return JSONResponse({
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }, headers=headers)
+
+    async def embeddings(request: Request):
+        body = await request.json()
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        headers, allowed = admit("embeddings", sum(_estimate_tokens(text) for text in texts))
+        if not allowed:
+            return rate_limited("embeddings", headers)
+        stats["embeddings_served"] += 1
+        await asyncio.sleep(latency_s)
+        return JSONResponse({
+            "object": "list",
+            "model": body.get("model"),
+            "data": [{"object": "embedding", "index": i, "embedding": [0.0] * dim} for i in range(len(texts))],
+        }, headers=headers)
+
+    async def health(request: Request):
+        return JSONResponse({"status": "ok"})
+
+    async def read_stats(request: Request):
+        return JSONResponse(dict(stats))
+
+    return Starlette(routes=[
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/v1/embeddings", embeddings, methods=["POST"]),
+        Route("/health", health),
+        Route("/stats", read_stats),
+    ])
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _serve(port: int, latency_s: float, rpm: int, tpm: int):
+    config = uvicorn.Config(
+        create_app(latency_s, rpm=rpm, tpm=tpm), host="127.0.0.1", port=port,
+        log_level="warning", access_log=False, backlog=4096
+    )
+    uvicorn.Server(config).run()
+
+class MockOpenAIServer:
+    def __init__(self, latency_s: float = 0.2, rpm: int = None, tpm: int = None):
+        self.latency_s = latency_s
+        self.rpm = rpm
+        self.tpm = tpm
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}/v1"
+        self._process = None
+
+    def __enter__(self):
+        self._process = multiprocessing.get_context("spawn").Process(
+            target=_serve, args=(self.port, self.latency_s, self.rpm, self.tpm), daemon=True
+        )
+        self._process.start()
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{self.port}/health", timeout=1.0).close()
+                return self
+            except OSError:
+                if time.monotonic() > deadline or not self._process.is_alive():
+                    raise RuntimeError("Mock OpenAI server did not start")
+                time.sleep(0.1)
+
+    def stats(self) -> dict:
+        with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/stats", timeout=5.0) as response:
+            return json.loads(response.read())
+
+    def __exit__(self, *exc):
+        self._process.terminate()
+        self._process.join()
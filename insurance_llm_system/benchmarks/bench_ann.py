@@ -0,0 +1,127 @@
+"""Cross-document search: IVF-PQ recall@k, latency and memory against exact search.
+
+A portfolio of documents is loaded into the local vector backend. Vectors
+are drawn around shared topic centres (clauses of different policies say
+similar things), and queries come from the same distribution. Exact
+results are computed by scanning every document with ANN_ENABLED=False;
+the IVF-PQ index is then built and timed at several nprobe values, plus a
+filtered search restricted to a quarter of the documents by attribute.
+
+Memory compares the index arrays (PQ codes, row bookkeeping, quantizers)
+with the float32 matrices an exact scan reads per query.
+
+Usage:
+    python -m benchmarks.bench_ann [--documents 100] [--clauses 1000] [--nprobe 4 8 16 32 64]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks._common import print_table
+from backend.app.core.config import settings
+from document_processing.vector_db.local_integration import LocalVectorManager
+
+UPSERT_BATCH = 1000
+INSURERS = ["insurer-a", "insurer-b", "insurer-c", "insurer-d"]
+
+def load(manager: LocalVectorManager, rng, documents: int, clauses: int, centres: np.ndarray, noise: float):
+    clause_id = 0
+    for document in range(documents):
+        topics = rng.integers(0, len(centres), size=clauses)
+        vectors = centres[topics] + noise * rng.standard_normal((clauses, centres.shape[1]), dtype=np.float32)
+        for start in range(0, clauses, UPSERT_BATCH):
+            batch = vectors[start:start + UPSERT_BATCH]
+            manager.upsert_clauses([
+                {
+                    "id": clause_id + start + i,
+                    "document_id": document,
+                    "text": f"Clause {clause_id + start + i}",
+                    "embeddings": vector,
+                    "attributes": {"file_type": "pdf", "insurer": INSURERS[document % len(INSURERS)]},
+                }
+                for i, vector in enumerate(batch)
+            ])
+        clause_id += clauses
+
+def run_queries(manager: LocalVectorManager, queries, top_k: int, filters=None):
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append([match["id"] for match in manager.search_clauses(query, None, top_k, filters=filters)])
+        latencies.append(time.perf_counter() - start)
+    return results, sorted(latencies)
+
+def row(name: str, results, exact, latencies, top_k: int, memory_mb: float) -> dict:
+    recall = statistics.mean(len(set(got) & set(want)) / top_k for got, want in zip(results, exact))
+    return {
+        "search": name,
+        f"recall@{top_k}": recall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "memory_mb": memory_mb,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=100)
+    parser.add_argument("--clauses", type=int, default=1000, help="clauses per document")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--per-topic", type=int, default=100, help="vectors per shared topic centre")
+    parser.add_argument("--noise", type=float, default=0.6, help="per-clause spread around its topic")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    parser.add_argument("--subquantizers", type=int, default=settings.ANN_PQ_SUBQUANTIZERS)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    total = args.documents * args.clauses
+    topics = max(1, total // args.per_topic)
+    centres = rng.standard_normal((topics, args.dim), dtype=np.float32) / np.sqrt(args.dim)
+    noise = args.noise / np.sqrt(args.dim)
+    queries = centres[rng.integers(0, topics, size=args.queries)]
+    queries = queries + noise * rng.standard_normal(queries.shape, dtype=np.float32)
+    filters = {"insurer": INSURERS[0]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.ANN_PQ_SUBQUANTIZERS = args.subquantizers
+        settings.ANN_MIN_VECTORS = min(settings.ANN_MIN_VECTORS, total)
+        settings.ANN_ENABLED = False
+        start = time.perf_counter()
+        load(LocalVectorManager(tmp), rng, args.documents, args.clauses, centres, noise)
+        load_seconds = time.perf_counter() - start
+
+        manager = LocalVectorManager(tmp)
+        exact_mb = total * args.dim * 4 / 2 ** 20
+        exact, latencies = run_queries(manager, queries, args.top_k)
+        rows = [row("exact", exact, exact, latencies, args.top_k, exact_mb)]
+        exact_filtered, latencies = run_queries(manager, queries, args.top_k, filters)
+        filtered_exact_row = row("exact, filtered", exact_filtered, exact_filtered, latencies, args.top_k, exact_mb / 4)
+
+        settings.ANN_ENABLED = True
+        start = time.perf_counter()
+        manager.prepare_ann(wait=True)
+        build_seconds = time.perf_counter() - start
+        ann_mb = manager._ann.memory_bytes() / 2 ** 20
+        for nprobe in args.nprobe:
+            settings.ANN_NPROBE = nprobe
+            results, latencies = run_queries(manager, queries, args.top_k)
+            rows.append(row(f"ivfpq nprobe={nprobe}", results, exact, latencies, args.top_k, ann_mb))
+
+        rows.append(filtered_exact_row)
+        settings.ANN_NPROBE = sorted(args.nprobe)[len(args.nprobe) // 2]
+        settings.ANN_EXACT_FILTER_ROWS = 0
+        results, latencies = run_queries(manager, queries, args.top_k, filters)
+        rows.append(row(f"ivfpq nprobe={settings.ANN_NPROBE}, filtered", results, exact_filtered, latencies, args.top_k, ann_mb))
+        nlist = manager._ann.nlist
+
+    print(f"{args.documents} documents x {args.clauses} clauses = {total} {args.dim}-d vectors, "
+          f"{nlist} IVF cells, {args.subquantizers} PQ bytes/vector, rerank x{settings.ANN_RERANK_FACTOR}")
+    print(f"load {load_seconds:.1f}s, index build {build_seconds:.1f}s; filter keeps 1/{len(INSURERS)} of documents")
+    print_table(rows, ["search", f"recall@{args.top_k}", "p50_ms", "p95_ms", "memory_mb"])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Chunking: fixed character windows vs token-aware, boundary-respecting spans.
+
+Both sides start from the same detected sections. The legacy side cleans each
+section and slices 1000-character windows with 200 characters of overlap, as
+the chunker did before. The span side chunks the raw section on clause and
+sentence boundaries and cleans each chunk. Reported per mode: chunks per
+document, total tokens that would be sent for embedding (counted with the
+configured tokenizer) and chunking throughput.
+
+Usage:
+    python -m benchmarks.bench_chunker [--documents 20] [--pages 30]
+"""
+import argparse
+import time
+
+from benchmarks._common import print_table, synthetic_policy_text
+from document_processing.preprocessing.chunker import chunk_spans, count_tokens, tiktoken
+from document_processing.preprocessing.cleaner import clean_text
+from document_processing.preprocessing.section_detector import find_sections
+
+LEGACY_CHUNK_SIZE = 1000
+LEGACY_CHUNK_OVERLAP = 200
+
+def legacy_chunk_text(text: str):
+    if len(text) <= LEGACY_CHUNK_SIZE:
+        return [text]
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + LEGACY_CHUNK_SIZE, len(text))
+        chunks.append(text[start:end])
+        if end == len(text):
+            break
+        start = end - LEGACY_CHUNK_OVERLAP
+    return chunks
+
+def run_legacy(sections):
+    texts = []
+    for section in sections:
+        cleaned = clean_text(section.text)
+        if cleaned:
+            texts.extend(chunk for chunk in legacy_chunk_text(cleaned) if chunk.strip())
+    return texts
+
+def run_spans(sections):
+    texts = []
+    for section in sections:
+        for span in chunk_spans(section.source, section.start, section.end, section.title, section.page):
+            cleaned = clean_text(span.text(section.source))
+            if cleaned:
+                texts.append(cleaned)
+    return texts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=30)
+    args = parser.parse_args()
+
+    documents = [synthetic_policy_text(args.pages, seed=seed) for seed in range(args.documents)]
+    megabytes = sum(len(doc.encode("utf-8")) for doc in documents) / 1e6
+    sections = [find_sections(doc) for doc in documents]
+
+    rows = []
+    for mode, runner in (("char-window", run_legacy), ("token-span", run_spans)):
+        start = time.perf_counter()
+        outputs = [runner(doc_sections) for doc_sections in sections]
+        elapsed = time.perf_counter() - start
+        chunks = sum(len(texts) for texts in outputs)
+        rows.append({
+            "mode": mode,
+            "chunks_per_doc": chunks / len(documents),
+            "embedded_tokens": sum(count_tokens(text) for texts in outputs for text in texts),
+            "seconds": elapsed,
+            "mb_per_s": megabytes / elapsed if elapsed else 0.0,
+        })
+
+    print(f"{args.documents} documents x {args.pages} pages, {megabytes:.2f} MB; "
+          f"tokens counted with {'tiktoken' if tiktoken else 'the ~4 chars/token estimate'}")
+    print_table(rows, ["mode", "chunks_per_doc", "embedded_tokens", "seconds", "mb_per_s"])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Text cleaning throughput (MB/s): per-call regex cleaner vs the compiled cleaner.
+
+The legacy implementation is reproduced here so both run on the same input;
+every run checks the two produce identical output.
+
+Usage:
+    python -m benchmarks.bench_cleaner [--pages 1 20 200] [--repeat 5]
+"""
+import argparse
+import re
+import time
+
+from benchmarks._common import print_table, synthetic_policy_text
+from backend.app.core.config import settings
+from document_processing.preprocessing import cleaner
+
+def legacy_clean_text(text: str):
+    """Cleaner as it was: new patterns list and config lookups on every call"""
+    if not text:
+        return None
+    patterns = [(r'\s+', ' '), (r'-\n', ''), (r'\n', ' '), (r'\t', ' '), (r'\x0c', ' ')]
+    if settings.CLEANER_CONFIG.get("remove_special_chars", True):
+        patterns.append((r'[^\w\s-]', ''))
+    stop_words = set(settings.CLEANER_CONFIG.get("stop_words", []))
+    for pattern, repl in patterns:
+        text = re.sub(pattern, repl, text)
+    if settings.CLEANER_CONFIG.get("lowercase", True):
+        text = text.lower()
+    if settings.CLEANER_CONFIG.get("remove_stopwords", False):
+        text = " ".join(w for w in text.split() if w not in stop_words)
+    return text.strip()
+
+def _time(fn, inputs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in inputs:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 20, 200])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for pages in args.pages:
+        # Page-by-page input, as the streaming pipeline feeds the cleaner
+        inputs = [synthetic_policy_text(1, seed=page) + " (see Sec. 4; ₹ 5,000)\t" for page in range(pages)]
+        megabytes = sum(len(text.encode("utf-8")) for text in inputs) / 1e6
+        for text in inputs:
+            assert legacy_clean_text(text) == cleaner.clean_text(text)
+
+        for name, fn in (("legacy", legacy_clean_text), ("compiled", cleaner.clean_text)):
+            elapsed = _time(fn, inputs, args.repeat)
+            rows.append({
+                "pages": pages,
+                "cleaner": name,
+                "mb": megabytes,
+                "seconds": elapsed,
+                "mb_per_s": megabytes / elapsed if elapsed else 0.0,
+            })
+
+    print_table(rows, ["pages", "cleaner", "mb", "seconds", "mb_per_s"])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""DOCX text extraction: python-docx object model vs streaming iterparse.
+
+Generates schedule-heavy DOCX files (policy paragraphs plus a large benefit
+table with horizontally merged cells) and reports throughput and peak RSS
+for each extractor. Each run is a forked child so peak RSS is its own.
+
+Usage:
+    python -m benchmarks.bench_docx_extraction [--paragraphs 2000] [--rows 1000 5000]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+from benchmarks._common import print_table, synthetic_policy_text
+from document_processing.text_extraction import docx_parser
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+def _paragraph(text: str) -> str:
+    return f'<w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+def _cell(text: str, span: int = 1) -> str:
+    props = f'<w:tcPr><w:gridSpan w:val="{span}"/></w:tcPr>' if span > 1 else ""
+    return f"<w:tc>{props}{_paragraph(text)}</w:tc>"
+
+def write_synthetic_docx(path: str, paragraphs: int, rows: int) -> None:
+    """Write a DOCX with policy paragraphs followed by a benefit schedule table"""
+    lines = [line for line in synthetic_policy_text(max(1, paragraphs // 20)).replace("\f", "").split("\n")]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", RELS)
+        with archive.open("word/document.xml", "w") as xml:
+            xml.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+            )
+            for i in range(paragraphs):
+                xml.write(_paragraph(lines[i % len(lines)]).encode())
+            xml.write(b"<w:tbl>")
+            for row in range(rows):
+                cells = [
+                    _cell(f"Benefit {row}"),
+                    _cell(f"Plan A/B limit {row * 100} INR", span=2),
+                    _cell("Covered up to sum insured"),
+                    _cell(f"{row % 30} days waiting period"),
+                ]
+                xml.write(("<w:tr>" + "".join(cells) + "</w:tr>").encode())
+            xml.write(b"</w:tbl><w:sectPr/></w:body></w:document>")
+
+def run_python_docx(path: str):
+    parser = docx_parser.DocxParser()
+    return list(parser._iter_lines(docx_parser.Document(path)))
+
+def run_streaming(path: str):
+    return list(docx_parser.iter_document_lines(path))
+
+EXTRACTORS = {"python-docx": run_python_docx, "iterparse": run_streaming}
+
+def _child(name, path, results):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    lines = EXTRACTORS[name](path)
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    characters = sum(len(line) for line in lines)
+    results.put({
+        "extractor": name,
+        "lines": len(lines),
+        "seconds": elapsed,
+        "mchars_per_s": characters / 1e6 / elapsed if elapsed else 0.0,
+        # ru_maxrss is in KiB on Linux
+        "rss_growth_mb": (rss_after - rss_before) / 1024,
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paragraphs", type=int, default=2000)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 5000])
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("fork")
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for table_rows in args.rows:
+            path = os.path.join(tmp, f"schedule_{table_rows}.docx")
+            write_synthetic_docx(path, args.paragraphs, table_rows)
+            size_mb = os.path.getsize(path) / 1e6
+            for name in EXTRACTORS:
+                results = ctx.Queue()
+                child = ctx.Process(target=_child, args=(name, path, results))
+                child.start()
+                row = results.get()
+                child.join()
+                row.update({"table_rows": table_rows, "docx_mb": size_mb})
+                rows.append(row)
+
+    print_table(rows, ["table_rows", "docx_mb", "extractor", "lines", "seconds", "mchars_per_s", "rss_growth_mb"])
+
+if __name__ == "__main__":
+    main()
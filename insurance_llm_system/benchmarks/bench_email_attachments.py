@@ -0,0 +1,86 @@
+"""Email ingestion time with several PDF/DOCX attachments: sequential vs worker pool.
+
+Builds a claim email carrying generated PDF and DOCX attachments of
+different sizes and times EmailParser.extract_text with one worker (inline)
+and with the pool. The time to extract the largest attachment alone is
+shown for reference: with enough cores the pooled run should approach it.
+
+Usage:
+    python -m benchmarks.bench_email_attachments [--pages 40 20 10 10] [--workers 1 4]
+"""
+import argparse
+import os
+import tempfile
+import time
+from email.message import EmailMessage
+
+from benchmarks._common import print_table
+from benchmarks.bench_docx_extraction import write_synthetic_docx
+from benchmarks.bench_pdf_extraction import write_synthetic_pdf
+from document_processing.text_extraction import email_parser, pdf_parser
+from document_processing.text_extraction.attachments import extract_attachment
+
+def build_email(tmp: str, pdf_pages, docx_rows: int) -> bytes:
+    msg = EmailMessage()
+    msg["Subject"] = "Cashless claim - hospital bills and policy schedule"
+    msg["From"] = "claims@example.com"
+    msg["To"] = "intake@example.com"
+    msg.set_content("Please find the policy schedule and hospital bills attached.")
+    for i, pages in enumerate(pdf_pages):
+        path = os.path.join(tmp, f"bill_{i}.pdf")
+        write_synthetic_pdf(path, pages)
+        with open(path, "rb") as fp:
+            msg.add_attachment(fp.read(), maintype="application", subtype="pdf", filename=f"bill_{i}.pdf")
+    path = os.path.join(tmp, "schedule.docx")
+    write_synthetic_docx(path, 200, docx_rows)
+    with open(path, "rb") as fp:
+        msg.add_attachment(
+            fp.read(), maintype="application",
+            subtype="vnd.openxmlformats-officedocument.wordprocessingml.document",
+            filename="schedule.docx"
+        )
+    return bytes(msg)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[40, 20, 10, 10])
+    parser.add_argument("--docx-rows", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = build_email(tmp, args.pages, args.docx_rows)
+        path = os.path.join(tmp, "claim.eml")
+        with open(path, "wb") as fp:
+            fp.write(raw)
+
+        largest = os.path.join(tmp, "bill_0.pdf")
+        with open(largest, "rb") as fp:
+            data = fp.read()
+        start = time.perf_counter()
+        extract_attachment(data, "pdf")
+        rows.append({"run": "largest attachment alone", "seconds": time.perf_counter() - start})
+
+        for workers in args.workers:
+            if workers > 1:
+                # Start workers up front so spawn start-up is not billed to the run
+                pool = pdf_parser._get_process_pool(workers)
+                list(pool.map(abs, range(workers * 4)))
+            start = time.perf_counter()
+            result = email_parser.EmailParser(workers=workers).extract_text(path)
+            elapsed = time.perf_counter() - start
+            extracted = sum(1 for a in result["metadata"]["attachments"] if a["extracted"])
+            rows.append({
+                "run": f"email, {workers} worker(s)",
+                "attachments": extracted,
+                "characters": len(result["text"]),
+                "seconds": elapsed,
+            })
+        pdf_parser.shutdown_process_pool()
+
+    print(f"CPU cores available: {os.cpu_count()}")
+    print_table(rows, ["run", "attachments", "characters", "seconds"])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Clause table size and load latency: JSON embeddings vs binary blobs.
+
+N clauses of one document (1536-d vectors, like ada-002) are written to a
+file-backed SQLite database with the legacy JSON column and with the
+EmbeddingVector column in each storage format. Load latency is the time to
+read a document's clause ids, texts and embeddings into one float32 matrix,
+the shape every in-process search needs. The JSON database is then
+migrated in place with migrate_embeddings and vacuumed.
+
+Usage:
+    python -m benchmarks.bench_embedding_storage [--clauses 5000] [--dim 1536] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import JSON, Column, Integer, MetaData, String, Table, create_engine, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks._common import print_table
+from backend.app.core.config import settings
+from backend.app.db import crud, models
+from backend.app.db.migrate_embeddings import migrate_embeddings
+from backend.app.db.session import Base
+
+DOCUMENT_ID = 1
+CLAUSE_TEXT = "Expenses for knee replacement surgery are payable after a waiting period of 24 months. "
+
+# The clauses table as it was declared before embeddings became blobs
+legacy_metadata = MetaData()
+legacy_clauses = Table(
+    "clauses", legacy_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("document_id", Integer),
+    Column("clause_text", String, nullable=False),
+    Column("section", String),
+    Column("page_number", Integer),
+    Column("content_hash", String(64)),
+    Column("embeddings", JSON),
+)
+
+def time_loads(load, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        matrix = load()
+        timings.append(time.perf_counter() - start)
+    assert matrix.dtype == np.float32
+    return statistics.median(timings)
+
+def load_legacy(engine):
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(legacy_clauses.c.id, legacy_clauses.c.clause_text, legacy_clauses.c.embeddings)
+            .where(legacy_clauses.c.document_id == DOCUMENT_ID)
+        ).all()
+    return np.asarray([row.embeddings for row in rows], dtype=np.float32)
+
+def load_blobs(Session):
+    db = Session()
+    try:
+        rows = db.query(models.Clause.id, models.Clause.clause_text, models.Clause.embeddings).filter(
+            models.Clause.document_id == DOCUMENT_ID
+        ).all()
+    finally:
+        db.close()
+    return np.stack([row.embeddings for row in rows]).astype(np.float32, copy=False)
+
+def mean_cosine(stored: np.ndarray, vectors: np.ndarray) -> float:
+    dots = (stored * vectors).sum(axis=1)
+    return float(np.mean(dots / (np.linalg.norm(stored, axis=1) * np.linalg.norm(vectors, axis=1))))
+
+def bench_legacy(path: str, vectors: np.ndarray, repeat: int) -> dict:
+    engine = create_engine(f"sqlite:///{path}")
+    legacy_metadata.create_all(engine)
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        connection.execute(insert(legacy_clauses), [
+            {"document_id": DOCUMENT_ID, "clause_text": CLAUSE_TEXT, "section": "Exclusions", "embeddings": vector}
+            for vector in vectors.tolist()
+        ])
+    write_seconds = time.perf_counter() - start
+    load_seconds = time_loads(lambda: load_legacy(engine), repeat)
+    engine.dispose()
+    return {
+        "storage": "json (before)",
+        "db_mb": os.path.getsize(path) / 2 ** 20,
+        "write_s": write_seconds,
+        "load_ms": load_seconds * 1000,
+        "cosine": 1.0,
+    }
+
+def bench_storage(path: str, storage: str, vectors: np.ndarray, repeat: int) -> dict:
+    settings.EMBEDDING_STORAGE = storage
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    start = time.perf_counter()
+    crud.create_clauses_bulk(db, DOCUMENT_ID, [
+        {"clause_text": CLAUSE_TEXT, "section": "Exclusions", "embeddings": vector} for vector in vectors
+    ])
+    db.commit()
+    write_seconds = time.perf_counter() - start
+    db.close()
+    load_seconds = time_loads(lambda: load_blobs(Session), repeat)
+    cosine = mean_cosine(load_blobs(Session), vectors)
+    engine.dispose()
+    return {
+        "storage": storage,
+        "db_mb": os.path.getsize(path) / 2 ** 20,
+        "write_s": write_seconds,
+        "load_ms": load_seconds * 1000,
+        "cosine": cosine,
+    }
+
+def bench_migration(path: str, repeat: int) -> dict:
+    engine = create_engine(f"sqlite:///{path}")
+    start = time.perf_counter()
+    migrate_embeddings(engine, storage="float32")
+    with engine.connect() as connection:
+        connection.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+    migrate_seconds = time.perf_counter() - start
+    Session = sessionmaker(bind=engine)
+    load_seconds = time_loads(lambda: load_blobs(Session), repeat)
+    engine.dispose()
+    return {
+        "storage": "json -> float32 (migrated)",
+        "db_mb": os.path.getsize(path) / 2 ** 20,
+        "write_s": migrate_seconds,
+        "load_ms": load_seconds * 1000,
+        "cosine": 1.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clauses", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--repeat", type=int, default=5, help="loads timed per database (median reported)")
+    args = parser.parse_args()
+
+    # ada-002 vectors are unit length with small components
+    rng = np.random.default_rng(5)
+    vectors = rng.standard_normal((args.clauses, args.dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        rows.append(bench_legacy(legacy_path, vectors, args.repeat))
+        for storage in ("float32", "float16", "int8"):
+            rows.append(bench_storage(os.path.join(tmp, f"{storage}.db"), storage, vectors, args.repeat))
+        rows.append(bench_migration(legacy_path, args.repeat))
+
+    print(f"{args.clauses} clauses x {args.dim}-d, SQLite; write_s is the migration time for the last row; "
+          f"cosine is stored vs original")
+    print_table(rows, ["storage", "db_mb", "write_s", "load_ms", "cosine"])
+
+if __name__ == "__main__":
+    main()
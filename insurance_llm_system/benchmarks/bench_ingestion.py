@@ -0,0 +1,106 @@
+"""Compare ingestion strategies against a local stub embedder.
+
+Modes:
+    per-chunk   whole document in memory, one embedding call per chunk
+    batched     whole document in memory, batched embedding calls
+    streaming   page-by-page pipeline (clean -> section -> chunk -> embed in
+                batches), nothing kept beyond the current batch
+
+Each mode runs in a forked child so its peak RSS can be reported on its own.
+
+Usage:
+    python -m benchmarks.bench_ingestion [--pages 20 100 200] [--latency-ms 20]
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+
+from benchmarks._common import StubEmbedder, print_table, synthetic_policy_text
+from backend.app.services import document_service
+from document_processing.preprocessing.chunker import chunk_text
+from document_processing.preprocessing.cleaner import clean_text
+from document_processing.preprocessing.section_detector import detect_sections
+from ml_models.embedding_models.batching import batch_items
+
+def iter_pages(pages: int):
+    """Synthetic parser output, produced one page at a time"""
+    for page in range(pages):
+        yield synthetic_policy_text(1, seed=page)
+
+def build_chunks_in_memory(pages: int):
+    text = "\n".join(iter_pages(pages))
+    sections = detect_sections(text)
+    chunks = []
+    for section_data in sections.values():
+        for section in section_data:
+            chunks.extend(
+                {"text": chunk, "section": f"{section['title']}_{i+1}"}
+                for i, chunk in enumerate(chunk_text(clean_text(section["text"]) or ""))
+                if chunk.strip()
+            )
+    return chunks
+
+def run_per_chunk(pages, embedder):
+    chunks = build_chunks_in_memory(pages)
+    vectors = [embedder(chunk["text"])[0] for chunk in chunks]
+    return len(vectors)
+
+def run_batched(pages, embedder):
+    chunks = build_chunks_in_memory(pages)
+    vectors = document_service.embed_chunks(chunks)
+    return len(vectors)
+
+def run_streaming(pages, embedder):
+    count = 0
+    chunks = document_service.iter_document_chunks(iter_pages(pages))
+    for batch in batch_items(chunks, lambda chunk: chunk["text"]):
+        count += len(document_service.embed_chunks(batch))
+    return count
+
+MODES = {"per-chunk": run_per_chunk, "batched": run_batched, "streaming": run_streaming}
+
+def _child(mode, pages, latency_s, results):
+    embedder = StubEmbedder(latency_s=latency_s)
+    document_service.get_embeddings = embedder
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    chunks = MODES[mode](pages, embedder)
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put({
+        "pages": pages,
+        "mode": mode,
+        "chunks": chunks,
+        "embed_calls": embedder.calls,
+        "seconds": elapsed,
+        "chunks_per_s": chunks / elapsed if elapsed else 0.0,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": rss_after / 1024,
+        "rss_growth_mb": (rss_after - rss_before) / 1024,
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 100, 200])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("fork")
+    rows = []
+    for pages in args.pages:
+        for mode in args.modes:
+            results = ctx.Queue()
+            child = ctx.Process(target=_child, args=(mode, pages, args.latency_ms / 1000, results))
+            child.start()
+            rows.append(results.get())
+            child.join()
+
+    print_table(rows, [
+        "pages", "mode", "chunks", "embed_calls", "seconds", "chunks_per_s",
+        "peak_rss_mb", "rss_growth_mb"
+    ])
+
+if __name__ == "__main__":
+    main()
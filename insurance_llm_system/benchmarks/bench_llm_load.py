@@ -0,0 +1,97 @@
+"""LLM calls under concurrent load: threadpool (sync client) vs native async.
+
+Modes:
+    threadpool  model_selector.get_llm_response (blocking openai client) run
+                through anyio's worker threads, which is how FastAPI serves
+                a sync endpoint (40 threads by default)
+    async       model_selector.aget_llm_response awaited on the event loop
+                over the shared pooled aiohttp session
+
+Both talk to a local mock OpenAI server with a fixed per-request latency.
+Every client issues its requests back to back; reported are requests per
+second and latency percentiles across all clients.
+
+Usage:
+    python -m benchmarks.bench_llm_load [--clients 200] [--requests 5] [--latency 0.2]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import anyio.to_thread
+import openai
+
+from benchmarks._common import print_table
+from benchmarks._mock_openai import MockOpenAIServer
+from backend.app.core.config import settings
+from ml_models.llm_integration import model_selector
+from ml_models.llm_integration.http_client import close_openai_client
+
+PROMPT = "Is knee replacement surgery covered for a 46 year old after 3 months of policy?"
+
+async def threadpool_call():
+    return await anyio.to_thread.run_sync(
+        lambda: model_selector.get_llm_response(PROMPT, response_format="json_object", temperature=0.1)
+    )
+
+async def async_call():
+    return await model_selector.aget_llm_response(PROMPT, response_format="json_object", temperature=0.1)
+
+MODES = {"threadpool": threadpool_call, "async": async_call}
+
+async def run(mode: str, clients: int, requests: int):
+    call = MODES[mode]
+    latencies = []
+
+    async def client():
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await call()
+            latencies.append(time.perf_counter() - start)
+            assert response.get("decision") == "approved"
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(client() for _ in range(clients)))
+    finally:
+        await close_openai_client()
+    return time.perf_counter() - start, latencies
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5, help="requests per client")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock server latency in seconds")
+    args = parser.parse_args()
+
+    rows = []
+    with MockOpenAIServer(latency_s=args.latency) as server:
+        settings.OPENAI_BASE_URL = server.base_url
+        # The mock has no rate limits; measure the transport, not the scheduler
+        settings.OPENAI_RATE_LIMIT_ENABLED = False
+        openai.api_base = server.base_url
+        for mode in MODES:
+            # Warm up connections and threads before timing
+            asyncio.run(run(mode, min(args.clients, 20), 1))
+            elapsed, latencies = asyncio.run(run(mode, args.clients, args.requests))
+            rows.append({
+                "mode": mode,
+                "requests": len(latencies),
+                "seconds": elapsed,
+                "req_per_s": len(latencies) / elapsed if elapsed else 0.0,
+                "p50_ms": statistics.median(latencies) * 1000,
+                "p95_ms": _percentile(latencies, 0.95) * 1000,
+            })
+
+    print(f"{args.clients} concurrent clients x {args.requests} requests, "
+          f"mock latency {args.latency * 1000:.0f} ms, "
+          f"async pool {settings.OPENAI_MAX_CONNECTIONS} connections")
+    print_table(rows, ["mode", "requests", "seconds", "req_per_s", "p50_ms", "p95_ms"])
+
+if __name__ == "__main__":
+    main()
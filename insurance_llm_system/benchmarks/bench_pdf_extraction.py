@@ -0,0 +1,90 @@
+"""Pages per second against worker count for page-parallel PDF extraction.
+
+Usage:
+    python -m benchmarks.bench_pdf_extraction [--pages 300] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks._common import print_table, synthetic_policy_text
+from document_processing.text_extraction import pdf_parser
+
+def write_synthetic_pdf(path: str, pages: int, lines_per_page: int = 48) -> None:
+    """Write a plain multi-page PDF (Helvetica text) without extra dependencies"""
+    words = synthetic_policy_text(pages).replace("\f", "").split()
+    per_line = 12
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages tree, filled in once page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    cursor = 0
+    for _ in range(pages):
+        lines = []
+        for _ in range(lines_per_page):
+            line = " ".join(words[cursor:cursor + per_line]) or "blank"
+            cursor = (cursor + per_line) % max(len(words) - per_line, 1)
+            lines.append(line.replace("\\", "").replace("(", "").replace(")", ""))
+        stream = "BT /F1 9 Tf 40 800 Td 11 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+        data = stream.encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    with open(path, "wb") as out:
+        out.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(out.tell())
+            out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = out.tell()
+        out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            out.write(b"%010d 00000 n \n" % offset)
+        out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.pdf")
+        write_synthetic_pdf(path, args.pages)
+        for workers in args.workers:
+            extractor = pdf_parser.PDFParser(workers=workers)
+            extractor.max_pages = 0
+            if workers > 1:
+                # Start every worker up front so process start-up (which
+                # re-imports this script under spawn) is not billed to the run
+                pool = pdf_parser._get_process_pool(workers)
+                list(pool.map(abs, range(workers * 4)))
+            with open(path, "rb") as stream:
+                start = time.perf_counter()
+                result = extractor.extract_text(stream)
+                elapsed = time.perf_counter() - start
+            assert len(result["metadata"]["pages"]) == args.pages
+            rows.append({
+                "workers": workers,
+                "pages": args.pages,
+                "seconds": elapsed,
+                "pages_per_s": args.pages / elapsed if elapsed else 0.0,
+            })
+        pdf_parser.shutdown_process_pool()
+
+    print(f"CPU cores available: {os.cpu_count()}")
+    print_table(rows, ["workers", "pages", "seconds", "pages_per_s"])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Prompt tokens per /process call before and after context packing.
+
+A recorded set of claim queries (with the field extraction the analysis
+step returned for each) is replayed through process_insurance_query
+against a policy run through ingestion's sectioning, chunking, cleaning
+and "<section>_<n>" labelling, so retrieved neighbours share the
+chunker's sentence overlap or follow each other across a paragraph
+break. The LLM is replaced by a recorder
+that answers from the recording and keeps every prompt it is sent.
+
+"before" swaps in the prompt builders as they were prior to packing:
+indented f-string templates with every retrieved chunk pasted in full.
+"after" is the current pipeline: dedented templates and merged,
+budgeted clauses. Tokens are counted with the prompt tokenizer (the
+character estimate when tiktoken is not installed).
+
+Usage:
+    python -m benchmarks.bench_prompt_tokens [--top-k 5] [--budget 1500]
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import re
+import statistics
+import tempfile
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks._common import _WORDS, print_table
+from backend.app.core.config import settings
+from backend.app.db import crud
+from backend.app.db.session import Base
+from backend.app.services import query_processor
+from backend.app.services.context_packer import prompt_tokens
+from backend.app.services.document_service import iter_document_chunks
+from backend.app.utils.metrics import metrics
+
+DIM = 256
+PROCEDURES = [
+    "knee replacement", "cataract surgery", "angioplasty", "appendectomy", "hernia repair",
+    "gallbladder removal", "maternity", "dialysis", "chemotherapy", "hip replacement",
+    "bariatric surgery", "dental surgery",
+]
+# (query, analysis as extracted by the LLM)
+RECORDED_QUERIES = [
+    ("46M, knee replacement surgery in Pune, 3-month-old policy",
+     {"age": 46, "gender": "M", "procedure": "knee replacement surgery", "location": "Pune", "policy_duration_months": 3}),
+    ("Is cataract surgery covered for my 67 year old mother? Policy is 2 years old, Mumbai",
+     {"age": 67, "gender": "F", "procedure": "cataract surgery", "location": "Mumbai", "policy_duration_months": 24}),
+    ("angioplasty for 52 year old man in Delhi, bought the policy 14 months ago",
+     {"age": 52, "gender": "M", "procedure": "angioplasty", "location": "Delhi", "policy_duration_months": 14}),
+    ("appendectomy 23F Bengaluru 1 month policy",
+     {"age": 23, "gender": "F", "procedure": "appendectomy", "location": "Bengaluru", "policy_duration_months": 1}),
+    ("hernia repair, 38 years, male, Chennai, policy active for 8 months",
+     {"age": 38, "gender": "M", "procedure": "hernia repair", "location": "Chennai", "policy_duration_months": 8}),
+    ("Will my gallbladder removal be reimbursed? 44 F Hyderabad, 30 months into the policy",
+     {"age": 44, "gender": "F", "procedure": "gallbladder removal", "location": "Hyderabad", "policy_duration_months": 30}),
+    ("maternity claim, 29 year old woman, Kolkata, policy is 10 months old",
+     {"age": 29, "gender": "F", "procedure": "maternity", "location": "Kolkata", "policy_duration_months": 10,
+      "other_details": {"note": "first delivery, caesarean section"}}),
+    ("dialysis sessions for 61M in Jaipur, 5 year policy",
+     {"age": 61, "gender": "M", "procedure": "dialysis", "location": "Jaipur", "policy_duration_months": 60}),
+    ("chemotherapy cycles 55F Pune policy 18 months",
+     {"age": 55, "gender": "F", "procedure": "chemotherapy", "location": "Pune", "policy_duration_months": 18}),
+    ("hip replacement for a 71 year old, Mumbai, policy renewed for 4 years",
+     {"age": 71, "gender": None, "procedure": "hip replacement", "location": "Mumbai", "policy_duration_months": 48}),
+    ("bariatric surgery 34M Delhi, 6 months",
+     {"age": 34, "gender": "M", "procedure": "bariatric surgery", "location": "Delhi", "policy_duration_months": 6}),
+    ("Is dental surgery after an accident covered? 27F, Bengaluru, 2 months",
+     {"age": 27, "gender": "F", "procedure": "dental surgery", "location": "Bengaluru", "policy_duration_months": 2,
+      "other_details": {"cause": "road accident"}}),
+    ("knee replacement for 58F in Chennai with a 26 month old policy",
+     {"age": 58, "gender": "F", "procedure": "knee replacement", "location": "Chennai", "policy_duration_months": 26}),
+    ("cataract in both eyes, 72M Hyderabad, policy 9 months",
+     {"age": 72, "gender": "M", "procedure": "cataract surgery", "location": "Hyderabad", "policy_duration_months": 9}),
+    ("emergency angioplasty 49M Kolkata 3 months into cover",
+     {"age": 49, "gender": "M", "procedure": "angioplasty", "location": "Kolkata", "policy_duration_months": 3,
+      "other_details": {"admission": "emergency"}}),
+    ("hernia surgery for 65 year old man, Jaipur, 40 months",
+     {"age": 65, "gender": "M", "procedure": "hernia repair", "location": "Jaipur", "policy_duration_months": 40}),
+]
+DECISION = {
+    "decision": "approved", "amount": None, "currency": "INR",
+    "justification": {"coverage": "Clause 1", "limitations": "", "requirements": ""}, "confidence_score": 0.8
+}
+
+def embed(text: str) -> np.ndarray:
+    vector = np.zeros(DIM)
+    for word in re.findall(r"[a-z]+", text.lower()):
+        seed = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+        vector += np.random.default_rng(seed).standard_normal(DIM)
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+def policy_text() -> str:
+    """One "Terms and Conditions" section per procedure, each two long paragraphs of sentences"""
+    rng = random.Random(3)
+    sections = []
+    for procedure in PROCEDURES:
+        paragraphs = []
+        for _ in range(2):
+            sentences = []
+            for _ in range(rng.randint(7, 11)):
+                words = rng.choices(_WORDS, k=rng.randint(10, 24))
+                words.insert(rng.randrange(len(words)), procedure)
+                sentences.append(" ".join(words).capitalize() + ".")
+            paragraphs.append(" ".join(sentences))
+        sections.append(f"Terms and Conditions - {procedure.title()}\n" + "\n\n".join(paragraphs))
+    return "\n\n".join(sections)
+
+def legacy_analysis_prompt(query: str) -> str:
+    return f"""
+    Analyze this insurance query and extract relevant details:
+    Query: "{query}"
+
+    Extract as JSON with these fields:
+    - age: number|null
+    - gender: string (M/F/Other)|null
+    - procedure: string|null
+    - location: string|null
+    - policy_duration_months: number|null
+    - other_details: object|null
+    """
+
+def legacy_decision_prompt(query_analysis, relevant_clauses) -> str:
+    clauses = "\n".join(
+        f"Clause {idx+1} (Section {clause.get('section', 'N/A')}): {clause['text']}"
+        for idx, clause in enumerate(relevant_clauses)
+    )
+    return f"""
+    As an insurance claim adjudicator, analyze this claim based on the policy clauses:
+
+    Claim Details:
+    - Age: {query_analysis.get('age', 'N/A')}
+    - Gender: {query_analysis.get('gender', 'N/A')}
+    - Procedure: {query_analysis.get('procedure', 'N/A')}
+    - Location: {query_analysis.get('location', 'N/A')}
+    - Policy Duration: {query_analysis.get('policy_duration_months', 'N/A')} months
+
+    Relevant Policy Clauses:
+    {clauses}
+
+    Provide your decision in this JSON format:
+    {{
+        "decision": "approved|denied|pending",
+        "amount": number|null,
+        "currency": "INR",
+        "justification": {{
+            "coverage": "Which clause covers this?",
+            "limitations": "Any limitations that apply",
+            "requirements": "Requirements met/missing"
+        }},
+        "confidence_score": 0.0-1.0
+    }}
+    """
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--budget", type=int, default=settings.PROMPT_CONTEXT_TOKENS, help="clause token budget")
+    args = parser.parse_args()
+
+    recorded = {query: analysis for query, analysis in RECORDED_QUERIES}
+    prompts = []
+
+    async def fake_llm(prompt, response_format="text", temperature=0.2, **kwargs):
+        prompts.append(prompt)
+        for query, analysis in recorded.items():
+            if f'Query: "{query}"' in prompt:
+                return dict(analysis)
+        return dict(DECISION)
+
+    async def fake_embeddings(texts):
+        return [embed(text).tolist() for text in ([texts] if isinstance(texts, str) else texts)]
+
+    query_processor.aget_llm_response = fake_llm
+    query_processor.aget_embeddings = fake_embeddings
+    builders = {
+        "before": (legacy_analysis_prompt, legacy_decision_prompt),
+        "after": (query_processor.build_analysis_prompt, query_processor.build_decision_prompt),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.LEXICAL_INDEX_DIR = os.path.join(tmp, "lexical")
+        settings.RETRIEVAL_TOP_K = args.top_k
+        settings.PROMPT_CONTEXT_TOKENS = args.budget
+        settings.QUERY_CACHE_ENABLED = False
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        document = crud.create_document(db, filename="policy.pdf", file_type="pdf", file_size=0)
+        # Sectioned, chunked, cleaned and labelled as ingestion does it
+        clauses = [
+            {"clause_text": chunk["text"], "section": chunk["section"], "page_number": chunk["page_number"],
+             "embeddings": embed(chunk["text"])}
+            for chunk in iter_document_chunks([policy_text()])
+        ]
+        crud.create_clauses_bulk(db, document.id, clauses)
+        db.commit()
+
+        rows = []
+        for name, (analysis_builder, decision_builder) in builders.items():
+            query_processor.build_analysis_prompt = analysis_builder
+            query_processor.build_decision_prompt = decision_builder
+            analysis_tokens, decision_tokens = [], []
+            before = metrics.snapshot()["counters"]
+            for query, _ in RECORDED_QUERIES:
+                prompts.clear()
+                asyncio.run(query_processor.process_insurance_query(db, query, document.id, 0))
+                analysis_prompt, decision_prompt = prompts
+                analysis_tokens.append(prompt_tokens(analysis_prompt))
+                decision_tokens.append(prompt_tokens(decision_prompt))
+            after = metrics.snapshot()["counters"]
+            counted = lambda name: (after.get(name, 0) - before.get(name, 0)) / len(RECORDED_QUERIES)
+            rows.append({
+                "prompts": name,
+                "analysis": statistics.mean(analysis_tokens),
+                "decision": statistics.mean(decision_tokens),
+                "per_call": statistics.mean(analysis_tokens) + statistics.mean(decision_tokens),
+                "max_call": max(a + d for a, d in zip(analysis_tokens, decision_tokens)),
+                "merged": counted("prompt_clauses_merged"),
+                "dropped": counted("prompt_clauses_dropped"),
+            })
+        db.close()
+
+    saved = 1 - rows[1]["per_call"] / rows[0]["per_call"]
+    print(f"{len(RECORDED_QUERIES)} recorded queries, {len(clauses)} chunks of at most {settings.CHUNK_MAX_TOKENS} "
+          f"tokens ({settings.CHUNK_OVERLAP_TOKENS} overlap), top-{args.top_k} {settings.RETRIEVAL_MODE} retrieval, "
+          f"{args.budget}-token clause budget; average prompt tokens "
+          f"and clauses merged into a neighbour or left out per /process call")
+    print_table(rows, ["prompts", "analysis", "decision", "per_call", "max_call", "merged", "dropped"])
+    print(f"saved {saved:.1%} of prompt tokens per call")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Retrieval latency and cache hit rates for a skewed replay of /process queries.
+
+Claims repeat: a few procedures, cities and policy ages account for most
+traffic, and the query analysis step extracts the same fields from many
+differently worded questions. The replay draws --intents distinct claims
+(procedure, location, policy duration, age) and picks one per request with
+Zipf weights (--zipf), against --documents policies that are themselves
+Zipf-weighted. Each request perturbs the casing and spacing of the
+extracted fields the way differently phrased questions do.
+
+Requests arrive as a Poisson process at --qps on a simulated clock that
+the caches read, so TTL expiry follows the simulated timeline while
+latencies are measured on the wall clock. Halfway through, the most
+queried document is re-indexed and its cached retrievals are dropped.
+Each query embedding call waits --embed-latency-ms.
+
+Usage:
+    python -m benchmarks.bench_query_cache [--requests 2000] [--intents 400] [--zipf 1.1] [--qps 2]
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks._common import _WORDS, print_table
+from backend.app.core.config import settings
+from backend.app.db import crud
+from backend.app.db.session import Base
+from backend.app.services import query_cache, query_processor
+from backend.app.services.clause_cache import invalidate_document
+from backend.app.utils.metrics import metrics
+
+DIM = 256
+PROCEDURES = [
+    "knee replacement", "cataract surgery", "angioplasty", "appendectomy", "hernia repair",
+    "gallbladder removal", "maternity", "dialysis", "chemotherapy", "hip replacement",
+    "tonsillectomy", "bypass surgery", "kidney stone removal", "spinal fusion", "hysterectomy",
+    "day care treatment", "dental surgery", "bariatric surgery", "skin grafting", "lasik",
+]
+CITIES = ["Pune", "Mumbai", "Delhi", "Bengaluru", "Chennai", "Hyderabad", "Kolkata", "Jaipur"]
+
+def vector(text: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+    return np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+
+def zipf_weights(count: int, exponent: float):
+    return [1.0 / (rank ** exponent) for rank in range(1, count + 1)]
+
+def rephrase(rng: random.Random, value: str) -> str:
+    """The same field as a differently worded question would yield it"""
+    value = rng.choice([value, value.lower(), value.title(), value.capitalize()])
+    return rng.choice(["", " "]) + value.replace(" ", rng.choice([" ", "  "]))
+
+def make_requests(args):
+    rng = random.Random(5)
+    intents = [
+        (rng.choice(PROCEDURES), rng.choice(CITIES), rng.choice([3, 6, 12, 24, 36]), rng.randint(18, 75))
+        for _ in range(args.intents)
+    ]
+    intent_weights = zipf_weights(len(intents), args.zipf)
+    document_weights = zipf_weights(args.documents, args.zipf)
+    clock, requests = 0.0, []
+    for _ in range(args.requests):
+        clock += rng.expovariate(args.qps)
+        procedure, city, months, age = rng.choices(intents, intent_weights)[0]
+        document = rng.choices(range(args.documents), document_weights)[0]
+        analysis = {
+            "procedure": rephrase(rng, procedure), "location": rephrase(rng, city),
+            "policy_duration_months": months, "age": age,
+        }
+        requests.append((clock, document, analysis))
+    return requests
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--intents", type=int, default=400, help="distinct claims in the query population")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of claim and document popularity")
+    parser.add_argument("--documents", type=int, default=5)
+    parser.add_argument("--clauses", type=int, default=400, help="clauses per document")
+    parser.add_argument("--qps", type=float, default=2.0, help="simulated arrival rate")
+    parser.add_argument("--embed-latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    embed_calls = 0
+
+    async def fake_embeddings(texts):
+        nonlocal embed_calls
+        embed_calls += 1
+        await asyncio.sleep(args.embed_latency_ms / 1000)
+        return [vector(text).tolist() for text in ([texts] if isinstance(texts, str) else texts)]
+
+    query_processor.aget_embeddings = fake_embeddings
+    requests = make_requests(args)
+    now = 0.0
+    for cache in (query_cache.query_embeddings, query_cache.retrieval_results):
+        cache.clock = lambda: now
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.LEXICAL_INDEX_DIR = os.path.join(tmp, "lexical")
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        rng = random.Random(11)
+        documents = []
+        for d in range(args.documents):
+            document = crud.create_document(db, filename=f"policy-{d}.pdf", file_type="pdf", file_size=0)
+            texts = [
+                " ".join(rng.choices(_WORDS + [word for p in PROCEDURES for word in p.split()], k=rng.randint(12, 30)))
+                for _ in range(args.clauses)
+            ]
+            crud.create_clauses_bulk(db, document.id, [
+                {"clause_text": text, "section": "Coverage", "page_number": 1, "embeddings": vector(text)}
+                for text in texts
+            ])
+            documents.append(document.id)
+        db.commit()
+
+        rows = []
+        for enabled in (False, True):
+            settings.QUERY_CACHE_ENABLED = enabled
+            query_cache.query_embeddings.clear()
+            query_cache.retrieval_results.clear()
+            embed_calls = 0
+            before = metrics.snapshot()["counters"]
+            latencies = []
+            for i, (arrival, document, analysis) in enumerate(requests):
+                now = arrival
+                if i == len(requests) // 2:
+                    invalidate_document(documents[0])
+                start = time.perf_counter()
+                asyncio.run(query_processor.retrieve_relevant_clauses(db, documents[document], analysis))
+                latencies.append(time.perf_counter() - start)
+            after = metrics.snapshot()["counters"]
+
+            def hit_rate(name):
+                hits = after.get(f"{name}_hits", 0) - before.get(f"{name}_hits", 0)
+                misses = after.get(f"{name}_misses", 0) - before.get(f"{name}_misses", 0)
+                return 100.0 * hits / (hits + misses) if hits + misses else 0.0
+
+            latencies.sort()
+            rows.append({
+                "query_cache": "on" if enabled else "off",
+                "mean_ms": statistics.mean(latencies) * 1000,
+                "p50_ms": statistics.median(latencies) * 1000,
+                "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+                "embed_calls": embed_calls,
+                "retrieval_hit_%": hit_rate("retrieval_cache"),
+                "embedding_hit_%": hit_rate("query_embedding_cache"),
+            })
+        db.close()
+
+    distinct = len({(document, query_processor.build_semantic_query(analysis))
+                    for _, document, analysis in requests})
+    print(f"{args.requests} requests over {requests[-1][0] / 60:.0f} simulated minutes, {args.intents} claims "
+          f"(zipf {args.zipf}) x {args.documents} documents, {distinct} distinct raw (document, query) pairs; "
+          f"retrieval TTL {settings.RETRIEVAL_CACHE_TTL_S:.0f} s, "
+          f"{args.embed_latency_ms:.0f} ms per embedding call, mode {settings.RETRIEVAL_MODE}")
+    print_table(rows, ["query_cache", "mean_ms", "p50_ms", "p95_ms", "embed_calls", "retrieval_hit_%", "embedding_hit_%"])
+
+if __name__ == "__main__":
+    main()
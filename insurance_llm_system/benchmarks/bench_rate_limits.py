@@ -0,0 +1,142 @@
+"""Interactive queries during an ingestion burst, against enforced rate limits.
+
+A local mock OpenAI server enforces requests- and tokens-per-minute limits
+per endpoint and answers 429 once a bucket is empty. Ingestion threads send
+embedding batches back to back in the ingestion lane while interactive
+clients run /process-shaped calls (one query embedding, one chat
+completion) at a steady rate.
+
+Modes:
+    unscheduled      OPENAI_RATE_LIMIT_ENABLED=False: async calls retry 429s
+                     with jittered backoff, blocking ingestion calls fail
+    scheduler        token buckets configured with the server's limits
+    scheduler-4x     buckets configured 4x too high; only the x-ratelimit
+                     headers and 429s bring them down to the real limits
+
+Usage:
+    python -m benchmarks.bench_rate_limits [--duration 30] [--rpm 120] [--tpm 40000]
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+import openai
+
+from benchmarks._common import print_table
+from benchmarks._mock_openai import MockOpenAIServer
+from backend.app.core.config import settings
+from ml_models.embedding_models.ada_embeddings import ada_wrapper
+from ml_models.llm_integration import model_selector
+from ml_models.llm_integration.http_client import close_openai_client
+from ml_models.llm_integration.rate_limiter import INGESTION, priority_lane, reset_schedulers
+
+QUERY = "Is knee replacement surgery covered for a 46 year old after 3 months of policy?"
+CLAUSE = (
+    "4.2 Expenses for knee replacement surgery are payable after a waiting period of 24 months "
+    "from the first policy inception, subject to the sub-limits in the schedule of benefits."
+)
+
+MODES = {
+    "unscheduled": (False, 1),
+    "scheduler": (True, 1),
+    "scheduler-4x": (True, 4),
+}
+
+def ingest(stop: threading.Event, batch_size: int, counts: dict, lock: threading.Lock):
+    batch = [f"{CLAUSE} ({i})" for i in range(batch_size)]
+    with priority_lane(INGESTION):
+        while not stop.is_set():
+            try:
+                ada_wrapper.get_embeddings(batch)
+                key = "ingest_batches"
+            except Exception:
+                key = "ingest_failed"
+            with lock:
+                counts[key] += 1
+
+async def interactive(deadline: float, interval: float, latencies: list, counts: dict):
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            await ada_wrapper.aget_embeddings(QUERY)
+            await model_selector.aget_llm_response(QUERY, response_format="json_object", temperature=0.1, max_tokens=200)
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            counts["query_failed"] += 1
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - start)))
+
+async def run_interactive(duration: float, clients: int, rate: float, latencies: list, counts: dict):
+    deadline = time.monotonic() + duration
+    try:
+        await asyncio.gather(*(interactive(deadline, clients / rate, latencies, counts) for _ in range(clients)))
+    finally:
+        await close_openai_client()
+
+def run(mode: str, args, server: MockOpenAIServer) -> dict:
+    enabled, overestimate = MODES[mode]
+    settings.OPENAI_RATE_LIMIT_ENABLED = enabled
+    settings.OPENAI_CHAT_RPM = settings.OPENAI_EMBEDDING_RPM = args.rpm * overestimate
+    settings.OPENAI_CHAT_TPM = settings.OPENAI_EMBEDDING_TPM = args.tpm * overestimate
+    reset_schedulers()
+
+    before = server.stats()
+    counts = {"ingest_batches": 0, "ingest_failed": 0, "query_failed": 0}
+    latencies = []
+    stop, lock = threading.Event(), threading.Lock()
+    workers = [
+        threading.Thread(target=ingest, args=(stop, args.batch_size, counts, lock), daemon=True)
+        for _ in range(args.ingestion_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        asyncio.run(run_interactive(args.duration, args.clients, args.query_rate, latencies, counts))
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+    after = server.stats()
+
+    rejected = sum(after.get(key, 0) - before.get(key, 0) for key in after if key.endswith("_rejected"))
+    return {
+        "mode": mode,
+        "queries": len(latencies),
+        "query_failed": counts["query_failed"],
+        "query_p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "query_p95_ms": sorted(latencies)[int(len(latencies) * 0.95)] * 1000 if latencies else None,
+        "ingest_batches": counts["ingest_batches"],
+        "ingest_failed": counts["ingest_failed"],
+        "server_429s": rejected,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per mode")
+    parser.add_argument("--rpm", type=int, default=120, help="server requests per minute, per endpoint")
+    parser.add_argument("--tpm", type=int, default=40000, help="server tokens per minute, per endpoint")
+    parser.add_argument("--latency", type=float, default=0.1, help="mock server latency in seconds")
+    parser.add_argument("--ingestion-workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=16, help="texts per ingestion embedding call")
+    parser.add_argument("--clients", type=int, default=4, help="interactive clients")
+    parser.add_argument("--query-rate", type=float, default=0.5, help="interactive queries per second, all clients")
+    args = parser.parse_args()
+
+    rows = []
+    for mode in MODES:
+        # A fresh server per mode so every run starts with full buckets
+        with MockOpenAIServer(latency_s=args.latency, rpm=args.rpm, tpm=args.tpm) as server:
+            settings.OPENAI_BASE_URL = server.base_url
+            openai.api_base = server.base_url
+            rows.append(run(mode, args, server))
+
+    print(f"{args.duration:.0f}s per mode, server limits {args.rpm} RPM / {args.tpm} TPM per endpoint, "
+          f"{args.ingestion_workers} ingestion workers, {args.query_rate} interactive queries/s")
+    print_table(rows, [
+        "mode", "queries", "query_failed", "query_p50_ms", "query_p95_ms",
+        "ingest_batches", "ingest_failed", "server_429s"
+    ])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Retrieval latency and recall@5 for vector, hybrid (BM25 + RRF) and lexical modes.
+
+One policy document holds filler clauses plus two clauses per procedure,
+each naming the procedure by code or acronym ("PTCA", "H25.1") and by its
+full name. Queries ask for every procedure three ways: by code, by full
+name and by a paraphrase sharing no words with the policy. Clauses are
+stored and embedded after clean_text, as ingestion stores them.
+
+Embeddings come from a deterministic stand-in for ada-002: a normalized sum
+of per-concept random vectors, where paraphrase words map to the concept
+of the word they stand for, and codes or acronyms outside the general
+vocabulary get a small weight. That reproduces the behaviour this
+benchmark is about: paraphrases embed well, codes do not. Each query
+embedding call waits --embed-latency-ms, as a remote call would.
+
+Usage:
+    python -m benchmarks.bench_retrieval_modes [--filler 400] [--embed-latency-ms 80] [--rounds 5]
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import re
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks._common import _WORDS, print_table
+from backend.app.core.config import settings
+from backend.app.db import crud, models
+from backend.app.db.session import Base
+from backend.app.services import query_processor
+from backend.app.utils.metrics import metrics
+from document_processing.preprocessing.cleaner import clean_text
+
+DIM = 256
+TOP_K = 5
+CODE_WEIGHT = 0.15
+
+# (code or acronym, full name, paraphrase)
+PROCEDURES = [
+    ("PTCA", "coronary angioplasty", "heart artery balloon treatment"),
+    ("H25.1", "senile cataract", "clouded eye lens"),
+    ("E11.9", "type 2 diabetes mellitus", "high blood sugar disorder"),
+    ("K80.2", "gallbladder calculus", "gall stone"),
+    ("I21.4", "myocardial infarction", "cardiac arrest episode"),
+    ("TKR", "total knee arthroplasty", "complete knee joint replacement"),
+    ("LSCS", "caesarean section", "surgical childbirth"),
+    ("ESWL", "renal lithotripsy", "kidney calculi shock wave"),
+]
+SYNONYMS = {
+    "heart": "coronary", "artery": "coronary", "balloon": "angioplasty", "treatment": "angioplasty",
+    "clouded": "cataract", "eye": "cataract", "lens": "senile",
+    "blood": "diabetes", "sugar": "mellitus", "high": "diabetes", "disorder": "type",
+    "gall": "gallbladder", "stone": "calculus",
+    "cardiac": "myocardial", "arrest": "infarction", "episode": "infarction",
+    "complete": "total", "joint": "arthroplasty", "replacement": "arthroplasty",
+    "surgical": "section", "childbirth": "caesarean",
+    "kidney": "renal", "calculi": "lithotripsy", "shock": "lithotripsy", "wave": "renal",
+}
+GENERAL_VOCABULARY = set(_WORDS) | set(SYNONYMS.values()) | {
+    word for _, name, paraphrase in PROCEDURES for word in f"{name} {paraphrase}".split()
+} | {"procedure", "expenses", "for", "are", "payable", "after", "months", "covered", "up", "to", "the"}
+
+def concept_vector(concept: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.blake2b(concept.encode(), digest_size=8).digest(), "little")
+    return np.random.default_rng(seed).standard_normal(DIM)
+
+def embed(text: str) -> np.ndarray:
+    vector = np.zeros(DIM)
+    for word in re.findall(r"[a-z0-9.]+", text.lower()):
+        weight = 1.0 if word in GENERAL_VOCABULARY else CODE_WEIGHT
+        vector += weight * concept_vector(SYNONYMS.get(word, word))
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+def make_clauses(filler: int):
+    rng = random.Random(9)
+    clauses, relevant = [], {}
+    for code, name, _ in PROCEDURES:
+        relevant[code] = [len(clauses), len(clauses) + 1]
+        clauses.append(f"Expenses for {code} ({name}) are payable after a waiting period of {rng.randint(12, 48)} months.")
+        clauses.append(f"{name.capitalize()} ({code}) is covered up to the sub-limit in the schedule of benefits.")
+    for i in range(filler):
+        clauses.append(" ".join(rng.choices(_WORDS, k=rng.randint(12, 30))).capitalize() + ".")
+    order = list(range(len(clauses)))
+    rng.shuffle(order)
+    position = {old: new for new, old in enumerate(order)}
+    return [clauses[i] for i in order], {code: [position[i] for i in rows] for code, rows in relevant.items()}
+
+def make_queries():
+    return [
+        (kind, code, {"procedure": text, "policy_duration_months": 6})
+        for code, name, paraphrase in PROCEDURES
+        for kind, text in (("code", code), ("name", name), ("paraphrase", paraphrase))
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filler", type=int, default=400, help="unrelated clauses in the document")
+    parser.add_argument("--embed-latency-ms", type=float, default=80.0)
+    parser.add_argument("--rounds", type=int, default=5, help="passes over the query set per mode")
+    args = parser.parse_args()
+
+    async def fake_embeddings(texts):
+        await asyncio.sleep(args.embed_latency_ms / 1000)
+        return [embed(text).tolist() for text in ([texts] if isinstance(texts, str) else texts)]
+
+    query_processor.aget_embeddings = fake_embeddings
+    texts, relevant_rows = make_clauses(args.filler)
+    queries = make_queries()
+    modes = {
+        "vector": ("vector", 0.0),
+        "hybrid (rrf)": ("hybrid", 0.0),
+        "hybrid + lexical shortcut": ("hybrid", settings.LEXICAL_SHORTCUT_STRENGTH),
+        "lexical": ("lexical", 0.0),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.LEXICAL_INDEX_DIR = os.path.join(tmp, "lexical")
+        settings.RETRIEVAL_TOP_K = TOP_K
+        settings.QUERY_CACHE_ENABLED = False  # every round retrieves
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        document = crud.create_document(db, filename="policy.pdf", file_type="pdf", file_size=0)
+        # Stored and embedded as ingestion does: cleaned (lowercase, punctuation dropped)
+        ids = crud.create_clauses_bulk(db, document.id, [
+            {"clause_text": text, "section": "Coverage", "page_number": 1, "embeddings": embed(text)}
+            for text in map(clean_text, texts)
+        ])
+        db.commit()
+        relevant = {code: {ids[row] for row in rows} for code, rows in relevant_rows.items()}
+
+        rows = []
+        for name, (mode, shortcut) in modes.items():
+            settings.RETRIEVAL_MODE = mode
+            settings.LEXICAL_SHORTCUT_STRENGTH = shortcut
+            before = metrics.snapshot()["counters"].get("retrieval_lexical_only", 0)
+            recalls = {"code": [], "name": [], "paraphrase": []}
+            latencies = []
+            for _ in range(args.rounds):
+                for kind, code, analysis in queries:
+                    start = time.perf_counter()
+                    clauses = asyncio.run(query_processor.retrieve_relevant_clauses(db, document.id, analysis))
+                    latencies.append(time.perf_counter() - start)
+                    found = {clause["id"] for clause in clauses}
+                    recalls[kind].append(len(found & relevant[code]) / min(len(relevant[code]), TOP_K))
+            skipped = metrics.snapshot()["counters"].get("retrieval_lexical_only", 0) - before
+            latencies.sort()
+            rows.append({
+                "mode": name,
+                "p50_ms": statistics.median(latencies) * 1000,
+                "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+                "recall@5": statistics.mean(value for values in recalls.values() for value in values),
+                "code": statistics.mean(recalls["code"]),
+                "name": statistics.mean(recalls["name"]),
+                "paraphrase": statistics.mean(recalls["paraphrase"]),
+                "no_embed_%": 100.0 * skipped / len(latencies),
+            })
+        db.close()
+
+    print(f"{len(texts)} clauses, {len(queries)} queries x {args.rounds} rounds, "
+          f"{args.embed_latency_ms:.0f} ms per embedding call; recall@5 per query kind")
+    print_table(rows, ["mode", "p50_ms", "p95_ms", "recall@5", "code", "name", "paraphrase", "no_embed_%"])
+
+if __name__ == "__main__":
+    main()
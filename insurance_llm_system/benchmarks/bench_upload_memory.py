@@ -0,0 +1,107 @@
+"""Peak memory for N concurrent large uploads: in-memory read vs spooling to disk.
+
+Modes:
+    in-memory   await file.read() into bytes wrapped in a BytesIO, then hash
+                and measure it (how uploads were handled before spooling)
+    spooled     document_service.spool_upload: fixed-size blocks streamed to
+                the spool directory, hashed, sized and sniffed in one pass
+
+Uploads are Starlette UploadFile objects over an on-disk file, which is how
+they reach the endpoint once the multipart body is parsed. Each (mode, N)
+runs in a forked child so its peak RSS is reported on its own.
+
+Usage:
+    python -m benchmarks.bench_upload_memory [--size-mb 50] [--concurrency 1 4 8]
+"""
+import argparse
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from io import BytesIO
+
+from benchmarks._common import print_table
+from backend.app.core.config import settings
+from backend.app.services import document_service
+from starlette.datastructures import UploadFile
+
+def write_upload(path: str, size_mb: int) -> None:
+    """A PDF-headed file of incompressible-looking bytes"""
+    block = hashlib.sha256(b"policy").digest() * (1024 * 1024 // 32)
+    with open(path, "wb") as out:
+        out.write(b"%PDF-1.4\n")
+        for _ in range(size_mb):
+            out.write(block)
+
+async def handle_in_memory(upload: UploadFile):
+    content = await upload.read()
+    stream = BytesIO(content)
+    digest = hashlib.sha256(stream.getbuffer()).hexdigest()
+    # Yield so every concurrent upload is held in memory at the same time
+    await asyncio.sleep(0.05)
+    return len(content), digest
+
+async def handle_spooled(upload: UploadFile):
+    file_path, size, digest = await document_service.spool_upload(upload, "pdf")
+    await asyncio.sleep(0.05)
+    os.remove(file_path)
+    return size, digest
+
+MODES = {"in-memory": handle_in_memory, "spooled": handle_spooled}
+
+async def run(mode: str, source: str, concurrency: int):
+    handles = [open(source, "rb") for _ in range(concurrency)]
+    try:
+        uploads = [UploadFile(file=handle, filename="policy.pdf") for handle in handles]
+        return await asyncio.gather(*(MODES[mode](upload) for upload in uploads))
+    finally:
+        for handle in handles:
+            handle.close()
+
+def _child(mode, source, concurrency, spool_dir, results):
+    settings.INGESTION_SPOOL_DIR = spool_dir
+    settings.MAX_DOCUMENT_SIZE_MB = 1024
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    outputs = asyncio.run(run(mode, source, concurrency))
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    assert len({digest for _, digest in outputs}) == 1
+    results.put({
+        "mode": mode,
+        "uploads": concurrency,
+        "seconds": elapsed,
+        "mb_per_s": sum(size for size, _ in outputs) / 1e6 / elapsed if elapsed else 0.0,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": rss_after / 1024,
+        "rss_growth_mb": (rss_after - rss_before) / 1024,
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("fork")
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "upload.pdf")
+        write_upload(source, args.size_mb)
+        spool_dir = os.path.join(tmp, "spool")
+        for concurrency in args.concurrency:
+            for mode in MODES:
+                results = ctx.Queue()
+                child = ctx.Process(target=_child, args=(mode, source, concurrency, spool_dir, results))
+                child.start()
+                rows.append(results.get())
+                child.join()
+
+    print(f"{args.size_mb} MB per upload")
+    print_table(rows, ["mode", "uploads", "seconds", "mb_per_s", "peak_rss_mb", "rss_growth_mb"])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Top-k clause search latency: local NumPy index vs ChromaDB.
+
+One document with N clause vectors (random, 1536-d like ada-002) is loaded
+into each backend, then the same queries are timed through
+search_clauses(query, document_id, top_k). The local index is reloaded from
+its memory-mapped files before timing, as it would be after a restart.
+ChromaDB is skipped when the chromadb package is not installed.
+
+Usage:
+    python -m benchmarks.bench_vector_search [--clauses 1000 10000 100000] [--queries 200]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks._common import print_table
+from backend.app.core.config import settings
+from document_processing.vector_db.local_integration import LocalVectorManager
+
+DOCUMENT_ID = "1"
+UPSERT_BATCH = 1000
+
+def make_clauses(vectors: np.ndarray):
+    return [
+        {
+            "id": i,
+            "document_id": DOCUMENT_ID,
+            "text": f"Clause {i}: expenses are payable subject to the schedule of benefits.",
+            "section": f"Section_{i // 50}",
+            "page_number": i // 20,
+            "embeddings": vector,
+        }
+        for i, vector in enumerate(vectors)
+    ]
+
+def time_queries(search, queries, top_k: int):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        results = search(query, DOCUMENT_ID, top_k)
+        latencies.append(time.perf_counter() - start)
+        assert len(results) == top_k
+    return latencies
+
+def load(manager, clauses):
+    start = time.perf_counter()
+    for i in range(0, len(clauses), UPSERT_BATCH):
+        manager.upsert_clauses(clauses[i:i + UPSERT_BATCH])
+    return time.perf_counter() - start
+
+def bench_local(clauses, queries, top_k):
+    with tempfile.TemporaryDirectory() as tmp:
+        load_seconds = load(LocalVectorManager(tmp), clauses)
+        manager = LocalVectorManager(tmp)
+        return load_seconds, time_queries(manager.search_clauses, queries, top_k)
+
+def bench_chroma(clauses, queries, top_k):
+    from document_processing.vector_db.chroma_integration import ChromaManager
+
+    manager = ChromaManager()
+    manager.client.delete_collection(settings.CHROMA_COLLECTION_NAME)
+    manager.collection = manager.client.get_or_create_collection(
+        name=settings.CHROMA_COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+    )
+    load_seconds = load(manager, clauses)
+    return load_seconds, time_queries(manager.search_clauses, queries, top_k)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clauses", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        import chromadb  # noqa: F401
+        backends = {"local": bench_local, "chroma": bench_chroma}
+    except ImportError:
+        print("chromadb is not installed; timing the local index only")
+        backends = {"local": bench_local}
+
+    rng = np.random.default_rng(7)
+    queries = list(rng.standard_normal((args.queries, args.dim), dtype=np.float32))
+    rows = []
+    for count in args.clauses:
+        clauses = make_clauses(rng.standard_normal((count, args.dim), dtype=np.float32))
+        for name, bench in backends.items():
+            load_seconds, latencies = bench(clauses, queries, args.top_k)
+            latencies.sort()
+            rows.append({
+                "backend": name,
+                "clauses": count,
+                "load_s": load_seconds,
+                "p50_ms": statistics.median(latencies) * 1000,
+                "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+                "qps": len(latencies) / sum(latencies),
+            })
+        del clauses
+
+    print(f"{args.dim}-d vectors, top_k={args.top_k}, {args.queries} queries per size")
+    print_table(rows, ["backend", "clauses", "load_s", "p50_ms", "p95_ms", "qps"])
+
+if __name__ == "__main__":
+    main()
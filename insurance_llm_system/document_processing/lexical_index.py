@@ -0,0 +1,226 @@
+import logging
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from backend.app.core.config import settings
+from document_processing.preprocessing.cleaner import SPECIAL_CHARS
+
+logger = logging.getLogger(__name__)
+
+# Keeps hyphenated words such as "co-payment" as single terms
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and any are as at be been by for from has have if in into is it its no not of on or "
+    "shall such that the their this to under was were which will with".split()
+)
+BM25_K1 = 1.2
+BM25_B = 0.75
+PHRASE_WEIGHT = 0.5  # share of a pair's idf added when two query terms appear adjacent
+MEMORY_DOCUMENTS = 256
+
+def tokenize(text: str) -> List[Tuple[str, int]]:
+    """
+    (term, position) pairs; stopwords are dropped but still occupy a position.
+    Characters clean_text strips from clause text are stripped here too, so
+    a query for "H25.1" finds the stored "h251".
+    """
+    return [
+        (token, position)
+        for position, token in enumerate(TOKEN_PATTERN.findall(SPECIAL_CHARS.sub("", text.lower())))
+        if token not in STOPWORDS
+    ]
+
+class LexicalIndex:
+    """
+    BM25 inverted index over one document's clauses.
+
+    Postings are flat arrays: for the term at vocabulary slot t, entries
+    term_offsets[t]:term_offsets[t + 1] of `rows` and `freqs` give the
+    clause rows containing it and the term frequency in each, and
+    positions[position_offsets[p]:position_offsets[p + 1]] the token
+    positions of posting p. Positions are used to reward query terms that
+    appear next to each other.
+    """
+
+    def __init__(self, clause_ids, lengths, terms, term_offsets, rows, freqs, position_offsets, positions):
+        self.clause_ids = clause_ids
+        self.lengths = lengths
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.rows = rows
+        self.freqs = freqs
+        self.position_offsets = position_offsets
+        self.positions = positions
+        self.vocabulary = {term: slot for slot, term in enumerate(terms.tolist())}
+        self.average_length = float(lengths.mean()) if len(lengths) else 0.0
+
+    @classmethod
+    def build(cls, clauses: Iterable[Tuple[int, str]]) -> "LexicalIndex":
+        """Index (clause_id, text) pairs"""
+        clause_ids, lengths = [], []
+        postings: Dict[str, List[Tuple[int, List[int]]]] = {}
+        for row, (clause_id, text) in enumerate(clauses):
+            clause_ids.append(clause_id)
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            by_term: Dict[str, List[int]] = {}
+            for term, position in tokens:
+                by_term.setdefault(term, []).append(position)
+            for term, term_positions in by_term.items():
+                postings.setdefault(term, []).append((row, term_positions))
+
+        terms = sorted(postings)
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        rows, freqs, position_counts, positions = [], [], [], []
+        for slot, term in enumerate(terms):
+            for row, term_positions in postings[term]:
+                rows.append(row)
+                freqs.append(min(len(term_positions), np.iinfo(np.uint16).max))
+                position_counts.append(len(term_positions))
+                positions.extend(term_positions)
+            term_offsets[slot + 1] = len(rows)
+        position_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(position_counts, out=position_offsets[1:])
+        return cls(
+            np.asarray(clause_ids, dtype=np.int64),
+            np.asarray(lengths, dtype=np.int32),
+            np.asarray(terms, dtype=str),
+            term_offsets,
+            np.asarray(rows, dtype=np.int32),
+            np.asarray(freqs, dtype=np.uint16),
+            position_offsets,
+            np.asarray(positions, dtype=np.uint32)
+        )
+
+    def save(self, path: str):
+        with open(path + ".tmp", "wb") as f:
+            np.savez(
+                f, clause_ids=self.clause_ids, lengths=self.lengths, terms=self.terms,
+                term_offsets=self.term_offsets, rows=self.rows, freqs=self.freqs,
+                position_offsets=self.position_offsets, positions=self.positions
+            )
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        with np.load(path) as data:
+            return cls(
+                data["clause_ids"], data["lengths"], data["terms"], data["term_offsets"],
+                data["rows"], data["freqs"], data["position_offsets"], data["positions"]
+            )
+
+    def _idf(self, document_frequency: int) -> float:
+        count = len(self.clause_ids)
+        return math.log(1.0 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def _adjacent_rows(self, first: int, second: int) -> np.ndarray:
+        """Rows where a position of term `second` directly follows one of term `first`"""
+        a_start, a_end = self.term_offsets[first], self.term_offsets[first + 1]
+        b_start, b_end = self.term_offsets[second], self.term_offsets[second + 1]
+        shared, a_index, b_index = np.intersect1d(
+            self.rows[a_start:a_end], self.rows[b_start:b_end], assume_unique=True, return_indices=True
+        )
+        adjacent = []
+        for row, a, b in zip(shared, a_index + a_start, b_index + b_start):
+            after = self.positions[self.position_offsets[a]:self.position_offsets[a + 1]].astype(np.int64) + 1
+            if np.isin(after, self.positions[self.position_offsets[b]:self.position_offsets[b + 1]]).any():
+                adjacent.append(row)
+        return np.asarray(adjacent, dtype=np.int64)
+
+    def search(self, query: str, top_k: int) -> Tuple[List[Tuple[int, float]], float]:
+        """
+        Top-k (clause_id, BM25 score), best first, and the match strength:
+        the best score as a fraction of the most any clause could score,
+        counting query terms absent from the document as unmatched.
+        """
+        query_terms = list(dict.fromkeys(term for term, _ in tokenize(query)))
+        count = len(self.clause_ids)
+        if not query_terms or count == 0:
+            return [], 0.0
+
+        scores = np.zeros(count, dtype=np.float64)
+        attainable = 0.0
+        slots, idfs = [], []
+        for term in query_terms:
+            slot = self.vocabulary.get(term)
+            if slot is None:
+                attainable += self._idf(0) * (BM25_K1 + 1)
+                slots.append(None)
+                idfs.append(0.0)
+                continue
+            start, end = self.term_offsets[slot], self.term_offsets[slot + 1]
+            rows = self.rows[start:end]
+            tf = self.freqs[start:end].astype(np.float64)
+            idf = self._idf(end - start)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[rows] / self.average_length)
+            scores[rows] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+            attainable += idf * (BM25_K1 + 1)
+            slots.append(slot)
+            idfs.append(idf)
+
+        for i in range(len(query_terms) - 1):
+            if slots[i] is not None and slots[i + 1] is not None:
+                bonus = PHRASE_WEIGHT * (idfs[i] + idfs[i + 1]) / 2
+                scores[self._adjacent_rows(slots[i], slots[i + 1])] += bonus
+                attainable += bonus
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(scores[matched], len(matched) - top_k)[len(matched) - top_k:]]
+        matched = matched[np.argsort(scores[matched])[::-1]]
+        results = [(int(self.clause_ids[row]), float(scores[row])) for row in matched]
+        strength = results[0][1] / attainable if results else 0.0
+        return results, strength
+
+# Process-wide LRU of loaded per-document indexes
+_indexes: "OrderedDict[int, LexicalIndex]" = OrderedDict()
+_lock = threading.Lock()
+
+def _index_path(document_id: int) -> str:
+    return os.path.join(settings.LEXICAL_INDEX_DIR, f"{document_id}.npz")
+
+def _remember(document_id: int, index: LexicalIndex):
+    with _lock:
+        _indexes[document_id] = index
+        _indexes.move_to_end(document_id)
+        while len(_indexes) > MEMORY_DOCUMENTS:
+            _indexes.popitem(last=False)
+
+def build_document_index(document_id: int, clauses: Iterable[Tuple[int, str]]) -> LexicalIndex:
+    """(Re)build and store a document's index from its (clause_id, text) pairs"""
+    index = LexicalIndex.build(clauses)
+    os.makedirs(settings.LEXICAL_INDEX_DIR, exist_ok=True)
+    index.save(_index_path(document_id))
+    _remember(document_id, index)
+    return index
+
+def get_document_index(document_id: int, load_clauses: Callable[[], Iterable[Tuple[int, str]]]) -> LexicalIndex:
+    """
+    A document's index from memory or disk; documents ingested before
+    lexical indexing are indexed from `load_clauses` on first use
+    """
+    with _lock:
+        index = _indexes.get(document_id)
+        if index is not None:
+            _indexes.move_to_end(document_id)
+            return index
+    try:
+        index = LexicalIndex.load(_index_path(document_id))
+    except FileNotFoundError:
+        logger.info(f"Building missing lexical index for document {document_id}")
+        return build_document_index(document_id, load_clauses())
+    _remember(document_id, index)
+    return index
+
+def drop_document_index(document_id: int):
+    """Forget a document's index in memory and on disk"""
+    with _lock:
+        _indexes.pop(document_id, None)
+    try:
+        os.remove(_index_path(document_id))
+    except FileNotFoundError:
+        pass
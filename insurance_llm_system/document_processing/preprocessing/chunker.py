@@ -1,36 +1,198 @@
 import logging
-from typing import List
+import re
+from functools import lru_cache
+from typing import List, Optional
 from backend.app.core.config import settings
+from ml_models.embedding_models.batching import estimate_tokens
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to the character-based estimate
+    tiktoken = None
 
 logger = logging.getLogger(__name__)
 
+# Split points are sentence ends and line breaks. The search only stops at
+# punctuation or newlines; each match is then graded in _units: a numbered
+# sub-clause ("4.2 ", "(iii) ", "b) ") or a blank line starts a
+# self-contained unit, a sentence end is a good split and a bare line break
+# (PDF line wrap) is a weak one.
+BOUNDARY_PATTERN = re.compile(r'[.;!?](?<=[^\s\d].)\s+|\n\s*')
+CLAUSE_START = re.compile(r'(?:\(?\d+(?:\.\d+)*[.)]?|\([a-z]{1,4}\)|[a-z][.)])[^\S\n]')
+BOUNDARY_STRENGTH = {"clause": 3, "paragraph": 3, "sentence": 2, "line": 1}
+WORD_STRENGTH = 0
+# Splits at or above this strength start the next chunk without overlap
+STRONG_BOUNDARY = 3
+WHITESPACE = re.compile(r'\s')
+
+@lru_cache(maxsize=None)
+def _get_encoding(name: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"Tokenizer {name} unavailable, estimating tokens instead: {str(e)}")
+        return None
+
+def count_tokens(text: str, encoding_name: Optional[str] = None) -> int:
+    """Token count under the embedding model's tokenizer (estimated without tiktoken)"""
+    encoding = _get_encoding(encoding_name or settings.CHUNK_TOKENIZER)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode_ordinary(text))
+
+class ChunkSpan:
+    """A chunk as [start, end) offsets into its source text"""
+    __slots__ = ("start", "end", "token_count", "section", "page")
+
+    def __init__(self, start: int, end: int, token_count: int, section: Optional[str] = None, page: Optional[int] = None):
+        self.start = start
+        self.end = end
+        self.token_count = token_count
+        self.section = section
+        self.page = page
+
+    def text(self, source: str) -> str:
+        return source[self.start:self.end]
+
+    def __repr__(self) -> str:
+        return (f"ChunkSpan(start={self.start}, end={self.end}, token_count={self.token_count}, "
+                f"section={self.section!r}, page={self.page})")
+
 class TextChunker:
-    def __init__(self):
-        self.chunk_size = settings.CHUNK_SIZE
-        self.chunk_overlap = settings.CHUNK_OVERLAP
+    def __init__(self, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None):
+        self.max_tokens = max_tokens or settings.CHUNK_MAX_TOKENS
+        self.overlap_tokens = settings.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        # A chunk may close early at a stronger boundary once it is this full
+        self.min_tokens = self.max_tokens // 2
+        # Size of the word-level pieces an oversized sentence is cut into
+        self.piece_tokens = max(1, self.overlap_tokens or self.max_tokens // 4)
 
-    def chunk_text(self, text: str) -> List[str]:
-        """Split text into overlapping chunks"""
+    def chunk_spans(
+        self,
+        text: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        section: Optional[str] = None,
+        page: Optional[int] = None
+    ) -> List[ChunkSpan]:
+        """
+        Split text[start:end] into chunks of at most max_tokens, cutting at the
+        strongest nearby clause or sentence boundary.
+        Overlap adapts to the cut: none after a clause or paragraph break, up to
+        overlap_tokens of whole sentences (or words) otherwise.
+        """
         try:
-            if len(text) <= self.chunk_size:
-                return [text]
-            
-            chunks = []
-            start = 0
-            while start < len(text):
-                end = min(start + self.chunk_size, len(text))
-                chunk = text[start:end]
-                chunks.append(chunk)
-                start = end - self.chunk_overlap
-                
-                # Prevent infinite loop with small overlap
-                if start <= 0:
-                    start = end
-                    
-            return chunks
+            end = len(text) if end is None else end
+            units = self._units(text, start, end)
+            return [
+                ChunkSpan(units[first][0], units[last - 1][1], tokens, section, page)
+                for first, last, tokens in self._pack(units)
+            ]
         except Exception as e:
             logger.error(f"Text chunking failed: {str(e)}")
             raise
 
+    def chunk_text(self, text: str) -> List[str]:
+        """Split text into chunks, returned as strings"""
+        return [span.text(text) for span in self.chunk_spans(text)]
+
+    def _units(self, text: str, start: int, end: int) -> List[List[int]]:
+        """Split the range into [start, end, tokens, boundary_strength] units"""
+        units = []
+        position = start
+        for match in BOUNDARY_PATTERN.finditer(text, start, end):
+            unit_end = match.start()
+            if text[unit_end] == '\n':
+                kind = "line"
+            else:
+                unit_end += 1  # keep the sentence's punctuation
+                kind = "sentence"
+            breaks = match.group().count('\n')
+            if breaks >= 2:
+                kind = "paragraph"
+            elif breaks and CLAUSE_START.match(text, match.end(), end):
+                kind = "clause"
+            self._add_unit(units, text, position, unit_end, BOUNDARY_STRENGTH[kind])
+            position = match.end()
+        self._add_unit(units, text, position, end, STRONG_BOUNDARY)
+        return units
+
+    def _add_unit(self, units: List[List[int]], text: str, start: int, end: int, strength: int):
+        piece = text[start:end]
+        stripped = piece.strip()
+        if not stripped:
+            if units:
+                units[-1][3] = max(units[-1][3], strength)
+            return
+        if len(stripped) != len(piece):
+            start += len(piece) - len(piece.lstrip())
+            end = start + len(stripped)
+            piece = stripped
+        tokens = count_tokens(piece)
+        if tokens <= self.max_tokens:
+            units.append([start, end, tokens, strength])
+            return
+
+        # Oversized unit: cut at whitespace into roughly equal word pieces
+        pieces = -(-tokens // self.piece_tokens)
+        step = (end - start) / pieces
+        piece_start = start
+        for i in range(1, pieces):
+            match = WHITESPACE.search(text, max(int(start + step * i), piece_start + 1), end)
+            if match is None:
+                break
+            piece = text[piece_start:match.start()]
+            if piece.strip():
+                units.append([piece_start, match.start(), count_tokens(piece), WORD_STRENGTH])
+            piece_start = match.end()
+        units.append([piece_start, end, count_tokens(text[piece_start:end]), strength])
+
+    def _pack(self, units: List[List[int]]):
+        """Yield (first_unit, end_unit, tokens) for each chunk"""
+        first, fresh = 0, 0
+        while fresh < len(units):
+            # Overlap carried from the previous chunk, plus at least one new unit
+            tokens = sum(unit[2] for unit in units[first:fresh])
+            cut = fresh
+            while cut < len(units) and (cut == fresh or tokens + units[cut][2] <= self.max_tokens):
+                tokens += units[cut][2]
+                cut += 1
+
+            if cut < len(units):
+                # Prefer the strongest (then latest) boundary once past min_tokens
+                best, best_strength, running = cut, -1, 0
+                for k in range(first, cut):
+                    running += units[k][2]
+                    if k >= fresh and (running >= self.min_tokens or k == cut - 1):
+                        if units[k][3] >= best_strength:
+                            best, best_strength = k + 1, units[k][3]
+                cut = best
+                tokens = sum(unit[2] for unit in units[first:cut])
+            yield first, cut, tokens
+
+            if cut >= len(units):
+                break
+            overlap_start = cut
+            if units[cut - 1][3] < STRONG_BOUNDARY:
+                carried = 0
+                while overlap_start - 1 > first and carried + units[overlap_start - 1][2] <= self.overlap_tokens:
+                    overlap_start -= 1
+                    carried += units[overlap_start][2]
+            first, fresh = overlap_start, cut
+
+# Singleton instance
+text_chunker = TextChunker()
+
+def chunk_spans(
+    text: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    section: Optional[str] = None,
+    page: Optional[int] = None
+) -> List[ChunkSpan]:
+    return text_chunker.chunk_spans(text, start, end, section, page)
+
 def chunk_text(text: str) -> List[str]:
-    return TextChunker().chunk_text(text)
\ No newline at end of file
+    return text_chunker.chunk_text(text)
@@ -1,49 +1,60 @@
 import logging
 import re
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 from backend.app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Characters dropped when remove_special_chars is enabled
+SPECIAL_CHARS = re.compile(r'[^\w\s-]+')
+
 class TextCleaner:
-    def __init__(self):
-        self.replace_patterns = [
-            (r'\s+', ' '),  # Multiple whitespace to single
-            (r'-\n', ''),    # Hyphenated line breaks
-            (r'\n', ' '),    # Newlines to space
-            (r'\t', ' '),    # Tabs to space
-            (r'\x0c', ' '),  # Form feed to space
-        ]
-        
-        if settings.CLEANER_CONFIG.get("remove_special_chars", True):
-            self.replace_patterns.append((r'[^\w\s-]', ''))  # Remove special chars
-        
-        self.stop_words = set(settings.CLEANER_CONFIG.get("stop_words", []))
+    def __init__(self, config: Optional[dict] = None):
+        # Read once; settings are fixed for the life of the process
+        config = settings.CLEANER_CONFIG if config is None else config
+        self.remove_special_chars = config.get("remove_special_chars", True)
+        self.lowercase = config.get("lowercase", True)
+        self.remove_stopwords = config.get("remove_stopwords", False)
+        self.stop_words = frozenset(config.get("stop_words", []))
 
     def clean_text(self, text: str) -> Optional[str]:
         """Clean and normalize text"""
         if not text:
             return None
-            
+
         try:
-            # Apply replacement patterns
-            for pattern, repl in self.replace_patterns:
-                text = re.sub(pattern, repl, text)
-            
+            # Collapse every whitespace run (spaces, newlines, tabs, form
+            # feeds) to a single space in one pass
+            text = " ".join(text.split())
+
+            if self.remove_special_chars:
+                text = SPECIAL_CHARS.sub('', text)
+
             # Case normalization
-            if settings.CLEANER_CONFIG.get("lowercase", True):
+            if self.lowercase:
                 text = text.lower()
-            
+
             # Remove stopwords if enabled
-            if settings.CLEANER_CONFIG.get("remove_stopwords", False):
-                words = text.split()
-                words = [w for w in words if w not in self.stop_words]
-                text = " ".join(words)
-            
+            if self.remove_stopwords:
+                text = " ".join(w for w in text.split() if w not in self.stop_words)
+
             return text.strip()
         except Exception as e:
             logger.error(f"Text cleaning failed: {str(e)}")
             raise
 
+    def clean_iter(self, texts: Iterable[str]) -> Iterator[str]:
+        """Clean texts one at a time (e.g. page by page), skipping empty results"""
+        for text in texts:
+            cleaned = self.clean_text(text)
+            if cleaned:
+                yield cleaned
+
+# Singleton instance
+text_cleaner = TextCleaner()
+
 def clean_text(text: str) -> Optional[str]:
-    return TextCleaner().clean_text(text)
\ No newline at end of file
+    return text_cleaner.clean_text(text)
+
+def clean_iter(texts: Iterable[str]) -> Iterator[str]:
+    return text_cleaner.clean_iter(texts)
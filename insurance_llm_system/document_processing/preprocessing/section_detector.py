@@ -1,67 +1,143 @@
 import logging
 import re
-from typing import Dict, List
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from backend.app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# One pass over the text: a header is a line starting with one of these
+# keywords, and the named group that matched is the section type.
+# [^\S\n] keeps matches on a single line.
+HEADER_PATTERN = re.compile(
+    r'^[^\S\n]*(?:'
+    r'(?P<header>abstract|summary|executive[^\S\n]+summary)'
+    r'|(?P<clauses>clauses?|terms[^\S\n]+and[^\S\n]+conditions)'
+    r'|(?P<definitions>definitions?|interpretation)'
+    r'|(?P<exclusions>exclusions?|limitations?)'
+    r'|(?P<footer>notes?|footnotes?|references?)'
+    r')',
+    re.I | re.M
+)
+
+class Section:
+    """
+    A detected section stored as [start, end) character offsets into its
+    source text. The section text is only sliced out when `text` is read.
+    """
+    __slots__ = ("type", "title", "start", "end", "page", "source")
+
+    def __init__(self, type: str, title: str, start: int, end: int, source: str, page: Optional[int] = None):
+        self.type = type
+        self.title = title
+        self.start = start
+        self.end = end
+        self.source = source
+        self.page = page
+
+    @property
+    def text(self) -> str:
+        return self.source[self.start:self.end]
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __repr__(self) -> str:
+        return f"Section(type={self.type!r}, title={self.title!r}, start={self.start}, end={self.end}, page={self.page})"
+
+def page_offsets(pages: Sequence[str], separator: str = "\n") -> List[int]:
+    """Start offset of each page in separator.join(pages)"""
+    offsets = []
+    position = 0
+    for page in pages:
+        offsets.append(position)
+        position += len(page) + len(separator)
+    return offsets
+
 class SectionDetector:
     def __init__(self):
-        self.section_patterns = {
-            "header": re.compile(r'^\s*(?:abstract|summary|executive\s+summary)', re.I),
-            "clauses": re.compile(r'^\s*(?:clauses?|terms\s+and\s+conditions)', re.I),
-            "definitions": re.compile(r'^\s*(?:definitions?|interpretation)', re.I),
-            "exclusions": re.compile(r'^\s*(?:exclusions?|limitations?)', re.I),
-            "footer": re.compile(r'^\s*(?:notes?|footnotes?|references?)', re.I)
-        }
-        
-    def detect_sections(self, text: str) -> Dict[str, List[Dict]]:
-        """Identify document sections and their boundaries"""
+        self.header_pattern = HEADER_PATTERN
+
+    def find_sections(self, text: str, offsets: Optional[Sequence[int]] = None) -> List[Section]:
+        """
+        Locate sections in raw (uncleaned) text.
+        A section runs from its header line up to the line before the next
+        header. With page start offsets, each section records the page its
+        header is on.
+        """
         try:
-            lines = text.split('\n')
             sections = []
-            current_section = None
-            
-            for i, line in enumerate(lines):
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Check for section headers
-                for section_type, pattern in self.section_patterns.items():
-                    if pattern.match(line):
-                        if current_section:
-                            current_section["end_line"] = i - 1
-                            sections.append(current_section)
-                        
-                        current_section = {
-                            "type": section_type,
-                            "title": line,
-                            "start_line": i,
-                            "end_line": len(lines) - 1
-                        }
-                        break
-                
-            if current_section:
-                sections.append(current_section)
-            
-            # Extract section texts
-            result = {}
-            for section in sections:
-                section_text = "\n".join(
-                    lines[section["start_line"]:section["end_line"] + 1]
-                )
-                if section["type"] not in result:
-                    result[section["type"]] = []
-                result[section["type"]].append({
-                    "title": section["title"],
-                    "text": section_text
-                })
-            
-            return result
+            for match in self.header_pattern.finditer(text):
+                line_start = match.start()
+                line_end = text.find('\n', line_start)
+                if line_end == -1:
+                    line_end = len(text)
+
+                if sections:
+                    # Previous section ends before the newline preceding this header
+                    sections[-1].end = line_start - 1
+
+                sections.append(Section(
+                    type=match.lastgroup,
+                    title=text[line_start:line_end].strip(),
+                    start=line_start,
+                    end=len(text),
+                    source=text,
+                    page=bisect_right(offsets, line_start) if offsets else None
+                ))
+            return sections
         except Exception as e:
             logger.error(f"Section detection failed: {str(e)}")
             raise
 
-def detect_sections(text: str) -> Dict[str, List[Dict]]:
-    return SectionDetector().detect_sections(text)
\ No newline at end of file
+    def detect_sections(self, text: str, offsets: Optional[Sequence[int]] = None) -> Dict[str, List[Dict]]:
+        """Identify document sections and their boundaries"""
+        result = {}
+        for section in self.find_sections(text, offsets):
+            result.setdefault(section.type, []).append({
+                "title": section.title,
+                "text": section.text,
+                "start": section.start,
+                "end": section.end,
+                "page": section.page
+            })
+        return result
+
+    def iter_sections(self, texts: Iterable[str]) -> Iterator[Tuple[int, Section]]:
+        """
+        Incremental variant of find_sections.
+        Consumes raw text units (pages, paragraphs) and yields
+        (section_number, section) where each section covers the part of one
+        unit belonging to that section; offsets are relative to the unit and
+        `page` is the 1-based unit number. A section spanning several units
+        is yielded once per unit under the same section number.
+        """
+        try:
+            section_number = 0
+            current = None
+            for page, text in enumerate(texts, start=1):
+                found = self.find_sections(text)
+                continuation_end = found[0].start - 1 if found else len(text)
+                if current is not None and continuation_end > 0:
+                    yield section_number, Section(current.type, current.title, 0, continuation_end, text, page)
+
+                for section in found:
+                    section_number += 1
+                    section.page = page
+                    current = section
+                    yield section_number, section
+        except Exception as e:
+            logger.error(f"Section detection failed: {str(e)}")
+            raise
+
+# Singleton instance
+section_detector = SectionDetector()
+
+def find_sections(text: str, offsets: Optional[Sequence[int]] = None) -> List[Section]:
+    return section_detector.find_sections(text, offsets)
+
+def detect_sections(text: str, offsets: Optional[Sequence[int]] = None) -> Dict[str, List[Dict]]:
+    return section_detector.detect_sections(text, offsets)
+
+def iter_sections(texts: Iterable[str]) -> Iterator[Tuple[int, Section]]:
+    return section_detector.iter_sections(texts)
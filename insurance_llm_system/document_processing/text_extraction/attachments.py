@@ -0,0 +1,37 @@
+"""
+Attachment text extraction run inside worker processes.
+
+Kept free of application imports so that spawned workers only load the
+parsing libraries, not the whole service.
+"""
+import os
+from io import BytesIO
+from typing import Optional
+import pdfplumber
+from .docx_xml import iter_document_lines
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+def attachment_type(filename: Optional[str], content_type: str) -> Optional[str]:
+    """File type of a supported attachment ("pdf" or "docx"), else None"""
+    ext = os.path.splitext(filename or "")[1][1:].lower()
+    if ext in ("pdf", "docx"):
+        return ext
+    if content_type == "application/pdf":
+        return "pdf"
+    if content_type == DOCX_CONTENT_TYPE:
+        return "docx"
+    return None
+
+def extract_attachment(data: bytes, file_type: str) -> str:
+    """Extract the text of one decoded attachment"""
+    if file_type == "pdf":
+        with pdfplumber.open(BytesIO(data)) as pdf:
+            pages = []
+            for page in pdf.pages:
+                pages.append(page.extract_text() or "")
+                page.flush_cache()
+            return "\n".join(pages)
+    if file_type == "docx":
+        return "\n".join(iter_document_lines(BytesIO(data)))
+    raise ValueError(f"Unsupported attachment type: {file_type}")
@@ -1,12 +1,19 @@
 import logging
+import zipfile
 from docx import Document
 from io import BytesIO
-from typing import Dict, List
-import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List
 from backend.app.core.config import settings
+from document_processing.preprocessing.section_detector import HEADER_PATTERN
+from .docx_xml import DOCUMENT_XML, iter_document_lines
 
 logger = logging.getLogger(__name__)
 
+# DOCX has no pages. Paragraphs are grouped into units that start at
+# section headers (capped in size), so sections and chunks span paragraphs
+# and an edit only moves unit boundaries within its own section.
+UNIT_MAX_CHARS = 32000
+
 class DocxParser:
     def extract_text(self, file_stream: BytesIO) -> Dict[str, any]:
         """
@@ -73,5 +80,58 @@ class DocxParser:
             logger.error(f"DOCX parsing failed: {str(e)}")
             raise
 
+    def iter_text(self, file_stream: BytesIO) -> Iterator[str]:
+        """
+        Yield the document's paragraphs and table rows, joined into
+        section-led units.
+        Uses the streaming XML reader when possible and falls back to
+        python-docx for files it cannot open.
+        """
+        try:
+            if settings.DOCX_STREAMING and _has_document_xml(file_stream):
+                lines = iter_document_lines(file_stream)
+            else:
+                lines = self._iter_lines(Document(file_stream))
+            yield from _group_lines(lines)
+        except Exception as e:
+            logger.error(f"DOCX parsing failed: {str(e)}")
+            raise
+
+    def _iter_lines(self, doc) -> Iterator[str]:
+        """python-docx fallback: all paragraphs, then all table rows"""
+        for para in doc.paragraphs:
+            if para.text.strip():
+                yield para.text
+        for table in doc.tables:
+            for row in table.rows:
+                yield " | ".join(cell.text for cell in row.cells)
+
+def _has_document_xml(file_stream) -> bool:
+    try:
+        with zipfile.ZipFile(file_stream) as archive:
+            archive.getinfo(DOCUMENT_XML)
+        return True
+    except (zipfile.BadZipFile, KeyError) as e:
+        logger.warning(f"DOCX streaming unavailable, using python-docx: {str(e)}")
+        return False
+    finally:
+        if hasattr(file_stream, "seek"):
+            file_stream.seek(0)
+
+def _group_lines(lines: Iterator[str], max_chars: int = UNIT_MAX_CHARS) -> Iterator[str]:
+    buffer: List[str] = []
+    size = 0
+    for line in lines:
+        if buffer and (size >= max_chars or HEADER_PATTERN.match(line)):
+            yield "\n".join(buffer)
+            buffer, size = [], 0
+        buffer.append(line)
+        size += len(line) + 1
+    if buffer:
+        yield "\n".join(buffer)
+
 def parse_docx(file_stream: BytesIO) -> Dict[str, any]:
-    return DocxParser().extract_text(file_stream)
\ No newline at end of file
+    return DocxParser().extract_text(file_stream)
+
+def iter_docx_text(file_stream: BytesIO) -> Iterator[str]:
+    return DocxParser().iter_text(file_stream)
@@ -0,0 +1,62 @@
+"""
+Streaming reader for a DOCX file's main document part.
+
+Kept free of application imports so it can also run inside spawned
+attachment-extraction workers.
+"""
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Iterator, List
+
+DOCUMENT_XML = "word/document.xml"
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+BODY, PARAGRAPH, TABLE, ROW, CELL = W + "body", W + "p", W + "tbl", W + "tr", W + "tc"
+TEXT, TAB, BREAKS = W + "t", W + "tab", (W + "br", W + "cr")
+
+def _paragraph_text(paragraph) -> str:
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == TEXT:
+            parts.append(node.text or "")
+        elif node.tag == TAB:
+            parts.append("\t")
+        elif node.tag in BREAKS:
+            parts.append("\n")
+    return "".join(parts)
+
+def iter_document_lines(file_stream) -> Iterator[str]:
+    """
+    Stream word/document.xml and yield body paragraphs and table rows in
+    document order. Each row is its cells' text joined with " | ", every
+    cell once (merged cells are not repeated). Finished elements are
+    dropped as parsing goes, so memory stays flat for large documents.
+    """
+    with zipfile.ZipFile(file_stream) as archive, archive.open(DOCUMENT_XML) as xml:
+        path: List[str] = []
+        body = None
+        for event, elem in ET.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                path.append(elem.tag)
+                if elem.tag == BODY:
+                    body = elem
+                continue
+            
+            depth = len(path)
+            path.pop()
+            if body is None or depth < 3:
+                continue
+            if depth == 3:
+                # Direct child of <w:body>
+                if elem.tag == PARAGRAPH:
+                    text = _paragraph_text(elem)
+                    if text.strip():
+                        yield text
+                body.remove(elem)
+            elif depth == 4 and elem.tag == ROW and path[-1] == TABLE:
+                cells = [
+                    "\n".join(_paragraph_text(p) for p in cell.iterfind(PARAGRAPH))
+                    for cell in elem.iterfind(CELL)
+                ]
+                if any(cell.strip() for cell in cells):
+                    yield " | ".join(cells)
+                elem.clear()
@@ -1,17 +1,24 @@
 import logging
 import email
+from concurrent.futures import Future
 from email import policy
 from email.parser import BytesParser
 from io import BytesIO
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from backend.app.core.config import settings
+from .attachments import attachment_type, extract_attachment
+from .pdf_parser import _get_process_pool
 
 logger = logging.getLogger(__name__)
 
 class EmailParser:
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or settings.PDF_PARALLEL_WORKERS
+
     def extract_text(self, file_stream: BytesIO) -> Dict[str, any]:
         """
-        Extract content and metadata from email
+        Extract content and metadata from email, including the text of PDF and
+        DOCX attachments (parsed concurrently on the extraction worker pool)
         Returns:
             {
                 "text": str,
@@ -25,7 +32,7 @@ class EmailParser:
             }
         """
         try:
-            msg = BytesParser(policy=policy.default).parse(file_stream)
+            msg = self._parse(file_stream)
             
             # Extract metadata
             metadata = {
@@ -36,17 +43,12 @@ class EmailParser:
                 "attachments": []
             }
             
-            # Extract text content
-            text_parts = []
-            for part in msg.walk():
-                if part.get_content_type() == "text/plain":
-                    text_parts.append(part.get_content())
-                elif part.get_content_maintype() != "multipart" and part.get_filename():
-                    metadata["attachments"].append({
-                        "filename": part.get_filename(),
-                        "content_type": part.get_content_type(),
-                        "size": len(part.get_payload(decode=True))
-                    })
+            # Extract text content, then attachment text with its provenance
+            text_parts = [part.get_content() for part in msg.walk() if part.get_content_type() == "text/plain"]
+            for attachment, text in self._iter_attachments(msg):
+                metadata["attachments"].append(attachment)
+                if text:
+                    text_parts.append(_with_provenance(attachment, text))
             
             return {
                 "text": "\n".join(text_parts),
@@ -56,5 +58,100 @@ class EmailParser:
             logger.error(f"Email parsing failed: {str(e)}")
             raise
 
+    def iter_text(self, file_stream: BytesIO) -> Iterator[str]:
+        """
+        Yield the plain-text parts of an email (from a stream or file path) one
+        at a time, followed by the text of each supported attachment
+        """
+        try:
+            msg = self._parse(file_stream)
+            for part in msg.walk():
+                if part.get_content_type() == "text/plain":
+                    yield part.get_content()
+            for attachment, text in self._iter_attachments(msg):
+                if text:
+                    yield _with_provenance(attachment, text)
+        except Exception as e:
+            logger.error(f"Email parsing failed: {str(e)}")
+            raise
+
+    def _parse(self, file_stream):
+        if isinstance(file_stream, str):
+            with open(file_stream, "rb") as fp:
+                return BytesParser(policy=policy.default).parse(fp)
+        return BytesParser(policy=policy.default).parse(file_stream)
+
+    def _iter_attachments(self, msg) -> Iterator[Tuple[Dict, Optional[str]]]:
+        """
+        Dispatch every PDF/DOCX attachment to the worker pool at once, then
+        yield (attachment_info, text) in message order. Each payload is
+        decoded once; other attachments are sized from their encoded payload.
+        """
+        pending: List[Tuple[Dict, Optional[Future]]] = []
+        parts = [
+            part for part in msg.walk()
+            if part.get_content_maintype() != "multipart" and part.get_filename()
+        ]
+        supported = sum(1 for part in parts if attachment_type(part.get_filename(), part.get_content_type()))
+        pool = _get_process_pool(self.workers) if self.workers > 1 and supported > 1 else None
+        
+        for index, part in enumerate(parts):
+            info = {
+                "index": index,
+                "filename": part.get_filename(),
+                "content_type": part.get_content_type(),
+                "size": None,
+                "extracted": False
+            }
+            file_type = attachment_type(info["filename"], info["content_type"])
+            future = None
+            if file_type:
+                data = part.get_payload(decode=True) or b""
+                info["size"] = len(data)
+                info["file_type"] = file_type
+                future = pool.submit(extract_attachment, data, file_type) if pool else _run_inline(data, file_type)
+            else:
+                info["size"] = _payload_size(part)
+            pending.append((info, future))
+        
+        for info, future in pending:
+            text = None
+            if future is not None:
+                try:
+                    text = future.result()
+                    info["extracted"] = True
+                    info["characters"] = len(text)
+                except Exception as e:
+                    logger.warning(f"Attachment {info['filename']} could not be parsed: {str(e)}")
+                    info["error"] = str(e)
+            yield info, text
+
+def _run_inline(data: bytes, file_type: str) -> Future:
+    future = Future()
+    try:
+        future.set_result(extract_attachment(data, file_type))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def _payload_size(part) -> int:
+    """Decoded payload size, worked out from the transfer encoding without decoding"""
+    payload = part.get_payload(decode=False)
+    if not isinstance(payload, str):
+        return 0
+    encoding = part.get("Content-Transfer-Encoding", "").strip().lower()
+    if encoding == "base64":
+        encoded = "".join(payload.split())
+        return len(encoded) * 3 // 4 - encoded[-2:].count("=")
+    if encoding == "quoted-printable":
+        return len(part.get_payload(decode=True) or b"")
+    return len(payload.encode("utf-8", "surrogateescape"))
+
+def _with_provenance(attachment: Dict, text: str) -> str:
+    return f"Attachment {attachment['index'] + 1}: {attachment['filename']}\n{text}"
+
 def parse_email(file_stream: BytesIO) -> Dict[str, any]:
-    return EmailParser().extract_text(file_stream)
\ No newline at end of file
+    return EmailParser().extract_text(file_stream)
+
+def iter_email_text(file_stream: BytesIO) -> Iterator[str]:
+    return EmailParser().iter_text(file_stream)
@@ -0,0 +1,16 @@
+"""
+Page-range extraction run inside worker processes.
+
+Kept free of application imports so that spawned workers only load
+pdfplumber, not the whole service.
+"""
+from typing import List, Tuple
+import pdfplumber
+
+def extract_page_range(file_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Extract text for pages [start, end) as (page_num, text) pairs, 1-based"""
+    pages = []
+    with pdfplumber.open(file_path) as pdf:
+        for i in range(start, end):
+            pages.append((i + 1, pdf.pages[i].extract_text() or ""))
+    return pages
@@ -1,18 +1,55 @@
 import logging
+import multiprocessing
+import os
+import tempfile
+import threading
 import pdfplumber
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
-from typing import Dict, Optional
+from typing import Dict, Iterator, Optional, Tuple
 from backend.app.core.config import settings
+from .pdf_pages import extract_page_range
 
 logger = logging.getLogger(__name__)
 
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared worker pool, recreated only if the requested size changes"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # Spawned workers import only pdf_pages, not the application
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = workers
+        return _pool
+
+def shutdown_process_pool():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool, _pool_workers = None, 0
+
 class PDFParser:
-    def __init__(self):
+    def __init__(self, workers: Optional[int] = None):
         self.max_pages = settings.PDF_MAX_PAGES
+        self.workers = workers or settings.PDF_PARALLEL_WORKERS
+        self.pages_per_task = max(1, settings.PDF_PAGES_PER_TASK)
+        self.parallel_min_pages = settings.PDF_PARALLEL_MIN_PAGES
 
     def extract_text(self, file_stream: BytesIO) -> Dict[str, any]:
         """
         Extract text and metadata from PDF file
+        Large documents are split into page ranges extracted by a process pool.
         Returns:
             {
                 "text": str,
@@ -34,23 +71,85 @@ class PDFParser:
                     "title": pdf.metadata.get("Title", ""),
                     "pages": []
                 }
-                
-                full_text = []
-                for i, page in enumerate(pdf.pages[:self.max_pages]):
-                    page_text = page.extract_text()
-                    metadata["pages"].append({
-                        "page_num": i + 1,
-                        "text": page_text
-                    })
-                    full_text.append(page_text)
-                
-                return {
-                    "text": "\n".join(full_text),
-                    "metadata": metadata
-                }
+                pages = list(self._iter_pages(pdf, file_stream))
+
+            metadata["pages"] = [
+                {"page_num": page_num, "text": page_text}
+                for page_num, page_text in pages
+            ]
+            return {
+                "text": "\n".join(page_text for _, page_text in pages),
+                "metadata": metadata
+            }
+        except Exception as e:
+            logger.error(f"PDF parsing failed: {str(e)}")
+            raise
+
+    def iter_pages(self, file_stream) -> Iterator[Tuple[int, str]]:
+        """Yield (page_num, text) in page order without holding the whole document"""
+        try:
+            with pdfplumber.open(file_stream) as pdf:
+                yield from self._iter_pages(pdf, file_stream)
         except Exception as e:
             logger.error(f"PDF parsing failed: {str(e)}")
             raise
 
+    def _iter_pages(self, pdf, file_stream) -> Iterator[Tuple[int, str]]:
+        page_limit = len(pdf.pages)
+        if self.max_pages:
+            page_limit = min(page_limit, self.max_pages)
+
+        if self.workers > 1 and page_limit >= self.parallel_min_pages:
+            yield from self._iter_parallel(file_stream, page_limit)
+            return
+
+        for i, page in enumerate(pdf.pages[:page_limit]):
+            yield i + 1, page.extract_text() or ""
+            page.flush_cache()
+
+    def _iter_parallel(self, file_stream, page_count: int) -> Iterator[Tuple[int, str]]:
+        """
+        Extract page ranges in worker processes and yield them in page order.
+        Only a bounded window of ranges is in flight at once.
+        """
+        file_path, is_temp = _materialize(file_stream)
+        try:
+            pool = _get_process_pool(self.workers)
+            ranges = [
+                (start, min(start + self.pages_per_task, page_count))
+                for start in range(0, page_count, self.pages_per_task)
+            ]
+            window = self.workers * 2
+            pending = deque()
+            for start, end in ranges:
+                pending.append(pool.submit(extract_page_range, file_path, start, end))
+                if len(pending) >= window:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            if is_temp:
+                os.remove(file_path)
+
+def _materialize(file_stream) -> Tuple[str, bool]:
+    """Return a filesystem path for the stream, writing a temp file if needed"""
+    if isinstance(file_stream, str):
+        return file_stream, False
+    name = getattr(file_stream, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name, False
+
+    file_stream.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        while True:
+            block = file_stream.read(1024 * 1024)
+            if not block:
+                break
+            tmp.write(block)
+    return tmp.name, True
+
 def parse_pdf(file_stream: BytesIO) -> Dict[str, any]:
-    return PDFParser().extract_text(file_stream)
\ No newline at end of file
+    return PDFParser().extract_text(file_stream)
+
+def iter_pdf_pages(file_stream) -> Iterator[Tuple[int, str]]:
+    return PDFParser().iter_pages(file_stream)
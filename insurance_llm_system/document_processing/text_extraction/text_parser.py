@@ -0,0 +1,27 @@
+import io
+import logging
+from io import BytesIO
+from typing import Iterator
+from .docx_parser import _group_lines
+
+logger = logging.getLogger(__name__)
+
+def _iter_lines(text_stream) -> Iterator[str]:
+    for line in text_stream:
+        yield line.rstrip("\r\n")
+
+def iter_plain_text(file_stream: BytesIO) -> Iterator[str]:
+    """
+    Yield a plain-text file (a path or a binary stream) as section-led
+    units of lines, as for DOCX: text files have no pages. Bytes that are
+    not UTF-8 are replaced rather than failing the document.
+    """
+    try:
+        if isinstance(file_stream, str):
+            with open(file_stream, encoding="utf-8", errors="replace") as f:
+                yield from _group_lines(_iter_lines(f))
+        else:
+            yield from _group_lines(_iter_lines(io.TextIOWrapper(file_stream, encoding="utf-8", errors="replace")))
+    except Exception as e:
+        logger.error(f"Text parsing failed: {str(e)}")
+        raise
@@ -0,0 +1,297 @@
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PQ_CODES = 256  # codewords per sub-quantizer (one byte per sub-vector)
+
+def kmeans(data: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Lloyd's k-means on float32 rows; empty clusters are re-seeded from random points"""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=len(data) < k)].copy()
+    for _ in range(iterations):
+        assignment = nearest(data, centroids)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, data)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        if empty.any():
+            centroids[empty] = data[rng.choice(len(data), size=int(empty.sum()))]
+    return centroids
+
+def nearest(data: np.ndarray, centroids: np.ndarray, block: int = 8192) -> np.ndarray:
+    """Index of the nearest centroid (L2) for every row, computed in blocks"""
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    assignment = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), block):
+        chunk = data[start:start + block]
+        assignment[start:start + block] = np.argmin(centroid_norms - 2.0 * chunk @ centroids.T, axis=1)
+    return assignment
+
+class _Growable:
+    """Append-only numpy buffer that doubles its capacity"""
+    __slots__ = ("data", "size")
+
+    def __init__(self, dtype, width: Optional[int] = None, capacity: int = 1024):
+        shape = (capacity,) if width is None else (capacity, width)
+        self.data = np.empty(shape, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values: np.ndarray):
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            grown = np.empty((max(needed, 2 * len(self.data)),) + self.data.shape[1:], dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+class IVFPQIndex:
+    """
+    Inverted-file index with product-quantized residuals (IVF-PQ) for
+    unit-length vectors.
+
+    A coarse k-means quantizer splits the space into `nlist` cells; each
+    vector is stored in its cell as `m` one-byte codes of its residual from
+    the cell centroid. A query scans the `nprobe` nearest cells with
+    per-cell distance lookup tables. Rows carry a document id and a clause
+    id; deletes set a tombstone and `compacted` returns a copy without
+    tombstoned rows. Only the codes are held in memory; callers re-rank the
+    candidates with exact vectors.
+    """
+
+    def __init__(self, dim: int, nlist: int, m: int):
+        if dim % m:
+            raise ValueError(f"Vector dimension {dim} is not divisible into {m} sub-quantizers")
+        self.dim = dim
+        self.nlist = nlist
+        self.m = m
+        self.centroids: Optional[np.ndarray] = None
+        self.codebooks: Optional[np.ndarray] = None  # (m, 256, dim / m)
+        self.codes = _Growable(np.uint8, m)
+        self.doc_of = _Growable(np.int32)
+        self.clause_of = _Growable(np.int64)
+        self.alive = _Growable(np.bool_)
+        self.cell_of = _Growable(np.int32)
+        self.lists: List[_Growable] = []
+        self.documents: List[str] = []
+        self.document_codes: Dict[str, int] = {}
+        self.live_rows: Dict[int, int] = {}  # document code -> rows not tombstoned
+        self.tombstones = 0
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def size(self) -> int:
+        return self.alive.size - self.tombstones
+
+    def train(self, sample: np.ndarray, iterations: int = 10, seed: int = 0):
+        """Fit the coarse quantizer and the residual codebooks on a sample of vectors"""
+        sample = np.ascontiguousarray(sample, dtype=np.float32)
+        self.centroids = kmeans(sample, self.nlist, iterations, seed)
+        residuals = sample - self.centroids[nearest(sample, self.centroids)]
+        sub = self.dim // self.m
+        self.codebooks = np.stack([
+            kmeans(np.ascontiguousarray(residuals[:, j * sub:(j + 1) * sub]), PQ_CODES, iterations, seed + j)
+            for j in range(self.m)
+        ])
+        self.lists = [_Growable(np.int64, capacity=64) for _ in range(self.nlist)]
+
+    def _encode(self, residuals: np.ndarray) -> np.ndarray:
+        sub = self.dim // self.m
+        codes = np.empty((len(residuals), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            codes[:, j] = nearest(np.ascontiguousarray(residuals[:, j * sub:(j + 1) * sub]), self.codebooks[j])
+        return codes
+
+    def add(self, vectors: np.ndarray, document_id: str, clause_ids: Sequence[int]):
+        """Append vectors of one document (unit-length rows)"""
+        if not self.trained:
+            raise ValueError("IVF-PQ index must be trained before vectors are added")
+        if len(vectors) == 0:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        code = self.document_codes.get(document_id)
+        if code is None:
+            code = self.document_codes[document_id] = len(self.documents)
+            self.documents.append(document_id)
+
+        cells = nearest(vectors, self.centroids)
+        first_row = self.alive.size
+        self.codes.extend(self._encode(vectors - self.centroids[cells]))
+        self.doc_of.extend(np.full(len(vectors), code, dtype=np.int32))
+        self.clause_of.extend(np.asarray(clause_ids, dtype=np.int64))
+        self.alive.extend(np.ones(len(vectors), dtype=np.bool_))
+        self.cell_of.extend(cells)
+        self.live_rows[code] = self.live_rows.get(code, 0) + len(vectors)
+
+        rows = np.arange(first_row, first_row + len(vectors), dtype=np.int64)
+        order = np.argsort(cells, kind="stable")
+        boundaries = np.flatnonzero(np.diff(cells[order])) + 1
+        for group in np.split(order, boundaries):
+            self.lists[cells[group[0]]].extend(rows[group])
+
+    def remove(self, document_id: str, clause_ids: Optional[Iterable[int]] = None) -> int:
+        """Tombstone a document's rows (all, or only `clause_ids`); returns rows removed"""
+        code = self.document_codes.get(document_id)
+        if code is None:
+            return 0
+        alive = self.alive.view()
+        rows = np.flatnonzero((self.doc_of.view() == code) & alive)
+        if clause_ids is not None:
+            ids = np.fromiter((int(clause_id) for clause_id in clause_ids), dtype=np.int64)
+            rows = rows[np.isin(self.clause_of.view()[rows], ids)]
+        alive[rows] = False
+        self.tombstones += len(rows)
+        self.live_rows[code] -= len(rows)
+        return len(rows)
+
+    def tombstone_ratio(self) -> float:
+        return self.tombstones / self.alive.size if self.alive.size else 0.0
+
+    def compacted(self) -> "IVFPQIndex":
+        """
+        A copy without tombstoned rows, renumbered. This index is left as
+        it was, so searches already reading it are unaffected.
+        """
+        keep = np.flatnonzero(self.alive.view())
+        remap = np.full(self.alive.size, -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+        index = IVFPQIndex(self.dim, self.nlist, self.m)
+        index.centroids, index.codebooks = self.centroids, self.codebooks
+        for name in ("codes", "doc_of", "clause_of", "cell_of"):
+            getattr(index, name).extend(getattr(self, name).view()[keep])
+        index.alive.extend(np.ones(len(keep), dtype=np.bool_))
+        index.lists = [_Growable(np.int64, capacity=64) for _ in range(self.nlist)]
+        for cell, compacted in zip(self.lists, index.lists):
+            rows = remap[cell.view()]
+            compacted.extend(rows[rows >= 0])
+        index.documents = list(self.documents)
+        index.document_codes = dict(self.document_codes)
+        index.live_rows = dict(self.live_rows)
+        return index
+
+    def search(
+        self,
+        query: np.ndarray,
+        candidates: int,
+        nprobe: int,
+        allowed_documents: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, int, float]]:
+        """
+        Approximate nearest rows to a unit-length query as
+        (document_id, clause_id, approximate cosine), best first.
+        With `allowed_documents`, rows of other documents are filtered out
+        before ranking, so the result is not thinned by the filter.
+        """
+        if not self.trained or self.size == 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        # Rows appended after these views were taken (by a concurrent add)
+        # are skipped: their codes may not be visible yet
+        alive, doc_of, codes, clause_of = self.alive.view(), self.doc_of.view(), self.codes.view(), self.clause_of.view()
+        limit = min(len(alive), len(doc_of), len(codes), len(clause_of))
+        allowed_mask = None
+        if allowed_documents is not None:
+            allowed_mask = np.zeros(len(self.documents), dtype=np.bool_)
+            allowed = [self.document_codes[d] for d in allowed_documents if d in self.document_codes]
+            if not allowed:
+                return []
+            allowed_mask[allowed] = True
+
+        coarse = (self.centroids ** 2).sum(axis=1) - 2.0 * self.centroids @ query
+        nprobe = min(nprobe, self.nlist)
+        cells = np.argpartition(coarse, nprobe - 1)[:nprobe]
+
+        sub = self.dim // self.m
+        codebook_norms = (self.codebooks ** 2).sum(axis=2)  # (m, 256)
+        offsets = np.arange(self.m) * PQ_CODES
+        found_rows, found_distances = [], []
+        for cell in cells:
+            rows = self.lists[cell].view()
+            rows = rows[rows < limit]
+            if allowed_mask is not None:
+                rows = rows[allowed_mask[doc_of[rows]]]
+            rows = rows[alive[rows]]
+            if len(rows) == 0:
+                continue
+            residual = (query - self.centroids[cell]).reshape(self.m, sub)
+            # ||r_j - c_jk||^2 for every sub-quantizer j and codeword k
+            table = (residual ** 2).sum(axis=1)[:, None] - 2.0 * np.einsum("jd,jkd->jk", residual, self.codebooks) + codebook_norms
+            distances = table.ravel()[codes[rows].astype(np.intp) + offsets].sum(axis=1)
+            found_rows.append(rows)
+            found_distances.append(distances)
+        if not found_rows:
+            return []
+
+        rows = np.concatenate(found_rows)
+        distances = np.concatenate(found_distances)
+        if len(rows) > candidates:
+            best = np.argpartition(distances, candidates - 1)[:candidates]
+            rows, distances = rows[best], distances[best]
+        order = np.argsort(distances)
+        # For unit vectors ||q - x||^2 = 2 - 2 cos
+        return [
+            (self.documents[doc_of[row]], int(clause_of[row]), float(1.0 - distances[i] / 2.0))
+            for i, row in zip(order, rows[order])
+        ]
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the index arrays (codes, row bookkeeping, lists, quantizers)"""
+        arrays = [self.codes.data, self.doc_of.data, self.clause_of.data, self.alive.data, self.cell_of.data]
+        arrays += [cell.data for cell in self.lists]
+        if self.trained:
+            arrays += [self.centroids, self.codebooks]
+        return sum(array.nbytes for array in arrays)
+
+    def save(self, path: str):
+        """Write the index to a single .npz file (atomically replaced)"""
+        with open(path + ".tmp", "wb") as f:
+            np.savez(
+                f,
+                shape=np.array([self.dim, self.nlist, self.m]),
+                centroids=self.centroids,
+                codebooks=self.codebooks,
+                codes=self.codes.view(),
+                doc_of=self.doc_of.view(),
+                clause_of=self.clause_of.view(),
+                alive=self.alive.view(),
+                cell_of=self.cell_of.view(),
+                documents=np.array(self.documents, dtype=str)
+            )
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFPQIndex":
+        with np.load(path) as data:
+            dim, nlist, m = (int(value) for value in data["shape"])
+            index = cls(dim, nlist, m)
+            index.centroids = data["centroids"]
+            index.codebooks = data["codebooks"]
+            index.lists = [_Growable(np.int64, capacity=64) for _ in range(nlist)]
+            index.codes.extend(data["codes"])
+            index.doc_of.extend(data["doc_of"])
+            index.clause_of.extend(data["clause_of"])
+            index.alive.extend(data["alive"])
+            index.cell_of.extend(data["cell_of"])
+            index.documents = [str(document) for document in data["documents"]]
+        index.document_codes = {document: code for code, document in enumerate(index.documents)}
+        alive = index.alive.view()
+        index.tombstones = int((~alive).sum())
+        live = np.bincount(index.doc_of.view()[alive], minlength=len(index.documents))
+        index.live_rows = {code: int(count) for code, count in enumerate(live)}
+        cells = index.cell_of.view()
+        order = np.argsort(cells, kind="stable")
+        boundaries = np.flatnonzero(np.diff(cells[order])) + 1
+        for group in np.split(order, boundaries):
+            if len(group):
+                index.lists[cells[group[0]]].extend(group.astype(np.int64))
+        return index
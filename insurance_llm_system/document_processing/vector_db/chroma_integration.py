@@ -1,8 +1,9 @@
 import logging
 import chromadb
-from typing import List, Dict
+from typing import List, Dict, Optional
 from backend.app.core.config import settings
 from ml_models.embedding_models.ada_embeddings import get_embeddings
+from ml_models.embedding_models.batching import resolve_embeddings
 
 logger = logging.getLogger(__name__)
 
@@ -14,14 +15,15 @@ class ChromaManager:
         )
 
     def upsert_clauses(self, clauses: List[Dict]) -> bool:
-        """Store clauses in ChromaDB"""
+        """Store clauses in ChromaDB, embedding only clauses without a precomputed vector"""
         try:
             ids = [str(c["id"]) for c in clauses]
-            embeddings = [get_embeddings(c["text"]) for c in clauses]
+            embeddings = resolve_embeddings(clauses, get_embeddings)
             metadatas = [{
                 "document_id": c["document_id"],
                 "text": c["text"],
-                "section": c.get("section", "")
+                "section": c.get("section", ""),
+                "page_number": c.get("page_number", 0)
             } for c in clauses]
             
             self.collection.upsert(
@@ -48,7 +50,8 @@ class ChromaManager:
                     "id": results["ids"][0][i],
                     "score": results["distances"][0][i],
                     "text": results["metadatas"][0][i]["text"],
-                    "section": results["metadatas"][0][i]["section"]
+                    "section": results["metadatas"][0][i]["section"],
+                    "page_number": results["metadatas"][0][i].get("page_number", 0)
                 }
                 for i in range(len(results["ids"][0]))
             ]
@@ -56,6 +59,19 @@ class ChromaManager:
             logger.error(f"ChromaDB search failed: {str(e)}")
             raise
 
+    def delete_clauses(self, document_id: str, clause_ids: Optional[List] = None) -> bool:
+        """Delete all clauses for a specific document, or only the given clause ids"""
+        try:
+            if clause_ids is None:
+                self.collection.delete(where={"document_id": document_id})
+            else:
+                self.collection.delete(ids=[str(clause_id) for clause_id in clause_ids])
+            logger.info(f"Deleted clauses for document: {document_id}")
+            return True
+        except Exception as e:
+            logger.error(f"ChromaDB deletion failed: {str(e)}")
+            raise
+
 def initialize_chroma():
     """Initialize ChromaDB connection"""
     try:
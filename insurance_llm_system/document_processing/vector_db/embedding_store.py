@@ -1,25 +1,51 @@
 import logging
 from typing import List, Dict, Optional
 from backend.app.core.config import settings
-from .pinecone_integration import initialize_pinecone
-from .chroma_integration import initialize_chroma
 
 logger = logging.getLogger(__name__)
 
-class EmbeddingStore:
-    def __init__(self):
-        self.db = None
+_vector_store = None
+
+def get_vector_store():
+    """
+    The configured vector backend (VECTOR_DB), created on first use.
+    Backends are imported lazily so only the selected one's client library
+    needs to be installed.
+    """
+    global _vector_store
+    if _vector_store is None:
         if settings.VECTOR_DB == "pinecone":
-            self.db = initialize_pinecone()
+            from .pinecone_integration import initialize_pinecone
+            _vector_store = initialize_pinecone()
         elif settings.VECTOR_DB == "chroma":
-            self.db = initialize_chroma()
+            from .chroma_integration import initialize_chroma
+            _vector_store = initialize_chroma()
+        elif settings.VECTOR_DB == "local":
+            from .local_integration import initialize_local
+            _vector_store = initialize_local()
         else:
             raise ValueError(f"Unsupported vector DB: {settings.VECTOR_DB}")
+    return _vector_store
+
+class EmbeddingStore:
+    def __init__(self):
+        self.db = get_vector_store()
 
-    def store_clauses(self, clauses: List[Dict]) -> bool:
-        """Store clauses in configured vector DB"""
+    def store_clauses(self, clauses: List[Dict], embeddings: Optional[List[List[float]]] = None) -> bool:
+        """
+        Store clauses in configured vector DB.
+        Vectors may be passed in `embeddings` (aligned with `clauses`) or
+        on each clause as "embeddings"; missing ones are embedded by the backend.
+        """
         if not self.db:
             raise ValueError("Vector DB not initialized")
+        if embeddings is not None:
+            if len(embeddings) != len(clauses):
+                raise ValueError("Number of embeddings does not match number of clauses")
+            clauses = [
+                {**clause, "embeddings": embedding}
+                for clause, embedding in zip(clauses, embeddings)
+            ]
         return self.db.upsert_clauses(clauses)
 
     def search_clauses(self, query_embedding: List[float], document_id: str, top_k: int = 5) -> List[Dict]:
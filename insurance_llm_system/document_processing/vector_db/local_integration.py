@@ -0,0 +1,547 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from backend.app.core.config import settings
+from backend.app.utils.metrics import metrics
+from ml_models.embedding_models.ada_embeddings import get_embeddings
+from ml_models.embedding_models.batching import resolve_embeddings
+from .ann_index import IVFPQIndex
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+ATTRIBUTES_FILE = "attributes.json"
+ANN_DIR = "_ann"
+MIN_CAPACITY = 256
+ANN_TRAIN_ITERATIONS = 8
+ANN_TRAIN_POINTS_PER_CELL = 32
+ANN_SAVE_FRACTION = 0.1
+
+def matches_filters(attributes: Dict, filters: Dict) -> bool:
+    """Equality per key; a list/tuple/set value matches any of its members"""
+    for key, expected in filters.items():
+        value = attributes.get(key)
+        if isinstance(expected, (list, tuple, set)):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length so a dot product is the cosine similarity"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class DocumentIndex:
+    """
+    A searchable snapshot of one document: the first `count` rows of its
+    float32 matrix (unit-length rows) and the aligned clause metadata.
+    Snapshots are never modified; appends write rows past `count` and
+    publish a new snapshot, so searches need no lock.
+    """
+    __slots__ = ("generation", "matrix", "clauses", "vectors", "_rows")
+
+    def __init__(self, generation: int, matrix: np.ndarray, clauses: List[Dict]):
+        self.generation = generation
+        self.matrix = matrix  # full preallocated matrix, len(matrix) >= len(clauses)
+        self.clauses = clauses
+        self.vectors = matrix[:len(clauses)]
+        self._rows: Optional[Dict[str, int]] = None
+
+    def row_of(self, clause_id: str) -> Optional[int]:
+        if self._rows is None:
+            self._rows = {clause["id"]: row for row, clause in enumerate(self.clauses)}
+        return self._rows.get(clause_id)
+
+    def search(self, query: np.ndarray, top_k: int) -> List[Dict]:
+        count = len(self.clauses)
+        if count == 0 or top_k <= 0:
+            return []
+        scores = self.vectors @ query
+        if top_k < count:
+            rows = np.argpartition(scores, count - top_k)[count - top_k:]
+        else:
+            rows = np.arange(count)
+        rows = rows[np.argsort(scores[rows])[::-1]]
+        return [{**self.clauses[row], "score": float(scores[row])} for row in rows]
+
+class LocalVectorManager:
+    """
+    In-process vector store: exact cosine search over per-document matrices.
+
+    A document lives in <LOCAL_VECTOR_DIR>/<document_id>/ as a generation of
+    vectors.<gen>.npy (preallocated, memory-mapped) and clauses.<gen>.jsonl
+    (one line per row; the line count is the row count). New clauses are
+    appended in place, doubling the matrix when it is full. Replacing or
+    deleting clauses writes a compacted generation and switches CURRENT to
+    it atomically.
+
+    Searches without a document_id go through an IVF-PQ index kept in
+    <LOCAL_VECTOR_DIR>/_ann/ once the store holds ANN_MIN_VECTORS vectors.
+    It is loaded or trained in a background thread (started at startup, or
+    by the first cross-document search) and swapped in when ready; until
+    then searches stay exact. Once in place it is updated by every upsert
+    and delete; on load it is reconciled against each document's
+    generation and clause file size, so changes made after it was last
+    saved are re-indexed. Approximate candidates are re-scored with the
+    exact vectors outside the lock. The index keys rows by integer clause
+    id (the database primary key).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.LOCAL_VECTOR_DIR
+        os.makedirs(self.path, exist_ok=True)
+        self._documents: Dict[str, DocumentIndex] = {}
+        self._attributes: Dict[str, Dict] = {}
+        self._ann: Optional[IVFPQIndex] = None
+        self._ann_unsaved = 0
+        self._ann_thread: Optional[threading.Thread] = None
+        # Documents changed while the index is being prepared, re-indexed before it is swapped in
+        self._ann_touched: Optional[set] = None
+        # Preparation found too few vectors; retried once clauses are upserted
+        self._ann_checked = False
+        self._lock = threading.Lock()
+
+    def _document_dir(self, document_id: str) -> str:
+        return os.path.join(self.path, document_id)
+
+    def _document_ids(self) -> List[str]:
+        return [name for name in os.listdir(self.path) if not name.startswith("_")]
+
+    def _files(self, document_id: str, generation: int):
+        directory = self._document_dir(document_id)
+        return (
+            os.path.join(directory, f"vectors.{generation}.npy"),
+            os.path.join(directory, f"clauses.{generation}.jsonl")
+        )
+
+    def _read(self, document_id: str, mmap_mode: str = "r") -> Optional[DocumentIndex]:
+        """The document's current generation from disk, bypassing the cache"""
+        try:
+            with open(os.path.join(self._document_dir(document_id), CURRENT_FILE)) as f:
+                generation = int(f.read())
+            vectors_path, clauses_path = self._files(document_id, generation)
+            matrix = np.load(vectors_path, mmap_mode=mmap_mode)
+            with open(clauses_path, encoding="utf-8") as f:
+                # A torn last line is dropped; rows past the line count are ignored
+                clauses = [json.loads(line) for line in f if line.endswith("\n")]
+        except (FileNotFoundError, ValueError):
+            # Absent, or replaced by a newer generation while being read
+            return None
+        return DocumentIndex(generation, matrix, clauses)
+
+    def _load(self, document_id: str) -> Optional[DocumentIndex]:
+        index = self._documents.get(document_id)
+        if index is None:
+            index = self._read(document_id, "r+")
+            if index is not None:
+                self._documents[document_id] = index
+        return index
+
+    def _write_generation(self, document_id: str, generation: int, vectors: np.ndarray, clauses: List[Dict]) -> DocumentIndex:
+        """Write a fresh generation holding exactly these rows and make it current"""
+        directory = self._document_dir(document_id)
+        os.makedirs(directory, exist_ok=True)
+        vectors_path, clauses_path = self._files(document_id, generation)
+        matrix = np.lib.format.open_memmap(
+            vectors_path, mode="w+", dtype=np.float32,
+            shape=(max(MIN_CAPACITY, 2 * len(vectors)), vectors.shape[1])
+        )
+        matrix[:len(vectors)] = vectors
+        matrix.flush()
+        with open(clauses_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(clause) + "\n" for clause in clauses)
+        current_path = os.path.join(directory, CURRENT_FILE)
+        with open(current_path + ".tmp", "w") as f:
+            f.write(str(generation))
+        os.replace(current_path + ".tmp", current_path)
+
+        if generation:
+            for path in self._files(document_id, generation - 1):
+                if os.path.exists(path):
+                    os.remove(path)
+        index = DocumentIndex(generation, matrix, clauses)
+        self._documents[document_id] = index
+        return index
+
+    def _append(self, current: DocumentIndex, document_id: str, vectors: np.ndarray, clauses: List[Dict]) -> DocumentIndex:
+        count = len(current.clauses)
+        if count + len(vectors) > len(current.matrix):
+            return self._write_generation(
+                document_id, current.generation + 1,
+                np.concatenate([current.vectors, vectors]), current.clauses + clauses
+            )
+        current.matrix[count:count + len(vectors)] = vectors
+        current.matrix.flush()
+        _, clauses_path = self._files(document_id, current.generation)
+        with open(clauses_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(clause) + "\n" for clause in clauses)
+        index = DocumentIndex(current.generation, current.matrix, current.clauses + clauses)
+        self._documents[document_id] = index
+        return index
+
+    def _drop(self, document_id: str):
+        self._documents.pop(document_id, None)
+        self._attributes.pop(document_id, None)
+        shutil.rmtree(self._document_dir(document_id), ignore_errors=True)
+
+    def _document_attributes(self, document_id: str) -> Dict:
+        attributes = self._attributes.get(document_id)
+        if attributes is None:
+            try:
+                with open(os.path.join(self._document_dir(document_id), ATTRIBUTES_FILE), encoding="utf-8") as f:
+                    attributes = json.load(f)
+            except FileNotFoundError:
+                attributes = {}
+            self._attributes[document_id] = attributes
+        return attributes
+
+    def _set_attributes(self, document_id: str, attributes: Dict):
+        if attributes == self._document_attributes(document_id):
+            return
+        path = os.path.join(self._document_dir(document_id), ATTRIBUTES_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(attributes, f)
+        os.replace(path + ".tmp", path)
+        self._attributes[document_id] = attributes
+
+    def _fingerprint(self, document_id: str) -> Optional[List[int]]:
+        """(generation, clause file size): changes whenever the document's rows change"""
+        try:
+            with open(os.path.join(self._document_dir(document_id), CURRENT_FILE)) as f:
+                generation = int(f.read())
+            return [generation, os.path.getsize(self._files(document_id, generation)[1])]
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _ann_paths(self):
+        directory = os.path.join(self.path, ANN_DIR)
+        return os.path.join(directory, "index.npz"), os.path.join(directory, "manifest.json")
+
+    def _save_ann(self):
+        """Write the index, then the manifest it is consistent with"""
+        index_path, manifest_path = self._ann_paths()
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        self._ann.save(index_path)
+        manifest = {document_id: self._fingerprint(document_id) for document_id in self._ann.documents}
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+        self._ann_unsaved = 0
+
+    def _index_document(self, ann: IVFPQIndex, document_id: str, current: Optional[DocumentIndex]):
+        ann.remove(document_id)
+        if current is not None and current.clauses:
+            ann.add(current.vectors, document_id, [int(clause["id"]) for clause in current.clauses])
+
+    def _load_ann(self) -> Optional[Tuple[IVFPQIndex, bool]]:
+        """The saved index brought up to date with the documents, and whether it changed"""
+        index_path, manifest_path = self._ann_paths()
+        if not os.path.exists(manifest_path):
+            return None
+        try:
+            ann = IVFPQIndex.load(index_path)
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable IVF-PQ index: {str(e)}")
+            return None
+
+        documents = self._document_ids()
+        stale = [document_id for document_id in documents if manifest.get(document_id) != self._fingerprint(document_id)]
+        stale += [document_id for document_id in set(ann.documents) - set(documents)]
+        for document_id in stale:
+            self._index_document(ann, document_id, self._read(document_id))
+        logger.info(f"Loaded IVF-PQ index with {ann.size} vectors ({len(stale)} documents re-indexed)")
+        return ann, bool(stale)
+
+    def _build_ann(self) -> Optional[IVFPQIndex]:
+        """Train an index over every document, or None below ANN_MIN_VECTORS"""
+        indexes = {}
+        for document_id in self._document_ids():
+            index = self._read(document_id)
+            if index is not None and index.clauses:
+                indexes[document_id] = index
+        total = sum(len(index.clauses) for index in indexes.values())
+        if total < settings.ANN_MIN_VECTORS:
+            return None
+
+        started = time.perf_counter()
+        nlist = settings.ANN_NLIST or int(4 * np.sqrt(total))
+        # Train on a uniform sample of rows across all documents
+        rng = np.random.default_rng(0)
+        picks = np.sort(rng.choice(total, size=min(total, nlist * ANN_TRAIN_POINTS_PER_CELL), replace=False))
+        sample, offset = [], 0
+        for index in indexes.values():
+            rows = picks[(picks >= offset) & (picks < offset + len(index.clauses))] - offset
+            sample.append(index.vectors[rows])
+            offset += len(index.clauses)
+
+        dim = next(iter(indexes.values())).vectors.shape[1]
+        ann = IVFPQIndex(dim, nlist, settings.ANN_PQ_SUBQUANTIZERS)
+        ann.train(np.concatenate(sample), ANN_TRAIN_ITERATIONS)
+        for document_id, index in indexes.items():
+            ann.add(index.vectors, document_id, [int(clause["id"]) for clause in index.clauses])
+        logger.info(f"Built IVF-PQ index over {total} vectors ({nlist} cells) in {time.perf_counter() - started:.1f}s")
+        return ann
+
+    def _prepare_ann(self):
+        """Load or train the index without the lock, then swap it in under it"""
+        ann, changed = None, False
+        try:
+            loaded = self._load_ann()
+            if loaded is not None:
+                ann, changed = loaded
+            else:
+                ann, changed = self._build_ann(), True
+        except Exception as e:
+            logger.error(f"IVF-PQ index preparation failed: {str(e)}")
+        with self._lock:
+            try:
+                if ann is not None:
+                    for document_id in self._ann_touched:
+                        self._index_document(ann, document_id, self._load(document_id))
+                    self._ann = ann
+                    if changed or self._ann_touched:
+                        self._save_ann()
+            finally:
+                self._ann_touched = None
+                self._ann_thread = None
+
+    def _start_ann(self) -> Optional[threading.Thread]:
+        """Start preparing the index unless it is ready, in progress or known to be too small (lock held)"""
+        if not settings.ANN_ENABLED or self._ann is not None:
+            return None
+        if self._ann_thread is None and not self._ann_checked:
+            self._ann_touched = set()
+            self._ann_checked = True
+            self._ann_thread = threading.Thread(target=self._prepare_ann, name="ivfpq-index", daemon=True)
+            self._ann_thread.start()
+        return self._ann_thread
+
+    def prepare_ann(self, wait: bool = False):
+        """
+        Load or train the IVF-PQ index in the background; with `wait`,
+        return once it is in place (or found unnecessary).
+        """
+        with self._lock:
+            thread = self._start_ann()
+        if wait and thread is not None:
+            thread.join()
+
+    def _get_ann(self) -> Optional[IVFPQIndex]:
+        """The index if it is ready, starting its preparation otherwise (lock held)"""
+        self._start_ann()
+        return self._ann if settings.ANN_ENABLED else None
+
+    def _ann_pending(self, document_id: str):
+        """Note a change made while there is no index to apply it to"""
+        if self._ann_touched is not None:
+            self._ann_touched.add(document_id)
+        self._ann_checked = False
+
+    def _ann_add(self, document_id: str, vectors: np.ndarray, records: List[Dict]):
+        if self._ann is None:
+            self._ann_pending(document_id)
+            return
+        self._ann.add(vectors, document_id, [int(record["id"]) for record in records])
+        self._ann_changed(len(records))
+
+    def _ann_remove(self, document_id: str, clause_ids: Optional[Iterable] = None):
+        if self._ann is None:
+            self._ann_pending(document_id)
+            return
+        removed = self._ann.remove(document_id, None if clause_ids is None else [int(clause_id) for clause_id in clause_ids])
+        if self._ann.tombstone_ratio() > settings.ANN_COMPACT_RATIO:
+            # Searches in flight keep reading the old copy
+            self._ann = self._ann.compacted()
+            self._save_ann()
+            metrics.inc("ann_compactions")
+        else:
+            self._ann_changed(removed)
+
+    def _ann_changed(self, rows: int):
+        """Save once the unsaved changes are a sizeable fraction of the index"""
+        self._ann_unsaved += rows
+        if self._ann_unsaved >= max(1000, ANN_SAVE_FRACTION * self._ann.size):
+            self._save_ann()
+
+    def upsert_clauses(self, clauses: List[Dict]) -> bool:
+        """
+        Store clauses, embedding only clauses without a precomputed vector.
+        An "attributes" dict on a clause (file type, version, document
+        metadata) is kept per document for filtered searches.
+        """
+        try:
+            if not clauses:
+                return False
+            embeddings = resolve_embeddings(clauses, get_embeddings)
+            by_document: Dict[str, List[int]] = {}
+            for i, clause in enumerate(clauses):
+                by_document.setdefault(str(clause["document_id"]), []).append(i)
+
+            with self._lock:
+                for document_id, positions in by_document.items():
+                    vectors = normalize_rows(np.asarray([embeddings[i] for i in positions], dtype=np.float32))
+                    records = [{
+                        "id": str(clauses[i]["id"]),
+                        "text": clauses[i]["text"],
+                        "section": clauses[i].get("section", ""),
+                        "page_number": clauses[i].get("page_number", 0)
+                    } for i in positions]
+
+                    current = self._load(document_id)
+                    if current is None:
+                        self._write_generation(document_id, 0, vectors, records)
+                    else:
+                        if current.matrix.shape[1] != vectors.shape[1]:
+                            raise ValueError(
+                                f"Embedding dimension {vectors.shape[1]} does not match "
+                                f"the index for document {document_id} ({current.matrix.shape[1]})"
+                            )
+                        replaced = {record["id"] for record in records}
+                        keep = [row for row, clause in enumerate(current.clauses) if clause["id"] not in replaced]
+                        if len(keep) == len(current.clauses):
+                            self._append(current, document_id, vectors, records)
+                        else:
+                            self._write_generation(
+                                document_id, current.generation + 1,
+                                np.concatenate([current.vectors[keep], vectors]),
+                                [current.clauses[row] for row in keep] + records
+                            )
+                            self._ann_remove(document_id, replaced)
+                    self._ann_add(document_id, vectors, records)
+
+                    attributes = clauses[positions[-1]].get("attributes")
+                    if attributes is not None:
+                        self._set_attributes(document_id, attributes)
+
+            logger.info(f"Upserted {len(clauses)} clauses to the local vector index")
+            return True
+        except Exception as e:
+            logger.error(f"Local vector upsert failed: {str(e)}")
+            raise
+
+    def search_clauses(
+        self,
+        query_embedding: List[float],
+        document_id: Optional[str] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Top-k clauses by cosine similarity. Within one document the search is
+        exact (a matrix-vector product and a partial sort). Without a
+        document_id it spans every document, or only documents whose
+        attributes match `filters`, through the IVF-PQ index when one is
+        available; filters matching few vectors are answered exactly.
+        """
+        try:
+            query = np.asarray(query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            if norm:
+                query = query / norm
+
+            ann = None
+            with self._lock:
+                if document_id is not None:
+                    documents = [str(document_id)]
+                else:
+                    documents = self._document_ids()
+                    if filters:
+                        documents = [
+                            name for name in documents
+                            if matches_filters(self._document_attributes(name), filters)
+                        ]
+                    ann = self._get_ann()
+                    if ann is not None and filters and self._ann_rows(ann, documents) <= settings.ANN_EXACT_FILTER_ROWS:
+                        ann = None
+                if ann is None:
+                    indexes = {name: self._load(name) for name in documents}
+            if ann is not None:
+                return self._search_ann(ann, query, top_k, documents if filters else None)
+            matches = [
+                {**match, "document_id": name}
+                for name, index in indexes.items() if index is not None
+                for match in index.search(query, top_k)
+            ]
+            if len(indexes) > 1:
+                matches = sorted(matches, key=lambda match: match["score"], reverse=True)[:top_k]
+            return matches
+        except Exception as e:
+            logger.error(f"Local vector search failed: {str(e)}")
+            raise
+
+    def _ann_rows(self, ann: IVFPQIndex, documents: List[str]) -> int:
+        return sum(ann.live_rows.get(ann.document_codes.get(name, -1), 0) for name in documents)
+
+    def _search_ann(self, ann: IVFPQIndex, query: np.ndarray, top_k: int, documents: Optional[List[str]]) -> List[Dict]:
+        """
+        IVF-PQ candidates, re-scored with the exact vectors of their
+        documents. Only the snapshot lookup takes the lock; candidates
+        whose clause has since been replaced are skipped.
+        """
+        candidates = ann.search(query, top_k * settings.ANN_RERANK_FACTOR, settings.ANN_NPROBE, documents)
+        by_document: Dict[str, List[int]] = {}
+        for name, clause_id, _ in candidates:
+            by_document.setdefault(name, []).append(clause_id)
+        with self._lock:
+            indexes = {name: self._load(name) for name in by_document}
+
+        matches = []
+        for name, clause_ids in by_document.items():
+            index = indexes[name]
+            if index is None:
+                continue
+            rows = [row for row in (index.row_of(str(clause_id)) for clause_id in clause_ids) if row is not None]
+            scores = index.vectors[rows] @ query
+            matches += [
+                {**index.clauses[row], "document_id": name, "score": float(score)}
+                for row, score in zip(rows, scores)
+            ]
+        matches.sort(key=lambda match: match["score"], reverse=True)
+        return matches[:top_k]
+
+    def delete_clauses(self, document_id: str, clause_ids: Optional[List] = None) -> bool:
+        """Delete all clauses for a specific document, or only the given clause ids"""
+        try:
+            document_id = str(document_id)
+            with self._lock:
+                current = None if clause_ids is None else self._load(document_id)
+                if clause_ids is None:
+                    self._drop(document_id)
+                    self._ann_remove(document_id)
+                elif current is not None:
+                    removed = {str(clause_id) for clause_id in clause_ids}
+                    keep = [row for row, clause in enumerate(current.clauses) if clause["id"] not in removed]
+                    if not keep:
+                        self._drop(document_id)
+                    elif len(keep) != len(current.clauses):
+                        self._write_generation(
+                            document_id, current.generation + 1,
+                            current.vectors[keep], [current.clauses[row] for row in keep]
+                        )
+                    self._ann_remove(document_id, removed)
+            logger.info(f"Deleted clauses for document: {document_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Local vector deletion failed: {str(e)}")
+            raise
+
+# Global local index instance
+local_manager: Optional[LocalVectorManager] = None
+
+def initialize_local() -> LocalVectorManager:
+    """Initialize and return the local vector index"""
+    global local_manager
+    if local_manager is None:
+        local_manager = LocalVectorManager()
+        local_manager.prepare_ann()
+    return local_manager
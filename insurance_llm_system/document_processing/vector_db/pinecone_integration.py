@@ -3,6 +3,7 @@ from typing import List, Dict, Optional, Union
 from pinecone import Pinecone, ServerlessSpec
 from backend.app.core.config import settings
 from ml_models.embedding_models.ada_embeddings import get_embeddings
+from ml_models.embedding_models.batching import resolve_embeddings
 
 logger = logging.getLogger(__name__)
 
@@ -43,15 +44,22 @@ class PineconeManager:
             raise
 
     def upsert_clauses(self, clauses: List[Dict]) -> bool:
-        """Store document clauses in Pinecone with embeddings"""
+        """
+        Store document clauses in Pinecone.
+        Precomputed clause["embeddings"] are used as given; clauses without
+        one are embedded in a single batched pass.
+        """
         try:
-            vectors = []
+            valid_clauses = []
             for clause in clauses:
                 if not isinstance(clause, dict) or "text" not in clause:
                     logger.warning(f"Skipping invalid clause: {clause}")
                     continue
-                    
-                embedding = get_embeddings(clause["text"])
+                valid_clauses.append(clause)
+            
+            embeddings = resolve_embeddings(valid_clauses, get_embeddings)
+            vectors = []
+            for clause, embedding in zip(valid_clauses, embeddings):
                 vectors.append({
                     "id": str(clause.get("id", "")),
                     "values": embedding,
@@ -99,11 +107,19 @@ class PineconeManager:
             logger.error(f"Pinecone search failed: {str(e)}")
             raise
 
-    def delete_clauses(self, document_id: str) -> bool:
-        """Delete all clauses for a specific document"""
+    def delete_clauses(self, document_id: str, clause_ids: Optional[List] = None) -> bool:
+        """Delete all clauses for a specific document, or only the given clause ids"""
         try:
-            self.index.delete(filter={"document_id": document_id})
-            logger.info(f"Deleted clauses for document: {document_id}")
+            if clause_ids is None:
+                self.index.delete(filter={"document_id": document_id})
+                logger.info(f"Deleted clauses for document: {document_id}")
+                return True
+            
+            ids = [str(clause_id) for clause_id in clause_ids]
+            # Pinecone accepts at most 1000 ids per delete request
+            for start in range(0, len(ids), 1000):
+                self.index.delete(ids=ids[start:start + 1000])
+            logger.info(f"Deleted {len(ids)} clauses for document: {document_id}")
             return True
         except Exception as e:
             logger.error(f"Pinecone deletion failed: {str(e)}")
@@ -134,6 +150,6 @@ def upsert_clauses(clauses: List[Dict]) -> bool:
     """Standalone upsert function for backward compatibility"""
     return get_vector_store().upsert_clauses(clauses)
 
-def delete_clauses(document_id: str) -> bool:
+def delete_clauses(document_id: str, clause_ids: Optional[List] = None) -> bool:
     """Standalone delete function"""
-    return get_vector_store().delete_clauses(document_id)
\ No newline at end of file
+    return get_vector_store().delete_clauses(document_id, clause_ids)
\ No newline at end of file
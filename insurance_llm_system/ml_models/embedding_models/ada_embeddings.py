@@ -2,31 +2,73 @@ import openai
 import logging
 from typing import List, Union
 from backend.app.core.config import settings
+from backend.app.utils.metrics import metrics
+from ml_models.llm_integration.http_client import call_with_rate_limit, make_requests_session, openai_http_client
+from ml_models.llm_integration.rate_limiter import estimate_embedding_tokens
+from .embedding_cache import get_embedding_cache
 
 logger = logging.getLogger(__name__)
 
 class OpenAIEmbeddings:
+    model_name = "text-embedding-ada-002"
+
     def __init__(self):
         if not settings.OPENAI_API_KEY:
             raise ValueError("OpenAI API key not configured")
         openai.api_key = settings.OPENAI_API_KEY
+        openai.api_base = settings.OPENAI_BASE_URL
+        openai.requestssession = make_requests_session
 
     def get_embeddings(self, texts: Union[str, List[str]]) -> List[List[float]]:
         try:
             if isinstance(texts, str):
                 texts = [texts]
             
-            response = openai.Embedding.create(
-                input=texts,
-                model="text-embedding-ada-002"
+            metrics.inc("embedding_calls")
+            metrics.inc("embedding_texts", len(texts))
+            response = call_with_rate_limit(
+                "embeddings",
+                estimate_embedding_tokens(texts),
+                lambda: openai.Embedding.create(input=texts, model=self.model_name)
             )
             return [item['embedding'] for item in response['data']]
         except Exception as e:
             logger.error(f"OpenAI embedding failed: {str(e)}")
             raise
 
+    async def aget_embeddings(self, texts: Union[str, List[str]]) -> List[List[float]]:
+        """Async get_embeddings over the shared pooled HTTP client"""
+        try:
+            if isinstance(texts, str):
+                texts = [texts]
+
+            metrics.inc("embedding_calls")
+            metrics.inc("embedding_texts", len(texts))
+            response = await openai_http_client.post(
+                "/embeddings",
+                {"input": texts, "model": self.model_name},
+                scheduler_name="embeddings",
+                tokens=estimate_embedding_tokens(texts)
+            )
+            # The API may return items out of input order
+            return [item["embedding"] for item in sorted(response["data"], key=lambda item: item["index"])]
+        except Exception as e:
+            logger.error(f"OpenAI embedding failed: {str(e)}")
+            raise
+
 # Singleton instance
 ada_wrapper = OpenAIEmbeddings()
 
 def get_embeddings(texts: Union[str, List[str]]) -> List[List[float]]:
-    return ada_wrapper.get_embeddings(texts)
\ No newline at end of file
+    if isinstance(texts, str):
+        texts = [texts]
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return ada_wrapper.get_embeddings(texts)
+    return get_embedding_cache().get_or_embed(ada_wrapper.model_name, texts, ada_wrapper.get_embeddings)
+
+async def aget_embeddings(texts: Union[str, List[str]]) -> List[List[float]]:
+    if isinstance(texts, str):
+        texts = [texts]
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return await ada_wrapper.aget_embeddings(texts)
+    return await get_embedding_cache().aget_or_embed(ada_wrapper.model_name, texts, ada_wrapper.aget_embeddings)
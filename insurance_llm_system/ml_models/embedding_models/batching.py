@@ -0,0 +1,76 @@
+import logging
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TypeVar
+from backend.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+T = TypeVar("T")
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token for English text)"""
+    return max(1, (len(text) + 3) // 4)
+
+def batch_items(
+    items: Iterable[T],
+    get_text: Callable[[T], str],
+    max_items: Optional[int] = None,
+    max_tokens: Optional[int] = None
+) -> Iterator[List[T]]:
+    """
+    Group items (consumed lazily) into batches bounded by item count and token budget.
+    A single item larger than the token budget is sent in a batch of its own.
+    """
+    max_items = max_items or settings.EMBEDDING_BATCH_SIZE
+    max_tokens = max_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+
+    batch: List[T] = []
+    batch_tokens = 0
+    for item in items:
+        tokens = estimate_tokens(get_text(item))
+        if batch and (len(batch) >= max_items or batch_tokens + tokens > max_tokens):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+def iter_batches(
+    texts: Sequence[str],
+    max_items: Optional[int] = None,
+    max_tokens: Optional[int] = None
+) -> Iterator[List[int]]:
+    """Group text indices into batches bounded by item count and token budget"""
+    return batch_items(range(len(texts)), lambda i: texts[i], max_items, max_tokens)
+
+def embed_in_batches(
+    texts: Sequence[str],
+    embed_fn: EmbedFn,
+    max_items: Optional[int] = None,
+    max_tokens: Optional[int] = None
+) -> List[List[float]]:
+    """Embed texts in as few requests as the batch limits allow, preserving order"""
+    vectors: List[Optional[List[float]]] = [None] * len(texts)
+    for batch in iter_batches(texts, max_items, max_tokens):
+        embeddings = embed_fn([texts[i] for i in batch])
+        if len(embeddings) != len(batch):
+            raise ValueError(
+                f"Embedding backend returned {len(embeddings)} vectors for {len(batch)} texts"
+            )
+        for i, embedding in zip(batch, embeddings):
+            vectors[i] = embedding
+    return vectors
+
+def resolve_embeddings(clauses: Sequence[Dict], embed_fn: EmbedFn) -> List[List[float]]:
+    """
+    Return one vector per clause, using precomputed "embeddings" as given.
+    Clauses without a vector are embedded together in batched requests.
+    """
+    vectors = [clause.get("embeddings") for clause in clauses]
+    missing = [i for i, vector in enumerate(vectors) if vector is None or len(vector) == 0]
+    if missing:
+        embedded = embed_in_batches([clauses[i]["text"] for i in missing], embed_fn)
+        for i, vector in zip(missing, embedded):
+            vectors[i] = vector
+    return vectors
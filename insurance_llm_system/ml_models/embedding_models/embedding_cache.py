@@ -0,0 +1,203 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+import numpy as np
+from backend.app.core.config import settings
+from backend.app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+AsyncEmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+def normalize_text(text: str) -> str:
+    """Whitespace-normalize text so trivially different copies share a cache entry"""
+    return " ".join(text.split())
+
+def cache_key(model: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).digest()
+
+def encode_vector(vector: Sequence[float]) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+def decode_vector(blob: bytes) -> List[float]:
+    return np.frombuffer(blob, dtype=np.float32).tolist()
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache keyed by (model, normalized text hash).
+    An in-process LRU sits in front of an on-disk SQLite tier; both hold
+    vectors as float32 bytes. The disk tier evicts least recently used
+    entries once it grows past `max_bytes`.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = None, memory_items: int = None):
+        self.path = path or settings.EMBEDDING_CACHE_PATH
+        self.max_bytes = max_bytes or settings.EMBEDDING_CACHE_MAX_BYTES
+        self.memory_items = memory_items or settings.EMBEDDING_CACHE_MEMORY_ITEMS
+        self._memory: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._lookups = 0
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key BLOB PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL,"
+            " size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_access ON embeddings (last_access)")
+        self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: Sequence[bytes]) -> List[Optional[bytes]]:
+        """Look up encoded vectors; None marks a miss"""
+        found: Dict[bytes, bytes] = {}
+        with self._lock:
+            disk_keys = []
+            for key in keys:
+                blob = self._memory.get(key)
+                if blob is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = blob
+                else:
+                    disk_keys.append(key)
+
+            if disk_keys:
+                unique = list(dict.fromkeys(disk_keys))
+                for start in range(0, len(unique), 500):
+                    part = unique[start:start + 500]
+                    placeholders = ",".join("?" * len(part))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = blob
+                        self._remember(key, blob)
+                    if rows:
+                        self._conn.execute(
+                            f"UPDATE embeddings SET last_access = ? WHERE key IN ({placeholders})",
+                            [time.time(), *[key for key, _ in rows]]
+                        )
+
+            memory_hits = len(keys) - len(disk_keys)
+            disk_hits = sum(1 for key in disk_keys if key in found)
+            misses = len(keys) - memory_hits - disk_hits
+            self._hits += memory_hits + disk_hits
+            self._lookups += len(keys)
+            hit_rate = self._hits / self._lookups if self._lookups else 0.0
+
+        metrics.inc("embedding_cache_hits_memory", memory_hits)
+        metrics.inc("embedding_cache_hits_disk", disk_hits)
+        metrics.inc("embedding_cache_misses", misses)
+        metrics.set_gauge("embedding_cache_hit_rate", hit_rate)
+        return [found.get(key) for key in keys]
+
+    def put_many(self, model: str, items: Dict[bytes, bytes]):
+        """Store encoded vectors in both tiers"""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            for key, blob in items.items():
+                self._remember(key, blob)
+            self._conn.execute("BEGIN")
+            try:
+                for key, blob in items.items():
+                    previous = self._conn.execute(
+                        "SELECT size FROM embeddings WHERE key = ?", (key,)
+                    ).fetchone()
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO embeddings (key, model, vector, size, last_access)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (key, model, blob, len(blob), now)
+                    )
+                    self._disk_bytes += len(blob) - (previous[0] if previous else 0)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            if self._disk_bytes > self.max_bytes:
+                self._evict()
+            metrics.set_gauge("embedding_cache_disk_bytes", self._disk_bytes)
+
+    def _remember(self, key: bytes, blob: bytes):
+        self._memory[key] = blob
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        """Drop least recently used disk entries until 90% of the size budget"""
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while self._disk_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM embeddings ORDER BY last_access LIMIT 500"
+            ).fetchall()
+            if not rows:
+                break
+            batch = []
+            for key, size in rows:
+                batch.append(key)
+                self._disk_bytes -= size
+                if self._disk_bytes <= target:
+                    break
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", [(key,) for key in batch])
+            evicted += len(batch)
+        metrics.inc("embedding_cache_evictions", evicted)
+        logger.debug(f"Evicted {evicted} embeddings from disk cache")
+
+    def get_or_embed(self, model: str, texts: Sequence[str], embed_fn: EmbedFn) -> List[List[float]]:
+        """Return vectors for texts, embedding only cache misses (each distinct text once)"""
+        keys, blobs, missing = self._lookup(model, texts)
+        if missing:
+            vectors = embed_fn(list(missing.values()))
+            blobs = self._fill(model, keys, blobs, missing, vectors)
+        return [decode_vector(blob) for blob in blobs]
+
+    async def aget_or_embed(self, model: str, texts: Sequence[str], embed_fn: AsyncEmbedFn) -> List[List[float]]:
+        """get_or_embed with an awaitable embed_fn for cache misses"""
+        keys, blobs, missing = self._lookup(model, texts)
+        if missing:
+            vectors = await embed_fn(list(missing.values()))
+            blobs = self._fill(model, keys, blobs, missing, vectors)
+        return [decode_vector(blob) for blob in blobs]
+
+    def _lookup(self, model: str, texts: Sequence[str]):
+        keys = [cache_key(model, text) for text in texts]
+        blobs = self.get_many(keys)
+
+        missing: Dict[bytes, str] = {}
+        for key, text, blob in zip(keys, texts, blobs):
+            if blob is None and key not in missing:
+                missing[key] = text
+        return keys, blobs, missing
+
+    def _fill(self, model, keys, blobs, missing, vectors) -> List[bytes]:
+        new_items = {key: encode_vector(vector) for key, vector in zip(missing, vectors)}
+        self.put_many(model, new_items)
+        return [blob if blob is not None else new_items[key] for key, blob in zip(keys, blobs)]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# Lazily created process-wide cache
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
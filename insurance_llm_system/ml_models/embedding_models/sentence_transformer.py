@@ -1,6 +1,8 @@
 import logging
 from sentence_transformers import SentenceTransformer
 from backend.app.core.config import settings
+from backend.app.utils.metrics import metrics
+from .embedding_cache import get_embedding_cache
 from typing import List, Union
 import numpy as np
 
@@ -22,6 +24,8 @@ class SentenceTransformerWrapper:
         try:
             if isinstance(texts, str):
                 texts = [texts]
+            metrics.inc("embedding_calls")
+            metrics.inc("embedding_texts", len(texts))
             return self.model.encode(texts, convert_to_numpy=True).tolist()
         except Exception as e:
             logger.error(f"Embedding generation failed: {str(e)}")
@@ -33,4 +37,10 @@ st_wrapper = SentenceTransformerWrapper() if settings.USE_LOCAL_EMBEDDINGS else
 def get_embeddings(texts: Union[str, List[str]]) -> List[List[float]]:
     if not st_wrapper:
         raise ValueError("SentenceTransformer not initialized")
-    return st_wrapper.get_embeddings(texts)
\ No newline at end of file
+    if isinstance(texts, str):
+        texts = [texts]
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return st_wrapper.get_embeddings(texts)
+    return get_embedding_cache().get_or_embed(
+        settings.SENTENCE_TRANSFORMER_MODEL, texts, st_wrapper.get_embeddings
+    )
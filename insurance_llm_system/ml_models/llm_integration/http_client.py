@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import random
+import threading
+from typing import Any, Callable, Dict, Optional, TypeVar
+import aiohttp
+import openai
+import requests
+from openai.api_requestor import MAX_CONNECTION_RETRIES
+from backend.app.core.config import settings
+from backend.app.utils.metrics import metrics
+from .rate_limiter import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Rate limits, overload and transient upstream failures are worth retrying;
+# anything else (bad request, auth) fails the same way every time.
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+T = TypeVar("T")
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Exponential backoff with full jitter, never shorter than a Retry-After hint"""
+    cap = min(settings.OPENAI_RETRY_MAX_BACKOFF_S, settings.OPENAI_RETRY_BACKOFF_S * (2 ** attempt))
+    delay = random.uniform(0, cap)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, settings.OPENAI_RETRY_MAX_BACKOFF_S))
+    return delay
+
+def _retry_after(headers) -> Optional[float]:
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+class OpenAIHTTPClient:
+    """
+    Shared async client for the OpenAI REST API.
+    One aiohttp session with a bounded, keep-alive connection pool serves
+    every request on the event loop; it is rebuilt if used from a new loop.
+    aiohttp is already installed as a dependency of the openai package.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=settings.OPENAI_MAX_CONNECTIONS,
+                    keepalive_timeout=settings.OPENAI_KEEPALIVE_S
+                ),
+                timeout=aiohttp.ClientTimeout(
+                    connect=settings.OPENAI_CONNECT_TIMEOUT_S,
+                    sock_read=settings.OPENAI_TIMEOUT_S
+                ),
+                headers={"Authorization": f"Bearer {settings.OPENAI_API_KEY}"}
+            )
+            self._loop = loop
+        return self._session
+
+    async def post(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        scheduler_name: Optional[str] = None,
+        tokens: int = 0
+    ) -> Dict[str, Any]:
+        """
+        POST a JSON payload, retrying rate limits and transient failures.
+        With a scheduler, every attempt first waits for request/token budget
+        in the caller's priority lane, and responses feed its buckets.
+        """
+        session = self._get_session()
+        scheduler = get_scheduler(scheduler_name) if scheduler_name else None
+        url = settings.OPENAI_BASE_URL.rstrip("/") + path
+        attempt = 0
+        while True:
+            if scheduler is not None:
+                await scheduler.aacquire(tokens)
+            try:
+                async with session.post(url, json=payload) as response:
+                    if scheduler is not None:
+                        scheduler.observe_headers(response.headers)
+                    if response.status not in RETRY_STATUS or attempt >= settings.OPENAI_MAX_RETRIES:
+                        response.raise_for_status()
+                        return await response.json()
+                    reason = f"HTTP {response.status}"
+                    if response.status == 429 and scheduler is not None:
+                        # The scheduler holds every caller until the limit recovers
+                        scheduler.penalize(_retry_after(response.headers))
+                        delay = 0.0
+                    else:
+                        delay = backoff_delay(attempt, _retry_after(response.headers))
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                if attempt >= settings.OPENAI_MAX_RETRIES:
+                    raise
+                reason = type(e).__name__
+                delay = backoff_delay(attempt)
+
+            attempt += 1
+            metrics.inc("openai_retries")
+            logger.warning(f"OpenAI {path} failed ({reason}), retry {attempt} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+# Scheduler of the openai-library call running on this thread, if any
+_sync_call = threading.local()
+
+def _observe_response(response: requests.Response, *args, **kwargs):
+    scheduler = getattr(_sync_call, "scheduler", None)
+    if scheduler is not None:
+        scheduler.observe_headers(response.headers)
+
+def make_requests_session() -> requests.Session:
+    """
+    HTTP session for the openai library (set as openai.requestssession; the
+    library keeps one per thread). The library drops response headers, so
+    a response hook passes them to the scheduler of the calling thread.
+    """
+    session = requests.Session()
+    if isinstance(openai.proxy, str):
+        session.proxies = {"http": openai.proxy, "https": openai.proxy}
+    elif isinstance(openai.proxy, dict):
+        session.proxies = dict(openai.proxy)
+    session.mount("https://", requests.adapters.HTTPAdapter(max_retries=MAX_CONNECTION_RETRIES))
+    session.hooks["response"].append(_observe_response)
+    return session
+
+def call_with_rate_limit(scheduler_name: str, tokens: int, call: Callable[[], T]) -> T:
+    """
+    Run a blocking openai-library call through the named scheduler.
+    Responses feed its buckets (through make_requests_session's hook).
+    Rate-limited (429) attempts are retried once the scheduler admits them
+    again; other errors propagate unchanged.
+    """
+    scheduler = get_scheduler(scheduler_name)
+    if scheduler is None:
+        return call()
+    attempt = 0
+    while True:
+        scheduler.acquire(tokens)
+        _sync_call.scheduler = scheduler
+        try:
+            return call()
+        except openai.error.RateLimitError as e:
+            if attempt >= settings.OPENAI_MAX_RETRIES:
+                raise
+            scheduler.penalize(_retry_after(e.headers or {}))
+            attempt += 1
+            metrics.inc("openai_retries")
+            logger.warning(f"OpenAI {scheduler_name} call rate limited, retry {attempt}")
+        finally:
+            _sync_call.scheduler = None
+
+# Singleton instance
+openai_http_client = OpenAIHTTPClient()
+
+async def close_openai_client():
+    await openai_http_client.close()
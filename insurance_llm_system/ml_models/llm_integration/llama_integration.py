@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import Union, Dict, Any
 from transformers import AutoTokenizer, AutoModelForCausalLM
@@ -62,4 +63,12 @@ def get_llm_response(
             return eval(response[start:end])
         except:
             return {"error": "Could not parse JSON response"}
-    return response
\ No newline at end of file
+    return response
+
+async def aget_llm_response(
+    prompt: str,
+    response_format: str = "text",
+    **kwargs
+) -> Union[str, Dict[str, Any]]:
+    # Local generation is CPU/GPU bound; keep it off the event loop
+    return await asyncio.to_thread(get_llm_response, prompt, response_format, **kwargs)
@@ -1,6 +1,8 @@
 from typing import Union, Dict, Any
 from .openai_integration import get_llm_response as get_openai_response
+from .openai_integration import aget_llm_response as aget_openai_response
 from .llama_integration import get_llm_response as get_llama_response
+from .llama_integration import aget_llm_response as aget_llama_response
 from backend.app.core.config import settings
 
 def get_llm_response(
@@ -24,4 +26,19 @@ def get_llm_response(
             if settings.FALLBACK_TO_OPENAI:
                 return get_openai_response(prompt, response_format, **kwargs)
             raise
-    return get_openai_response(prompt, response_format, **kwargs)
\ No newline at end of file
+    return get_openai_response(prompt, response_format, **kwargs)
+
+async def aget_llm_response(
+    prompt: str,
+    response_format: str = "text",
+    **kwargs
+) -> Union[str, Dict[str, Any]]:
+    """Async get_llm_response: same selection and fallback, awaitable from endpoints"""
+    if settings.USE_LOCAL_LLM:
+        try:
+            return await aget_llama_response(prompt, response_format, **kwargs)
+        except Exception as e:
+            if settings.FALLBACK_TO_OPENAI:
+                return await aget_openai_response(prompt, response_format, **kwargs)
+            raise
+    return await aget_openai_response(prompt, response_format, **kwargs)
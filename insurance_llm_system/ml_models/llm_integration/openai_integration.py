@@ -1,7 +1,10 @@
 import openai
+import json
 import logging
 from typing import Union, Dict, Any
 from backend.app.core.config import settings
+from .http_client import call_with_rate_limit, make_requests_session, openai_http_client
+from .rate_limiter import estimate_chat_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +13,27 @@ class OpenAIWrapper:
         if not settings.OPENAI_API_KEY:
             raise ValueError("OpenAI API key not configured")
         openai.api_key = settings.OPENAI_API_KEY
+        openai.api_base = settings.OPENAI_BASE_URL
+        openai.requestssession = make_requests_session
+
+    def _request(self, prompt: str, response_format: str, temperature: float, max_tokens: int) -> Dict[str, Any]:
+        request = {
+            "model": settings.OPENAI_MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if response_format == "json_object":
+            request["response_format"] = {"type": response_format}
+        return request
+
+    def _parse(self, content: str, response_format: str) -> Union[str, Dict[str, Any]]:
+        if response_format == "json_object":
+            try:
+                return json.loads(content)
+            except (TypeError, ValueError):
+                return {"error": "Invalid JSON response"}
+        return content
 
     def get_response(
         self,
@@ -19,23 +43,34 @@ class OpenAIWrapper:
         max_tokens: int = 1000
     ) -> Union[str, Dict[str, Any]]:
         try:
-            response = openai.ChatCompletion.create(
-                model=settings.OPENAI_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                max_tokens=max_tokens,
-                response_format={"type": response_format} 
-                if response_format == "json_object" else None
+            request = self._request(prompt, response_format, temperature, max_tokens)
+            response = call_with_rate_limit(
+                "chat",
+                estimate_chat_tokens(prompt, max_tokens),
+                lambda: openai.ChatCompletion.create(**request)
             )
-            
-            content = response.choices[0].message.content
-            if response_format == "json_object":
-                try:
-                    return eval(content)
-                except:
-                    return {"error": "Invalid JSON response"}
-            return content
-            
+            return self._parse(response.choices[0].message.content, response_format)
+
+        except Exception as e:
+            logger.error(f"OpenAI request failed: {str(e)}")
+            raise
+
+    async def aget_response(
+        self,
+        prompt: str,
+        response_format: str = "text",
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> Union[str, Dict[str, Any]]:
+        """Async get_response over the shared pooled HTTP client"""
+        try:
+            response = await openai_http_client.post(
+                "/chat/completions",
+                self._request(prompt, response_format, temperature, max_tokens),
+                scheduler_name="chat",
+                tokens=estimate_chat_tokens(prompt, max_tokens)
+            )
+            return self._parse(response["choices"][0]["message"]["content"], response_format)
         except Exception as e:
             logger.error(f"OpenAI request failed: {str(e)}")
             raise
@@ -52,4 +87,15 @@ def get_llm_response(
         prompt=prompt,
         response_format=response_format,
         **kwargs
-    )
\ No newline at end of file
+    )
+
+async def aget_llm_response(
+    prompt: str,
+    response_format: str = "text",
+    **kwargs
+) -> Union[str, Dict[str, Any]]:
+    return await openai_wrapper.aget_response(
+        prompt=prompt,
+        response_format=response_format,
+        **kwargs
+    )
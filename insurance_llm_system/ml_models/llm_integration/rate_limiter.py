@@ -0,0 +1,268 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Mapping, Optional
+from backend.app.core.config import settings
+from backend.app.utils.metrics import metrics
+from ml_models.embedding_models.batching import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes, served strictly in this order
+INTERACTIVE = 0
+INGESTION = 1
+LANE_NAMES = {INTERACTIVE: "interactive", INGESTION: "ingestion"}
+
+_current_lane: ContextVar[int] = ContextVar("llm_priority_lane", default=INTERACTIVE)
+
+@contextmanager
+def priority_lane(lane: int) -> Iterator[None]:
+    """Send the LLM and embedding calls made in this context through `lane`"""
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+def current_lane() -> int:
+    return _current_lane.get()
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Parse an x-ratelimit-reset-* value such as "1s", "6m0s" or "20ms" into seconds"""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+def estimate_chat_tokens(prompt: str, max_tokens: int) -> int:
+    """TPM cost of a chat completion as OpenAI counts it up front: prompt plus max_tokens"""
+    return estimate_tokens(prompt) + max_tokens
+
+def estimate_embedding_tokens(texts) -> int:
+    return sum(estimate_tokens(text) for text in texts)
+
+class TokenBucket:
+    """Refills continuously at capacity per minute, like OpenAI's RPM/TPM limits"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60.0)
+            self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (a request larger than the bucket waits for a full one)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.capacity
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def sync(self, limit: Optional[float], remaining: Optional[float], now: float):
+        """Adopt the server's limit, and its remaining budget when lower than ours"""
+        self._refill(now)
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+
+class _Ticket:
+    __slots__ = ("lane", "tokens", "enqueued", "granted", "cancelled", "event", "loop")
+
+    def __init__(self, lane: int, tokens: int, loop: Optional[asyncio.AbstractEventLoop]):
+        self.lane = lane
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.cancelled = False
+        self.loop = loop
+        self.event = asyncio.Event() if loop is not None else threading.Event()
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self.event.set)
+
+class RateLimitScheduler:
+    """
+    Admits API calls under request and token budgets.
+    Callers wait in a priority queue (interactive lane before ingestion,
+    FIFO within a lane) until both token buckets can cover the request.
+    Both threads (blocking acquire) and coroutines (aacquire) can wait; the
+    caller at the head of the queue sleeps until the buckets refill, the
+    others until they are woken. Rate-limit response headers and 429s
+    correct the buckets to the server's view.
+    """
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: int):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self._queue: List = []
+        self._sequence = itertools.count()
+        self._blocked_until = 0.0
+        self._depth: Dict[int, int] = {lane: 0 for lane in LANE_NAMES}
+
+    def acquire(self, tokens: int, lane: Optional[int] = None) -> float:
+        """Block until the call may be sent; returns the time waited"""
+        ticket = self._enqueue(tokens, lane, None)
+        try:
+            while True:
+                with self._lock:
+                    delay = self._dispatch()
+                    if ticket.granted:
+                        return self._granted(ticket)
+                    ticket.event.clear()
+                    timeout = delay if self._queue and self._queue[0][2] is ticket else None
+                ticket.event.wait(timeout)
+        finally:
+            self._abandon(ticket)
+
+    async def aacquire(self, tokens: int, lane: Optional[int] = None) -> float:
+        """Wait on the event loop until the call may be sent; returns the time waited"""
+        ticket = self._enqueue(tokens, lane, asyncio.get_running_loop())
+        try:
+            while True:
+                with self._lock:
+                    delay = self._dispatch()
+                    if ticket.granted:
+                        return self._granted(ticket)
+                    ticket.event.clear()
+                    timeout = delay if self._queue and self._queue[0][2] is ticket else None
+                try:
+                    await asyncio.wait_for(ticket.event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._abandon(ticket)
+
+    def _enqueue(self, tokens: int, lane: Optional[int], loop) -> _Ticket:
+        ticket = _Ticket(current_lane() if lane is None else lane, tokens, loop)
+        with self._lock:
+            heapq.heappush(self._queue, (ticket.lane, next(self._sequence), ticket))
+            self._depth[ticket.lane] += 1
+            self._report_depth(ticket.lane)
+        return ticket
+
+    def _dispatch(self) -> Optional[float]:
+        """Grant queued calls in order while budget allows; returns the head's wait (lock held)"""
+        while self._queue:
+            ticket = self._queue[0][2]
+            if ticket.cancelled:
+                heapq.heappop(self._queue)
+                continue
+            now = time.monotonic()
+            delay = max(
+                self._blocked_until - now,
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(ticket.tokens, now)
+            )
+            if delay > 0:
+                return delay
+            self.requests.take(1, now)
+            self.tokens.take(ticket.tokens, now)
+            heapq.heappop(self._queue)
+            ticket.granted = True
+            self._depth[ticket.lane] -= 1
+            self._report_depth(ticket.lane)
+            ticket.wake()
+        return None
+
+    def _granted(self, ticket: _Ticket) -> float:
+        waited = time.monotonic() - ticket.enqueued
+        metrics.observe(f"llm_scheduler_{self.name}_{LANE_NAMES[ticket.lane]}_wait_seconds", waited)
+        self._wake_head()
+        return waited
+
+    def _abandon(self, ticket: _Ticket):
+        """Drop a waiter that gave up (cancelled or interrupted) before being granted"""
+        with self._lock:
+            if ticket.granted or ticket.cancelled:
+                return
+            ticket.cancelled = True
+            self._depth[ticket.lane] -= 1
+            self._report_depth(ticket.lane)
+            self._wake_head()
+
+    def _wake_head(self):
+        """Wake the first live waiter so it re-arms the refill timer (lock held)"""
+        while self._queue and self._queue[0][2].cancelled:
+            heapq.heappop(self._queue)
+        if self._queue:
+            self._queue[0][2].wake()
+
+    def _report_depth(self, lane: int):
+        metrics.set_gauge(f"llm_scheduler_{self.name}_{LANE_NAMES[lane]}_queue_depth", self._depth[lane])
+
+    def observe_headers(self, headers: Mapping[str, str]):
+        """Correct the buckets from x-ratelimit-* response headers"""
+        def number(key: str) -> Optional[float]:
+            try:
+                value = headers.get(key)
+                return float(value) if value is not None else None
+            except ValueError:
+                return None
+
+        with self._lock:
+            now = time.monotonic()
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                remaining = number(f"x-ratelimit-remaining-{kind}")
+                bucket.sync(number(f"x-ratelimit-limit-{kind}"), remaining, now)
+                reset_s = parse_reset(headers.get(f"x-ratelimit-reset-{kind}"))
+                if remaining is not None and remaining < 1 and reset_s:
+                    # Exhausted: nothing is admitted until the server says it has refilled
+                    self._blocked_until = max(self._blocked_until, now + reset_s)
+
+    def penalize(self, retry_after: Optional[float]):
+        """The server rejected a call with 429: hold every lane until it has recovered"""
+        metrics.inc(f"llm_scheduler_{self.name}_rate_limited")
+        with self._lock:
+            pause = retry_after if retry_after is not None else 1.0
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+            self._wake_head()
+
+_schedulers: Dict[str, RateLimitScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+def get_scheduler(name: str) -> Optional[RateLimitScheduler]:
+    """Scheduler for "chat" or "embeddings" calls, or None when rate limiting is disabled"""
+    if not settings.OPENAI_RATE_LIMIT_ENABLED:
+        return None
+    with _schedulers_lock:
+        scheduler = _schedulers.get(name)
+        if scheduler is None:
+            if name == "chat":
+                scheduler = RateLimitScheduler(name, settings.OPENAI_CHAT_RPM, settings.OPENAI_CHAT_TPM)
+            else:
+                scheduler = RateLimitScheduler(name, settings.OPENAI_EMBEDDING_RPM, settings.OPENAI_EMBEDDING_TPM)
+            _schedulers[name] = scheduler
+        return scheduler
+
+def reset_schedulers():
+    """Forget scheduler state so the next call picks up changed limits"""
+    with _schedulers_lock:
+        _schedulers.clear()